@@ -1,12 +1,46 @@
-from flask import Flask
+"""
+Demo web application served on the deployed instance
+
+The homepage is pre-rendered into bytes at startup; per request only the
+timestamp is spliced in. Hostname and IP are resolved once (re-resolved
+every HOST_REFRESH_SECONDS if set), never on the request path.
+
+The homepage ETag covers everything but the timestamp, so it is a weak
+validator (RFC 9110 8.8.1): browsers revalidate and get a 304 without
+the page being rendered.
+
+/metrics, /health/live and /health/ready come from docker/metrics.py
+(copied next to this file on the instance); /health is the readiness
+probe.
+"""
+
+from flask import Flask, Response, request
+import hashlib
+import json
+import os
 import socket
+import sys
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime
 
+try:
+    import metrics
+except ImportError:  # running from the repository checkout
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'docker'))
+    import metrics
+
 app = Flask(__name__)
 
-@app.route('/')
-def home():
-    return f"""
+# Re-resolve hostname/IP this often (seconds); 0 = only at startup
+HOST_REFRESH_SECONDS = float(os.environ.get('HOST_REFRESH_SECONDS', '0'))
+
+# Revalidate every time - cheap, since a matching ETag skips rendering
+HOME_CACHE_CONTROL = 'no-cache'
+
+PAGE_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -90,15 +124,15 @@ def home():
             </p>
             
             <div class="info">
-                <strong>🖥️ Hostname:</strong> {socket.gethostname()}
+                <strong>🖥️ Hostname:</strong> {hostname}
             </div>
             
             <div class="info">
-                <strong>🌐 Server IP:</strong> {socket.gethostbyname(socket.gethostname())}
+                <strong>🌐 Server IP:</strong> {ip}
             </div>
             
             <div class="info">
-                <strong>⏰ Deployed:</strong> {datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")}
+                <strong>⏰ Deployed:</strong> {timestamp}
             </div>
             
             <div class="info">
@@ -126,14 +160,120 @@ def home():
     </html>
     """
 
+# Static bytes around the spliced-in timestamp, for one hostname/IP
+Page = namedtuple('Page', ['head', 'tail', 'etag', 'health_head',
+                           'resolved_at'])
+
+
+def resolve_host():
+    """Return (hostname, IP) - the IP is 'unknown' if it does not resolve"""
+    hostname = socket.gethostname()
+    try:
+        ip = socket.gethostbyname(hostname)
+    except OSError:
+        ip = 'unknown'
+    return hostname, ip
+
+
+def build_page(hostname, ip, resolved_at=None):
+    head, tail = PAGE_TEMPLATE.split('{timestamp}')
+    head = head.format(hostname=hostname, ip=ip).encode()
+    tail = tail.format().encode()
+    health_head = ('{"hostname":' + json.dumps(hostname) +
+                   ',"project":"mini-infra-gpt","status":"healthy",'
+                   '"timestamp":"').encode()
+    etag = f'W/"{hashlib.sha1(head + tail).hexdigest()[:16]}"'
+    return Page(head, tail, etag, health_head,
+                time.time() if resolved_at is None else resolved_at)
+
+
+_page = build_page(*resolve_host())
+_refresh_lock = threading.Lock()
+
+# ((page, second), body) of the last rendered homepage
+_rendered = ((None, None), None)
+
+
+def current_page(now):
+    """The pre-rendered page, re-resolving the host when the refresh is due"""
+    global _page
+    page = _page
+    if (HOST_REFRESH_SECONDS and now - page.resolved_at >= HOST_REFRESH_SECONDS
+            and _refresh_lock.acquire(blocking=False)):
+        # One request re-resolves; concurrent ones keep serving the old page
+        try:
+            _page = page = build_page(*resolve_host(), resolved_at=now)
+        finally:
+            _refresh_lock.release()
+    return page
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # No str.removeprefix: Amazon Linux 2 runs Python 3.7
+    etag = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == etag:
+            return True
+    return False
+
+
+def render_home(page, now):
+    """Homepage bytes at time `now` (reused within the same second)"""
+    global _rendered
+    second = int(now)
+    key, body = _rendered
+    if key != (page, second):
+        stamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S UTC")
+        body = page.head + stamp.encode() + page.tail
+        _rendered = ((page, second), body)
+    return body
+
+
+@app.route('/')
+def home():
+    now = time.time()
+    page = current_page(now)
+    headers = {'ETag': page.etag, 'Cache-Control': HOME_CACHE_CONTROL}
+    if etag_matches(request.headers.get('If-None-Match'), page.etag):
+        return Response(status=304, headers=headers)
+    return Response(render_home(page, now), mimetype='text/html',
+                    headers=headers)
+
 @app.route('/health')
+@app.route('/health/ready')
 def health():
-    return {
-        "status": "healthy",
-        "hostname": socket.gethostname(),
-        "timestamp": datetime.now().isoformat(),
-        "project": "mini-infra-gpt"
-    }
+    ready, reason = METRICS.readiness()
+    if not ready:
+        body = json.dumps({'status': 'unavailable', 'reason': reason})
+        return Response(body + '\n', status=503, mimetype='application/json',
+                        headers={'Cache-Control': 'no-store'})
+    page = current_page(time.time())
+    body = page.health_head + datetime.now().isoformat().encode() + b'"}\n'
+    return Response(body, mimetype='application/json',
+                    headers={'Cache-Control': 'no-store'})
+
+@app.route('/health/live')
+def live():
+    return Response(b'ok\n', mimetype='text/plain',
+                    headers={'Cache-Control': 'no-store'})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(METRICS.render(), content_type=metrics.CONTENT_TYPE,
+                    headers={'Cache-Control': 'no-store'})
+
+
+# After the routes: the metrics rows have a slot per route
+METRICS = metrics.RequestMetrics(app).install(app)
+
+render_home(_page, time.time())
+METRICS.warm = True
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=80)
@@ -0,0 +1,177 @@
+"""
+Web app load test
+
+Serves each app file on a local threaded WSGI server and drives it over
+keep-alive HTTP/1.1 connections from concurrent client threads, reporting
+requests/sec and latency percentiles for the homepage, a conditional GET
+of the homepage (If-None-Match with the current ETag), /health and
+/api/info (when the app has it). The
+same requests are also timed in-process, calling the WSGI app directly,
+which isolates the app's own cost from the (development) server's.
+
+Compare two versions of the app, e.g. before and after a change:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/bench_app.py --app /tmp/app_before.py --app app.py
+
+Usage: python benchmarks/bench_app.py [--app FILE ...] [--requests N]
+                                      [--concurrency C]
+                                      [--accept-encoding VALUE]
+"""
+
+import argparse
+import http.client
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def load_app(path):
+    """Import the Flask app object from an app file"""
+    # As when the file is run as a script: its siblings are importable
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    name = 'bench_app_' + str(abs(hash(os.path.abspath(path))))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def serve(app):
+    """Start `app` on an ephemeral local port; returns the server"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_test(host, port, path, requests, concurrency, headers=None):
+    """
+    Issue `requests` GETs from `concurrency` keep-alive connections
+
+    Returns:
+        dict: 'rps', 'p50_ms', 'p99_ms' and the status code counts
+    """
+    per_client = max(1, requests // concurrency)
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        mine, codes = [], {}
+        for _ in range(per_client):
+            start = time.perf_counter()
+            conn.request('GET', path, headers=headers or {})
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            codes[response.status] = codes.get(response.status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {'rps': len(latencies) / elapsed,
+            'p50_ms': latencies[len(latencies) // 2] * 1000,
+            'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+            'statuses': statuses}
+
+
+def wsgi_rate(app, path, requests, headers=None):
+    """Requests/sec calling the WSGI app directly (no server, no sockets)"""
+    from werkzeug.test import EnvironBuilder
+
+    environ = EnvironBuilder(path=path, headers=headers).get_environ()
+
+    def start_response(status, response_headers, exc_info=None):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        for _ in app(dict(environ), start_response):
+            pass
+    return requests / (time.perf_counter() - start)
+
+
+def current_etag(host, port, headers):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('GET', '/', headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('ETag')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--app', action='append',
+                        help="App file to serve (repeatable; default: app.py)")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--accept-encoding', metavar='VALUE',
+                        help="Accept-Encoding sent with every request, "
+                             "e.g. 'gzip, br'")
+    args = parser.parse_args()
+    base = ({'Accept-Encoding': args.accept_encoding}
+            if args.accept_encoding else {})
+
+    print("=" * 60)
+    print(f"🌐 Web app load test: {args.requests} requests, "
+          f"{args.concurrency} connections"
+          + (f", Accept-Encoding: {args.accept_encoding}" if base else ""))
+    print("=" * 60)
+
+    for path in args.app or [os.path.join(ROOT, 'app.py')]:
+        app = load_app(path)
+        server = serve(app)
+        host, port = server.server_address[:2]
+        print(f"\n📄 {os.path.relpath(path)}")
+
+        etag = current_etag(host, port, base)
+        routes = {rule.rule for rule in app.url_map.iter_rules()}
+        cases = [('GET /', '/', base)]
+        if etag:
+            cases.append(('GET / (If-None-Match)', '/',
+                          {**base, 'If-None-Match': etag}))
+        cases += [(f'GET {url}', url, base) for url in ('/health', '/api/info')
+                  if url in routes]
+
+        for label, url, headers in cases:
+            load_test(host, port, url, args.concurrency * 20,
+                      args.concurrency, headers)  # warm up
+            result = load_test(host, port, url, args.requests,
+                               args.concurrency, headers)
+            codes = ', '.join(f'{code}x{count}' for code, count
+                              in sorted(result['statuses'].items()))
+            wsgi_rate(app, url, 1000, headers)  # warm up
+            in_process = wsgi_rate(app, url, args.requests, headers)
+            print(f"   • {label:<24} {result['rps']:>8,.0f} req/s  "
+                  f"p50 {result['p50_ms']:6.2f} ms  "
+                  f"p99 {result['p99_ms']:6.2f} ms  ({codes})  "
+                  f"in-process {in_process:>8,.0f} req/s")
+        server.shutdown()
+        server.server_close()
+    print()
+
+
+if __name__ == "__main__":
+    main()
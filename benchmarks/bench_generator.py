@@ -0,0 +1,383 @@
+"""
+Terraform rendering benchmark
+
+Renders N stacks from random specs with about as many distinct specs as
+stacks (instance types and DB classes from the capacity catalog, regions,
+sizes and storage all vary, as planned stacks do):
+
+- the baseline generator's string building: one ~300-line f-string per
+  call with the RDS section appended (less content than the current
+  configuration - no Auto Scaling, no capacity fields - so it is a lower
+  bound for "rebuild the text every call")
+- the compiled block layouts, uncached, as one main.tf and split into
+  per-concern files
+- render_config() with its whole-render cache, which at this cardinality
+  mostly misses
+- the Terraform JSON backend (graph build + serialization, and
+  serialization of prebuilt graphs on its own)
+
+Also reports the peak traced memory of each loop, which stays flat
+regardless of the stack count.
+
+Usage: python benchmarks/bench_generator.py [count]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from infra_spec import InfraSpec
+from terraform_generator import _render_layout, render_config
+from terraform_graph import build_graph, orjson
+
+REGIONS = ['us-east-1', 'us-east-2', 'us-west-2', 'eu-west-1', 'eu-central-1',
+           'ap-south-1', 'ap-southeast-2', 'sa-east-1']
+INSTANCE_TYPES = ['t2.micro', 't2.small', 't2.medium', 't3.micro', 't3.small',
+                  't3.medium', 't3.large', 'c6i.large', 'c6i.xlarge',
+                  'c6i.2xlarge', 'm6i.large', 'm6i.xlarge']
+DB_CLASSES = ['db.t3.micro', 'db.t3.small', 'db.t3.medium', 'db.m6g.large',
+              'db.m6g.xlarge', 'db.r6g.large', 'db.r6g.xlarge',
+              'db.r6g.2xlarge', 'db.r6g.4xlarge']
+
+
+def random_specs(count, seed=7):
+    rng = random.Random(seed)
+    specs = []
+    for _ in range(count):
+        database_type = rng.choice(['none', 'postgres', 'mysql'])
+        autoscaling = rng.random() < 0.5
+        size = rng.randint(2, 25) if autoscaling else 1
+        storage_type = rng.choice(['gp3', 'io1'])
+        specs.append(InfraSpec(
+            instance_type=rng.choice(INSTANCE_TYPES),
+            database_needed=database_type != 'none',
+            database_type=database_type,
+            region=rng.choice(REGIONS),
+            app_type=rng.choice(['web', 'api']),
+            expected_users=rng.randrange(0, 200_000, 100),
+            autoscaling=autoscaling,
+            min_size=size,
+            max_size=min(size * 2, 50),
+            db_instance_class=rng.choice(DB_CLASSES),
+            db_storage_gb=rng.randint(20, 2000),
+            db_storage_type=storage_type,
+            db_iops=rng.randrange(3000, 64000, 1000) if storage_type == 'io1'
+            else 0
+        ))
+    return specs
+
+
+def baseline_render(specs):
+    """The original generator's string building (specs dict in, text out)"""
+    main_tf = f"""
+terraform {{
+  required_version = ">= 1.0"
+
+  required_providers {{
+    aws = {{
+      source  = "hashicorp/aws"
+      version = "~> 5.0"
+    }}
+  }}
+}}
+
+provider "aws" {{
+  region = "{specs['region']}"
+}}
+
+# VPC
+resource "aws_vpc" "main" {{
+  cidr_block           = "10.0.0.0/16"
+  enable_dns_hostnames = true
+  enable_dns_support   = true
+
+  tags = {{
+    Name    = "mini-infra-gpt-vpc"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Public Subnet (AZ auto-selected)
+resource "aws_subnet" "public" {{
+  vpc_id                  = aws_vpc.main.id
+  cidr_block              = "10.0.1.0/24"
+  map_public_ip_on_launch = true
+
+  tags = {{
+    Name    = "public-subnet"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Internet Gateway
+resource "aws_internet_gateway" "igw" {{
+  vpc_id = aws_vpc.main.id
+
+  tags = {{
+    Name    = "mini-infra-gpt-igw"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Route Table
+resource "aws_route_table" "public" {{
+  vpc_id = aws_vpc.main.id
+
+  route {{
+    cidr_block = "0.0.0.0/0"
+    gateway_id = aws_internet_gateway.igw.id
+  }}
+
+  tags = {{
+    Name    = "public-route-table"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Route Table Association
+resource "aws_route_table_association" "public" {{
+  subnet_id      = aws_subnet.public.id
+  route_table_id = aws_route_table.public.id
+}}
+
+# Security Group
+resource "aws_security_group" "web" {{
+  name        = "mini-infra-gpt-web-sg"
+  description = "Allow HTTP and SSH"
+  vpc_id      = aws_vpc.main.id
+
+  ingress {{
+    description = "HTTP"
+    from_port   = 80
+    to_port     = 80
+    protocol    = "tcp"
+    cidr_blocks = ["0.0.0.0/0"]
+  }}
+
+  ingress {{
+    description = "SSH"
+    from_port   = 22
+    to_port     = 22
+    protocol    = "tcp"
+    cidr_blocks = ["0.0.0.0/0"]
+  }}
+
+  egress {{
+    from_port   = 0
+    to_port     = 0
+    protocol    = "-1"
+    cidr_blocks = ["0.0.0.0/0"]
+  }}
+
+  tags = {{
+    Name    = "web-security-group"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Get latest Amazon Linux 2 AMI
+data "aws_ami" "amazon_linux_2" {{
+  most_recent = true
+  owners      = ["amazon"]
+
+  filter {{
+    name   = "name"
+    values = ["amzn2-ami-hvm-*-x86_64-gp2"]
+  }}
+
+  filter {{
+    name   = "virtualization-type"
+    values = ["hvm"]
+  }}
+}}
+
+# EC2 Instance
+resource "aws_instance" "web" {{
+  ami           = data.aws_ami.amazon_linux_2.id
+  instance_type = "t3.micro"
+  subnet_id     = aws_subnet.public.id
+
+  vpc_security_group_ids = [aws_security_group.web.id]
+
+  user_data = <<-EOF
+              #!/bin/bash
+              yum update -y
+              yum install -y python3 python3-pip
+              pip3 install flask
+              EOF
+
+  tags = {{
+    Name    = "mini-infra-gpt-server"
+    Project = "mini-infra-gpt"
+    Type    = "{specs['app_type']}"
+  }}
+}}
+
+# Outputs
+output "instance_id" {{
+  description = "EC2 instance ID"
+  value       = aws_instance.web.id
+}}
+
+output "instance_public_ip" {{
+  description = "Public IP address"
+  value       = aws_instance.web.public_ip
+}}
+
+output "instance_public_dns" {{
+  description = "Public DNS name"
+  value       = aws_instance.web.public_dns
+}}
+
+output "application_url" {{
+  description = "Application URL"
+  value       = "http://${{aws_instance.web.public_ip}}"
+}}
+"""
+
+    if specs.get('database_needed', False):
+        db_port = 3306 if specs['database_type'] == 'mysql' else 5432
+        db_version = '8.0' if specs['database_type'] == 'mysql' else '15'
+
+        db_config = f"""
+
+# Private Subnet for Database
+resource "aws_subnet" "private" {{
+  vpc_id     = aws_vpc.main.id
+  cidr_block = "10.0.2.0/24"
+
+  tags = {{
+    Name    = "private-subnet-db"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# DB Subnet Group
+resource "aws_db_subnet_group" "main" {{
+  name       = "mini-infra-gpt-db-subnet"
+  subnet_ids = [aws_subnet.public.id, aws_subnet.private.id]
+
+  tags = {{
+    Name    = "mini-infra-gpt-db-subnet-group"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# Database Security Group
+resource "aws_security_group" "db" {{
+  name        = "mini-infra-gpt-db-sg"
+  description = "Allow database traffic from web server"
+  vpc_id      = aws_vpc.main.id
+
+  ingress {{
+    from_port       = {db_port}
+    to_port         = {db_port}
+    protocol        = "tcp"
+    security_groups = [aws_security_group.web.id]
+  }}
+
+  egress {{
+    from_port   = 0
+    to_port     = 0
+    protocol    = "-1"
+    cidr_blocks = ["0.0.0.0/0"]
+  }}
+
+  tags = {{
+    Name    = "database-security-group"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+# RDS Database
+resource "aws_db_instance" "main" {{
+  identifier        = "mini-infra-gpt-db"
+  engine            = "{specs['database_type']}"
+  engine_version    = "{db_version}"
+  instance_class    = "db.t3.micro"
+  allocated_storage = 20
+
+  db_name  = "miniinfragpt"
+  username = "admin"
+  password = "ChangeMe123!"
+
+  db_subnet_group_name   = aws_db_subnet_group.main.name
+  vpc_security_group_ids = [aws_security_group.db.id]
+
+  skip_final_snapshot = true
+  publicly_accessible = false
+
+  tags = {{
+    Name    = "mini-infra-gpt-database"
+    Project = "mini-infra-gpt"
+  }}
+}}
+
+output "database_endpoint" {{
+  description = "Database endpoint"
+  value       = aws_db_instance.main.endpoint
+}}
+
+output "database_name" {{
+  description = "Database name"
+  value       = aws_db_instance.main.db_name
+}}
+"""
+        main_tf += db_config
+    return main_tf
+
+
+def timed(label, render, specs):
+    start = time.perf_counter()
+    for spec in specs:
+        render(spec)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass - tracemalloc itself slows allocation-heavy loops
+    tracemalloc.start()
+    for spec in specs:
+        render(spec)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"   • {label:<30} {elapsed:7.3f}s  {len(specs) / elapsed:>10,.0f} "
+          f"stacks/s  peak {peak / 1024:8.1f} KiB")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    specs = random_specs(count)
+    # The baseline took a specs dict; convert outside the timed loop
+    dicts = [spec.to_dict() for spec in specs]
+
+    print("=" * 60)
+    print(f"Terraform rendering benchmark ({count:,} stacks, "
+          f"{len(set(specs)):,} distinct specs)")
+    print("=" * 60)
+
+    base = timed("baseline f-string (main.tf)", baseline_render, dicts)
+    single = timed("compiled layout (main.tf)",
+                   lambda s: _render_layout(s, False), specs)
+    split = timed("compiled layout (split files)",
+                  lambda s: _render_layout(s, True), specs)
+    timed("render_config (cached)", render_config, specs)
+
+    encoder = 'orjson' if orjson is not None else 'json'
+    timed(f"graph + {encoder} (compact)",
+          lambda s: build_graph(s).to_json(indent=False), specs)
+    graphs = dict.fromkeys(specs)
+    for spec in graphs:
+        graphs[spec] = build_graph(spec)
+    timed(f"{encoder} serialize only",
+          lambda s: graphs[s].to_json(indent=False), specs)
+
+    print(f"\n📊 Relative to the baseline f-string (>1 = faster): "
+          f"main.tf {base / single:.2f}x, split files {base / split:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
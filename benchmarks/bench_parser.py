@@ -0,0 +1,96 @@
+"""
+Parser throughput benchmark
+
+Compares the original per-keyword substring scan, the single-request
+parse_infrastructure_request (console output discarded) and the batch
+parse_infrastructure_requests generator on synthetic requests, reporting
+throughput relative to the substring scan (>1 = faster).
+
+The substring scan does the least work and is the least correct: it has
+no word boundaries ('db' in "feedback", 'rds' in "records", 'rest' in
+"interest"), no load hints and returns a plain dict rather than a spec.
+
+Usage: python benchmarks/bench_parser.py [count]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai_parser import parse_infrastructure_request, parse_infrastructure_requests
+
+WORDS = ['I', 'need', 'a', 'simple', 'web', 'server', 'with', 'for', 'my',
+         'team', 'fast', 'small', 'testing', 'production', 'application',
+         'API', 'backend', 'PostgreSQL', 'MySQL', 'database', 'REST', 'app']
+
+
+def legacy_parse(user_input):
+    """The original substring-scan classifier, kept here as the baseline"""
+    user_lower = user_input.lower()
+    db_keywords = ['database', 'db', 'mysql', 'postgres', 'postgresql', 'sql',
+                   'rds']
+    database_needed = any(kw in user_lower for kw in db_keywords)
+    if 'postgres' in user_lower or 'postgresql' in user_lower:
+        database_type = 'postgres'
+    elif 'mysql' in user_lower:
+        database_type = 'mysql'
+    else:
+        database_type = 'none' if not database_needed else 'postgres'
+    if 'api' in user_lower or 'backend' in user_lower or 'rest' in user_lower:
+        app_type = 'api'
+    else:
+        app_type = 'web'
+    return {
+        "instance_type": "t2.micro",
+        "database_needed": database_needed,
+        "database_type": database_type,
+        "region": "us-east-1",
+        "app_type": app_type
+    }
+
+
+def synthetic_requests(count, seed=42):
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(WORDS, k=rng.randint(4, 14)))
+            for _ in range(count)]
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"   • {label:<34} {elapsed:7.3f}s  {count / elapsed:>12,.0f} req/s")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    requests = synthetic_requests(count)
+
+    print("=" * 60)
+    print(f"Parser benchmark ({count:,} synthetic requests)")
+    print("=" * 60)
+
+    legacy = timed("legacy substring scan",
+                   lambda: [legacy_parse(r) for r in requests], count)
+
+    def single():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for r in requests:
+                parse_infrastructure_request(r)
+
+    base = timed("parse_infrastructure_request", single, count)
+    batch = timed("parse_infrastructure_requests",
+                  lambda: list(parse_infrastructure_requests(requests)), count)
+
+    print(f"\n📊 Relative to the legacy substring scan: batch "
+          f"{legacy / batch:.2f}x, per-call API {legacy / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Generation service benchmark
+
+Times the CLI (`python main.py REQUEST`, one interpreter per request) and
+then the HTTP generation service (src/generation_service.py under
+Gunicorn, one worker) driven by concurrent keep-alive clients posting to
+/v1/generate. Each service run draws its requests from a pool of
+`distinct` different texts: 'all' makes every request unique (every one
+is computed), smaller pools show coalescing and reuse. Reports
+throughput, p50/p99 latency and the service's job counters.
+
+Usage: python benchmarks/bench_service.py [--requests N] [--concurrency C]
+           [--distinct all,50] [--threads T] [--cli-runs R]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench_serving import free_port, stop_server, wait_for_port
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONFIG = os.path.join(ROOT, 'docker', 'gunicorn.conf.py')
+
+APPS = ('web app', 'REST API', 'website', 'backend service')
+DATABASES = ('', ' with PostgreSQL', ' with MySQL', ' with a database')
+SCALES = ('', ' with autoscaling')
+
+
+def make_requests(count):
+    """`count` different plain-English requests"""
+    requests = []
+    users = 100
+    while len(requests) < count:
+        for app in APPS:
+            for database in DATABASES:
+                for scale in SCALES:
+                    requests.append(f"{app}{database}{scale} for {users} "
+                                    f"users")
+        users += 100
+    return requests[:count]
+
+
+def time_cli(runs):
+    """Seconds per `python main.py REQUEST` run"""
+    texts = make_requests(runs)
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        for text in texts:
+            subprocess.run([sys.executable, 'main.py', '--output-dir',
+                            output_dir, text], cwd=ROOT, check=True,
+                           stdout=subprocess.DEVNULL)
+        return (time.perf_counter() - start) / runs
+
+
+def start_service(port, threads):
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}', WEB_WORKERS='1',
+               WEB_THREADS=str(threads))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', CONFIG,
+         'src.generation_service:create_app()'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL)
+    if not wait_for_port(port):
+        process.kill()
+        raise RuntimeError("Generation service did not start")
+    return process
+
+
+def post_load(port, texts, concurrency):
+    """
+    POST every text to /v1/generate from `concurrency` keep-alive clients
+
+    Returns:
+        dict: 'rps', 'p50_ms', 'p99_ms' and the status code counts
+    """
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    headers = {'Content-Type': 'application/json'}
+
+    def client(mine):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        times, codes = [], {}
+        for text in mine:
+            body = json.dumps({'request': text})
+            start = time.perf_counter()
+            conn.request('POST', '/v1/generate', body, headers)
+            response = conn.getresponse()
+            response.read()
+            times.append(time.perf_counter() - start)
+            codes[response.status] = codes.get(response.status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(times)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    threads = [threading.Thread(target=client,
+                                args=(texts[i::concurrency],))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {'rps': len(latencies) / elapsed,
+            'p50_ms': latencies[len(latencies) // 2] * 1000,
+            'p99_ms': latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+            'statuses': statuses}
+
+
+def job_counters(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/health')
+    counters = json.loads(conn.getresponse().read())['jobs']
+    conn.close()
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--distinct', default='all,50',
+                        help="Comma-separated request pool sizes ('all' = "
+                             "every request unique)")
+    parser.add_argument('--threads', type=int, default=32,
+                        help="Gunicorn threads of the service worker")
+    parser.add_argument('--cli-runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"🛰️  Generation service benchmark: {args.requests} requests, "
+          f"{args.concurrency} connections")
+    print("=" * 60)
+
+    if args.cli_runs:
+        per_run = time_cli(args.cli_runs)
+        print(f"   • {'CLI (main.py per request)':<30} {1 / per_run:>8,.1f} "
+              f"req/s  {per_run * 1000:7.1f} ms each")
+
+    for distinct in args.distinct.split(','):
+        size = args.requests if distinct == 'all' else int(distinct)
+        pool = make_requests(size)
+        texts = [pool[i % size] for i in range(args.requests)]
+        port = free_port()
+        server = start_service(port, args.threads)
+        try:
+            result = post_load(port, texts, args.concurrency)
+            counters = job_counters(port)
+        finally:
+            stop_server(server)
+        codes = ', '.join(f'{code}x{count}' for code, count
+                          in sorted(result['statuses'].items()))
+        label = f"service, {size} distinct"
+        print(f"   • {label:<30} {result['rps']:>8,.0f} req/s  "
+              f"p50 {result['p50_ms']:6.2f} ms  "
+              f"p99 {result['p99_ms']:6.2f} ms  ({codes})")
+        print(f"     computed {counters['computed']}, coalesced "
+              f"{counters['coalesced']}, reused {counters['reused']}, "
+              f"rejected {counters['rejected']}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
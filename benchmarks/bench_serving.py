@@ -0,0 +1,191 @@
+"""
+Production serving benchmark
+
+Starts an app under Gunicorn (docker/gunicorn.conf.py) once per worker
+count, plus the Werkzeug development server as the baseline, and drives
+each from concurrent keep-alive clients spread over several client
+processes (so the load generator is not limited to one core). Reports
+throughput and p50/p99 latency per server configuration.
+
+Usage: python benchmarks/bench_serving.py [--app docker/app.py]
+           [--workers 1,2,4] [--threads 2] [--path /] [--requests N]
+           [--concurrency C] [--client-procs P] [--accept-encoding VALUE]
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONFIG = os.path.join(ROOT, 'docker', 'gunicorn.conf.py')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def start_server(app_path, port, workers=None, threads=2):
+    """
+    Serve the app file under Gunicorn (workers > 0) or the development
+    server (workers None)
+
+    Returns:
+        subprocess.Popen: The server process
+    """
+    directory, filename = os.path.split(os.path.abspath(app_path))
+    module = os.path.splitext(filename)[0]
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}')
+    if workers is None:
+        command = [sys.executable, '-c',
+                   f'import logging; logging.disable(logging.INFO); '
+                   f'from {module} import app; '
+                   f'app.run(host="127.0.0.1", port={port}, threaded=True)']
+    else:
+        env.update(WEB_WORKERS=str(workers), WEB_THREADS=str(threads))
+        command = [sys.executable, '-m', 'gunicorn', '-c', CONFIG,
+                   f'{module}:app']
+    process = subprocess.Popen(command, cwd=directory, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    if not wait_for_port(port):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {' '.join(command)}")
+    return process
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _client_process(job):
+    """Run `connections` keep-alive clients; returns (latencies, errors)"""
+    port, path, requests, connections, headers = job
+    per_connection = max(1, requests // connections)
+    latencies, errors = [], []
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = []
+        for _ in range(per_connection):
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(1)
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port,
+                                                  timeout=30)
+                continue
+            mine.append(time.perf_counter() - start)
+        conn.close()
+        latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors)
+
+
+def drive(pool, port, path, requests, concurrency, client_procs, headers):
+    """
+    Returns:
+        dict: 'rps', 'p50_ms', 'p99_ms', 'errors'
+    """
+    procs = min(client_procs, concurrency)
+    jobs = [(port, path, requests // procs,
+             concurrency // procs + (i < concurrency % procs), headers)
+            for i in range(procs)]
+    start = time.perf_counter()
+    results = pool.map(_client_process, jobs)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(t for times, _ in results for t in times)
+    if not latencies:
+        return {'rps': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0,
+                'errors': sum(e for _, e in results)}
+    return {'rps': len(latencies) / elapsed,
+            'p50_ms': latencies[len(latencies) // 2] * 1000,
+            'p99_ms': latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+            'errors': sum(e for _, e in results)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--app', default=os.path.join(ROOT, 'docker', 'app.py'))
+    parser.add_argument('--workers', default='1,2,4',
+                        help="Comma-separated Gunicorn worker counts")
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--client-procs', type=int,
+                        default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--accept-encoding', metavar='VALUE')
+    parser.add_argument('--no-baseline', action='store_true',
+                        help="Skip the development server run")
+    args = parser.parse_args()
+    headers = ({'Accept-Encoding': args.accept_encoding}
+               if args.accept_encoding else {})
+
+    configs = [] if args.no_baseline else [('dev server', None)]
+    configs += [(f'gunicorn {n}w x {args.threads}t', int(n))
+                for n in args.workers.split(',')]
+
+    print("=" * 60)
+    print(f"🏭 Serving benchmark: GET {args.path} x {args.requests}, "
+          f"{args.concurrency} connections from {args.client_procs} "
+          f"client processes ({os.cpu_count()} CPUs)")
+    print("=" * 60)
+
+    with Pool(args.client_procs) as pool, \
+            tempfile.TemporaryDirectory() as metrics_dir:
+        # Shared request metrics of the workers (docker/metrics.py)
+        os.environ['METRICS_DIR'] = metrics_dir
+        for label, workers in configs:
+            port = free_port()
+            server = start_server(args.app, port, workers, args.threads)
+            try:
+                drive(pool, port, args.path, args.concurrency * 20,
+                      args.concurrency, args.client_procs, headers)  # warm up
+                result = drive(pool, port, args.path, args.requests,
+                               args.concurrency, args.client_procs, headers)
+            finally:
+                stop_server(server)
+            errors = f"  ({result['errors']} errors)" if result['errors'] else ""
+            print(f"   • {label:<22} {result['rps']:>8,.0f} req/s  "
+                  f"p50 {result['p50_ms']:7.2f} ms  "
+                  f"p99 {result['p99_ms']:7.2f} ms{errors}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
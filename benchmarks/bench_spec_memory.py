@@ -0,0 +1,53 @@
+"""
+Per-spec memory benchmark
+
+Measures the memory held by N parsed specs as legacy dicts, as InfraSpec
+tuples and in the compact binary form, plus dedup via a set of specs.
+
+Usage: python benchmarks/bench_spec_memory.py [count]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai_parser import parse_infrastructure_requests
+from bench_parser import synthetic_requests
+
+
+def measure(build):
+    """Return (object, bytes allocated while building it)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    specs = list(parse_infrastructure_requests(synthetic_requests(count)))
+
+    print("=" * 60)
+    print(f"InfraSpec memory benchmark ({count:,} specs)")
+    print("=" * 60)
+
+    _, dict_bytes = measure(lambda: [s.to_dict() for s in specs])
+    _, spec_bytes = measure(lambda: [s._replace() for s in specs])
+    _, binary_bytes = measure(lambda: [s.to_bytes() for s in specs])
+    unique, _ = measure(lambda: set(specs))
+
+    for label, total in (("dict", dict_bytes), ("InfraSpec", spec_bytes),
+                         ("InfraSpec.to_bytes()", binary_bytes)):
+        print(f"   • {label:<22} {total / count:8.1f} bytes/spec")
+
+    print(f"\n📊 InfraSpec uses {dict_bytes / spec_bytes:.1f}x less memory "
+          "than dicts")
+    print(f"🔁 {len(unique)} distinct specs after dedup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+CLI cold-start benchmark
+
+Imports main.py in fresh interpreters under `python -X importtime` and
+fails (exit code 1) when the import exceeds the budget or pulls in a
+module that must stay lazy (requests, boto3, yaml, ...).
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that only specific code paths need - never at CLI start
+LAZY_MODULES = ('requests', 'urllib3', 'boto3', 'botocore', 'yaml', 'flask')
+
+DEFAULT_BUDGET_MS = 15.0
+
+
+def import_profile(module='main'):
+    """
+    Import `module` in a fresh interpreter
+
+    Returns:
+        tuple: (cumulative µs for `module`, {name: self µs} for every
+        module imported beneath it)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = None
+    modules, pending = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        pending[name.strip()] = int(self_us)
+
+        # Children are listed before their (less indented) parent
+        if name.startswith('  '):
+            continue
+        if name.strip() == module:
+            total, modules = int(cumulative_us), pending
+        pending = {}
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(
+        os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Startup benchmark (import main, best of {args.runs})")
+    print("=" * 60)
+
+    best, modules = None, {}
+    for _ in range(args.runs):
+        total, run_modules = import_profile()
+        if best is None or total < best:
+            best, modules = total, run_modules
+
+    print("\n📊 Slowest modules (self time):")
+    for name, self_us in sorted(modules.items(), key=lambda m: -m[1])[:10]:
+        print(f"   • {name:<40} {self_us / 1000:7.2f} ms")
+
+    best_ms = best / 1000
+    print(f"\n⏱️  import main: {best_ms:.2f} ms (budget {args.budget_ms:.2f} ms)")
+
+    failed = False
+    eager = sorted({name.split('.')[0] for name in modules}
+                   & set(LAZY_MODULES))
+    if eager:
+        print(f"❌ Imported at startup: {', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print("❌ Startup budget exceeded!")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
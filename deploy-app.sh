@@ -5,9 +5,8 @@ echo "🚀 Deploying Flask App to AWS EC2"
 echo "=================================="
 echo ""
 
-# Get IP
-PUBLIC_IP=$(terraform -chdir=generated-terraform output -raw instance_public_ip)
-
+# Get IP (read from the local state, no terraform process needed)
+PUBLIC_IP=$(python3 src/terraform_state.py generated-terraform instance_public_ip)
 
 
 echo "📡 Target Server: $PUBLIC_IP"
@@ -16,27 +15,29 @@ echo ""
 # Copy app to server
 echo "📤 Uploading application..."
 scp -i mini-infra-gpt-key.pem -o StrictHostKeyChecking=no \
-    app.py ec2-user@$PUBLIC_IP:/home/ec2-user/
+    app.py docker/metrics.py docker/gunicorn.conf.py ec2-user@$PUBLIC_IP:/home/ec2-user/
 
 # Install and run
 echo ""
-echo "🔧 Installing Flask and starting app..."
+echo "🔧 Installing Flask + Gunicorn and starting app..."
 ssh -i mini-infra-gpt-key.pem -o StrictHostKeyChecking=no \
     ec2-user@$PUBLIC_IP << 'EOF'
-# Install Flask
-sudo pip3 install flask
+# Install Flask and the production server
+sudo pip3 install flask gunicorn
 
-# Stop any existing app
+# Stop any existing app (gracefully: TERM lets workers finish requests)
 sudo pkill -f "python3 app.py" || true
+sudo pkill -TERM -f "gunicorn app:app" || true
 
-# Start app in background
-nohup sudo python3 /home/ec2-user/app.py > /home/ec2-user/app.log 2>&1 &
+# Start pre-forked workers in background (settings: gunicorn.conf.py)
+cd /home/ec2-user
+nohup sudo WEB_BIND=0.0.0.0:80 python3 -m gunicorn app:app > /home/ec2-user/app.log 2>&1 &
 
 # Wait a moment
 sleep 3
 
 # Check if running
-if pgrep -f "python3 app.py" > /dev/null; then
+if pgrep -f "gunicorn app:app" > /dev/null; then
     echo "✅ App is running!"
 else
     echo "❌ App failed to start. Check logs:"
@@ -1,16 +1,39 @@
 """
 Simple Flask Web Application
 This will be deployed inside a Docker container on AWS
+
+Per-request work is kept to a minimum, since the load balancer's request
+rate sets the instance count:
+- the Jinja template is compiled once at import, and hostname/IP are
+  resolved once
+- /api/info is a constant, serialized once
+- bodies are served gzip/brotli-compressed per Accept-Encoding from a
+  cache keyed by path and encoding; the homepage (whose timestamp has
+  one-second resolution) is rendered and compressed at most once a
+  second per encoding
+
+/metrics is scraped by Prometheus (see metrics.py). /health/live only
+says the process answers; /health (the load balancer's check) and
+/health/ready also fail while the app is warming up or saturated.
 """
 
-from flask import Flask, jsonify, render_template_string
-import socket
+from flask import Flask, Response, request
+import gzip
 import os
+import socket
+import threading
 from datetime import datetime
+from functools import lru_cache
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 
 app = Flask(__name__)
 
-# HTML template for the homepage
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -147,40 +170,184 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compile once; render_template_string would re-parse the source per call
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+HOSTNAME = socket.gethostname()
+try:
+    SERVER_IP = socket.gethostbyname(HOSTNAME)
+except OSError:
+    SERVER_IP = 'unknown'
+
+_ENCODERS = {'gzip': lambda body: gzip.compress(body, compresslevel=6)}
+if brotli is not None:
+    _ENCODERS['br'] = lambda body: brotli.compress(body, quality=5)
+
+# Preferred first when the client accepts several
+_PREFERENCE = ('br', 'gzip')
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding):
+    """
+    Pick a supported content coding for an Accept-Encoding header
+
+    Returns:
+        str: 'br', 'gzip' or 'identity'
+    """
+    accepted, refused = set(), set()
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    # q=0 refuses the coding, even if '*' is accepted
+                    refused.add(coding)
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    for coding in _PREFERENCE:
+        if coding in _ENCODERS and (coding in accepted or (
+                '*' in accepted and coding not in refused)):
+            return coding
+    return 'identity'
+
+
+class ResponseCache:
+    """
+    Encoded response bodies keyed by (path, encoding)
+
+    Each entry remembers the `version` it was built for; a lookup with
+    another version (e.g. the next second for a timestamped page)
+    re-renders once and re-encodes from the new identity body.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, encoding, version, render):
+        """
+        Returns:
+            tuple: (body bytes, the encoding actually applied)
+        """
+        entry = self._entries.get((path, encoding))
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+        with self._lock:
+            identity = self._entries.get((path, 'identity'))
+            if identity is None or identity[0] != version:
+                identity = (version, render(), 'identity')
+                self._entries[(path, 'identity')] = identity
+            body, applied = identity[1], 'identity'
+            if encoding != 'identity':
+                # Compressed once per version, so tiny bodies may use it too
+                compressed = _ENCODERS[encoding](body)
+                if len(compressed) < len(body):
+                    body, applied = compressed, encoding
+            self._entries[(path, encoding)] = (version, body, applied)
+            return body, applied
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(path, version, render, mimetype):
+    """Serve `render()` (bytes) from the response cache, compressed if
+    the client accepts it"""
+    encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+    body, applied = response_cache.get(path, encoding, version, render)
+    response = Response(body, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if applied != 'identity':
+        response.headers['Content-Encoding'] = applied
+    return response
+
+
+def _render_home(second):
+    return HOME_TEMPLATE.render(
+        hostname=HOSTNAME,
+        server_ip=SERVER_IP,
+        deploy_time=datetime.fromtimestamp(second).strftime(
+            "%Y-%m-%d %H:%M:%S UTC")
+    ).encode()
+
+
+INFO = {
+    "project": "Mini InfraGPT",
+    "description": "AI-Powered Infrastructure Automation",
+    "technologies": [
+        "Python", "Claude AI", "AWS", "Terraform",
+        "Docker", "CI/CD", "Linux"
+    ],
+    "hostname": HOSTNAME,
+    "environment": os.environ.get("ENVIRONMENT", "production")
+}
+# Byte-for-byte what jsonify() would produce
+INFO_BODY = app.json.response(INFO).get_data()
+
+_HEALTH_HEAD = ('{"hostname":' + app.json.dumps(HOSTNAME) +
+                ',"project":"mini-infra-gpt","status":"healthy",'
+                '"timestamp":"').encode()
+_HEALTH_TAIL = b'","version":"1.0.0"}\n'
+
+
 @app.route('/')
 def home():
     """Homepage - shows project information"""
-    return render_template_string(
-        HTML_TEMPLATE,
-        hostname=socket.gethostname(),
-        server_ip=socket.gethostbyname(socket.gethostname()),
-        deploy_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
-    )
+    second = int(datetime.now().timestamp())
+    return cached_response('/', second, lambda: _render_home(second),
+                           'text/html')
 
 @app.route('/health')
+@app.route('/health/ready')
 def health():
-    """Health check endpoint - returns JSON status"""
-    return jsonify({
-        "status": "healthy",
-        "hostname": socket.gethostname(),
-        "project": "mini-infra-gpt",
-        "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
-    })
+    """Readiness - 503 while warming up or saturated"""
+    ready, reason = METRICS.readiness()
+    if not ready:
+        return Response(app.json.dumps({"status": "unavailable",
+                                        "reason": reason}) + '\n',
+                        status=503, mimetype='application/json')
+    return Response(_HEALTH_HEAD + datetime.now().isoformat().encode() +
+                    _HEALTH_TAIL, mimetype='application/json')
+
+@app.route('/health/live')
+def live():
+    """Liveness - the process answers; never does any work"""
+    return Response(b'ok\n', mimetype='text/plain',
+                    headers={'Cache-Control': 'no-store'})
 
 @app.route('/api/info')
 def info():
     """API endpoint - returns system information"""
-    return jsonify({
-        "project": "Mini InfraGPT",
-        "description": "AI-Powered Infrastructure Automation",
-        "technologies": [
-            "Python", "Claude AI", "AWS", "Terraform", 
-            "Docker", "CI/CD", "Linux"
-        ],
-        "hostname": socket.gethostname(),
-        "environment": os.environ.get("ENVIRONMENT", "production")
-    })
+    return cached_response('/api/info', None, lambda: INFO_BODY,
+                           'application/json')
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(METRICS.render(), content_type=metrics.CONTENT_TYPE,
+                    headers={'Cache-Control': 'no-store'})
+
+
+# After the routes: the metrics rows have a slot per route
+METRICS = metrics.RequestMetrics(app).install(app)
+
+
+def warm_up():
+    """Render and compress the cached bodies once, then report ready"""
+    second = int(datetime.now().timestamp())
+    for encoding in ('identity', *_ENCODERS):
+        response_cache.get('/', encoding, second,
+                           lambda: _render_home(second))
+        response_cache.get('/api/info', encoding, None, lambda: INFO_BODY)
+    METRICS.warm = True
+
+
+warm_up()
 
 if __name__ == '__main__':
     # Run the Flask app
@@ -0,0 +1,99 @@
+"""
+Gunicorn configuration for the Flask apps (docker/app.py and app.py)
+
+Gunicorn loads ./gunicorn.conf.py automatically: `gunicorn app:app`.
+Every setting below can be overridden with an environment variable:
+
+    WEB_BIND            address to listen on (default 0.0.0.0:$PORT, PORT=5000)
+    WEB_WORKERS         pre-forked worker processes (default 2 x CPUs + 1)
+    WEB_THREADS         threads per worker (default 2)
+    WEB_KEEPALIVE       seconds an idle keep-alive connection stays open
+                        (default 75, above the ALB's 60 s idle timeout so the
+                        load balancer, not the app, closes idle connections)
+    WEB_TIMEOUT         seconds before a silent worker is killed (default 30)
+    WEB_GRACEFUL_TIMEOUT seconds workers get to finish on reload/stop (30)
+    WEB_MAX_REQUESTS    recycle a worker after this many requests (default
+                        10000, 0 = never), plus up to WEB_MAX_REQUESTS_JITTER
+                        (default 10%) so workers do not restart together
+    WEB_PRELOAD         import the app once in the master (default 1)
+    WEB_ACCESS_LOG      '-' to log requests to stdout (default: off)
+    METRICS_DIR         where workers share their request metrics (default
+                        mini-infra-gpt-metrics-<port> in /dev/shm); emptied
+                        when the server starts
+
+The app's readiness probe (/health) reads READY_MAX_IN_FLIGHT (default:
+derived from WEB_THREADS) and READY_MAX_LATENCY_MS, see metrics.py.
+
+Signals: TERM stops gracefully, HUP restarts the workers with the new
+configuration, USR2 re-executes the master for new application code (then
+send TERM to the old master). With preloading, HUP alone does not pick up
+code changes - the workers fork from the already-imported app.
+"""
+
+import gc
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    value = os.environ.get(name, '').strip()
+    return int(value) if value else default
+
+
+def available_cpus():
+    """CPUs this process may use, honouring a cgroup v2 quota (containers)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = os.environ.get('WEB_BIND') or f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = _env_int('WEB_WORKERS', 2 * available_cpus() + 1)
+threads = _env_int('WEB_THREADS', 2)
+# gthread (even with one thread) keeps connections alive; sync workers do not
+worker_class = 'gthread'
+keepalive = _env_int('WEB_KEEPALIVE', 75)
+timeout = _env_int('WEB_TIMEOUT', 30)
+graceful_timeout = _env_int('WEB_GRACEFUL_TIMEOUT', 30)
+max_requests = _env_int('WEB_MAX_REQUESTS', 10000)
+max_requests_jitter = _env_int('WEB_MAX_REQUESTS_JITTER', max_requests // 10)
+preload_app = os.environ.get('WEB_PRELOAD', '1') not in ('0', 'false', 'no')
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+# Worker heartbeats in memory: container disks can stall the heartbeat
+# file's writes long enough for the master to kill healthy workers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Read by metrics.py when the app is imported, in the master or a worker
+os.environ['WEB_THREADS'] = str(threads)
+os.environ.setdefault('METRICS_DIR', os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+    f"mini-infra-gpt-metrics-{bind.rsplit(':', 1)[-1]}"))
+
+
+def on_starting(server):
+    # Counters start from zero with the server (not on HUP reloads)
+    try:
+        from metrics import clear_directory
+    except ImportError:  # an app without metrics.py
+        return
+    clear_directory(os.environ['METRICS_DIR'])
+
+
+def when_ready(server):
+    # Move everything the preloaded app allocated out of the collector's
+    # generations: workers then never write to those objects' GC headers,
+    # so the pages stay shared copy-on-write instead of being copied
+    gc.freeze()
@@ -0,0 +1,449 @@
+"""
+Metrics - Prometheus instrumentation and health probes for the Flask apps
+
+Standard library only. A WSGI middleware counts requests per route and
+status class, records latencies into fixed histogram buckets and tracks
+requests in flight; /metrics renders them in the Prometheus text format
+together with process RSS and CPU time.
+
+The hot path takes no locks: every thread owns a row of counters that
+only it writes (a float array), and a scrape sums the rows. Rows are
+keyed by thread ident, so a thread started per request (development
+server) reuses the row of an earlier, finished thread. With
+METRICS_DIR set (gunicorn.conf.py does), the rows are memory-mapped files
+in that directory, so a scrape served by any worker reports the totals
+of all workers - including ones already recycled.
+
+Probes:
+- liveness: the process answers at all (no work, never fails)
+- readiness: warm-up finished and the instance is not saturated - every
+  worker sharing METRICS_DIR has all threads busy (the probing worker:
+  all but the probe's), or this worker's recent average latency is above
+  the limit. The load balancer checks the instance, not a worker, and
+  stops routing to it while its readiness check fails.
+
+A saturated worker's requests mostly wait: queued in the worker before a
+thread takes them, or in a proxy in front of it. When the proxy stamps
+X-Request-Start (nginx: `proxy_set_header X-Request-Start "t=${msec}"`),
+that wait counts towards the average latency.
+"""
+
+import mmap
+import os
+import resource
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0)
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+UNMATCHED = 'unmatched'
+
+# Weight of the newest request in the moving average latency
+LATENCY_ALPHA = 0.1
+
+# A moving average older than this says nothing about current load
+LATENCY_WINDOW = 10.0
+
+_ROUTE_KEY = 'metrics.route'
+
+# Owner part of the file holding the rows of exited workers
+ARCHIVE = 'archive'
+
+
+def queue_time(header, now=None):
+    """
+    Seconds between the X-Request-Start stamp and `now`
+
+    Accepts "t=<Unix time>" or the bare number, in seconds (nginx),
+    milliseconds (Heroku) or microseconds (Apache).
+
+    Returns:
+        float: The wait, 0.0 without a usable stamp
+    """
+    if not header:
+        return 0.0
+    header = header.strip()
+    try:
+        stamp = float(header[2:] if header.startswith('t=') else header)
+    except ValueError:
+        return 0.0
+    if stamp > 1e14:
+        stamp /= 1e6
+    elif stamp > 1e11:
+        stamp /= 1e3
+    return max(0.0, (time.time() if now is None else now) - stamp)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _process_rss():
+    """Resident set size in bytes (current, or peak if /proc is missing)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _rss_of(pid):
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RequestMetrics:
+    """
+    WSGI middleware + registry for one Flask app
+
+    Args:
+        app (Flask): The app; install() wraps its wsgi_app
+        directory (str): Where to keep shared row files (default:
+            METRICS_DIR; None = this process only)
+        buckets (tuple): Histogram upper bounds in seconds
+        max_in_flight (int): A worker is saturated above this many
+            requests in flight besides the probe, and readiness fails once
+            every worker is (READY_MAX_IN_FLIGHT, default WEB_THREADS - 1:
+            no thread left for another request; 32 when the thread count
+            is unknown)
+        max_latency (float): Readiness fails while the moving average
+            latency, queueing included, exceeds this many seconds
+            (READY_MAX_LATENCY_MS, default 1000 ms)
+    """
+
+    def __init__(self, app, directory=None, buckets=DEFAULT_BUCKETS,
+                 max_in_flight=None, max_latency=None):
+        self.routes = sorted({rule.rule for rule in app.url_map.iter_rules()
+                              if rule.endpoint != 'static'}) + [UNMATCHED]
+        self._route_index = {route: i for i, route in enumerate(self.routes)}
+        self.buckets = tuple(buckets)
+        # Per route: status class counts, bucket counts (+Inf last), sum
+        self._stride = len(STATUS_CLASSES) + len(self.buckets) + 2
+        # Slots 0 and 1: requests started and finished
+        self._size = 2 + len(self.routes) * self._stride
+        self.directory = directory or os.environ.get('METRICS_DIR') or None
+        self._schema = '%08x' % zlib.crc32(
+            repr((self.routes, self.buckets)).encode())
+
+        if max_in_flight is None:
+            # gthread runs at most WEB_THREADS requests at a time, the
+            # probe among them; with one thread only the latency can tell
+            threads = os.environ.get('WEB_THREADS')
+            max_in_flight = int(os.environ.get('READY_MAX_IN_FLIGHT')
+                                or (max(1, int(threads) - 1) if threads
+                                    else 32))
+        if max_latency is None:
+            max_latency = float(os.environ.get('READY_MAX_LATENCY_MS',
+                                               '1000')) / 1000
+        self.max_in_flight = max_in_flight
+        self.max_latency = max_latency
+
+        self.warm = False
+        self._app = None
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Fresh rows for this process (also runs in forked workers)"""
+        self._by_thread = {}
+        self._rows = []
+        self._rows_lock = threading.Lock()
+        self._latency = 0.0
+        self._latency_at = 0.0
+        self._started = time.time()
+
+    # -- recording ---------------------------------------------------------
+
+    def install(self, app):
+        """Wrap the app's WSGI callable and label requests with their route"""
+        self._app = app.wsgi_app
+        app.wsgi_app = self
+
+        @app.before_request
+        def _label_route():
+            from flask import request
+
+            if request.url_rule is not None:
+                request.environ[_ROUTE_KEY] = request.url_rule.rule
+        return self
+
+    def _row(self):
+        ident = threading.get_ident()
+        row = self._by_thread.get(ident)
+        if row is None:
+            row = self._by_thread[ident] = self._new_row()
+        return row
+
+    def _new_row(self):
+        with self._rows_lock:
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                fd = self._create_row_file(len(self._rows))
+                try:
+                    os.ftruncate(fd, self._size * 8)
+                    mapped = mmap.mmap(fd, self._size * 8)
+                finally:
+                    os.close(fd)
+                row = memoryview(mapped).cast('d')
+            else:
+                row = array('d', bytes(self._size * 8))
+            self._rows.append(row)
+            return row
+
+    def _create_row_file(self, index):
+        # Never reopen an existing file: a recycled worker's pid can come
+        # round again, and truncating its rows would lose their counts
+        while True:
+            path = os.path.join(self.directory,
+                                f'{self._schema}-{os.getpid()}-{index}.metrics')
+            try:
+                return os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                index += 1
+
+    def __call__(self, environ, start_response):
+        row = self._row()
+        row[0] += 1
+        status = []
+
+        def capture(line, headers, exc_info=None):
+            status.append(line)
+            return start_response(line, headers, exc_info)
+
+        queued = queue_time(environ.get('HTTP_X_REQUEST_START'))
+        start = time.perf_counter()
+        try:
+            return self._app(environ, capture)
+        finally:
+            elapsed = time.perf_counter() - start
+            base = 2 + self._stride * self._route_index.get(
+                environ.get(_ROUTE_KEY, UNMATCHED), len(self.routes) - 1)
+            code = status[-1][0] if status else '5'
+            row[base + (ord(code) - ord('1') if '1' <= code <= '5' else 4)] += 1
+            row[base + len(STATUS_CLASSES)
+                + bisect_left(self.buckets, elapsed)] += 1
+            row[base + self._stride - 1] += elapsed
+            row[1] += 1
+            # Racy read-modify-write across threads; an occasionally lost
+            # update only nudges an average
+            now = time.monotonic()
+            latency = queued + elapsed
+            if now - self._latency_at > LATENCY_WINDOW:
+                self._latency = latency
+            else:
+                self._latency += LATENCY_ALPHA * (latency - self._latency)
+            self._latency_at = now
+
+    # -- reading -----------------------------------------------------------
+
+    def _sum(self, rows):
+        total = [0.0] * self._size
+        for row in rows:
+            for i, value in enumerate(row):
+                total[i] += value
+        return total
+
+    def _read_row(self, name):
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        return array('d', data) if len(data) == self._size * 8 else None
+
+    def _shared_rows(self):
+        """
+        Read the rows of every worker that used the directory
+
+        Rows of exited workers are folded into one archive file, so
+        recycling workers does not make every scrape read more files.
+        Scrapes hold an exclusive lock (writers never lock - they only
+        touch their own rows), so no scrape sees a row both in the archive
+        and in its original file.
+
+        Returns:
+            tuple: (live worker pid -> its rows, archived row or None)
+        """
+        import fcntl
+
+        workers, dead = {}, []
+        archive_name = f'{self._schema}-{ARCHIVE}.metrics'
+        try:
+            lock = open(os.path.join(self.directory, f'{self._schema}.lock'),
+                        'a')
+        except OSError:
+            return workers, None
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self._read_row(archive_name)
+            for name in os.listdir(self.directory):
+                schema, _, rest = name.partition('-')
+                if (schema != self._schema or not name.endswith('.metrics')
+                        or name == archive_name):
+                    continue
+                row = self._read_row(name)
+                if row is None:
+                    continue
+                pid = int(rest.split('-')[0])
+                if pid == os.getpid() or _alive(pid):
+                    workers.setdefault(pid, []).append(row)
+                else:
+                    dead.append((name, row))
+
+            if dead:
+                archive = array('d', self._sum(
+                    [row for _, row in dead] + ([archive] if archive else [])))
+                temporary = os.path.join(self.directory, archive_name + '.tmp')
+                with open(temporary, 'wb') as f:
+                    f.write(archive.tobytes())
+                os.replace(temporary,
+                           os.path.join(self.directory, archive_name))
+                for name, _ in dead:
+                    os.unlink(os.path.join(self.directory, name))
+        return workers, archive
+
+    def in_flight(self):
+        """Requests currently being handled by this process"""
+        return int(sum(row[0] - row[1] for row in self._rows))
+
+    def workers_in_flight(self):
+        """Requests in flight per live worker pid (just this one without
+        a shared directory)"""
+        counts = {}
+        if self.directory:
+            workers, _ = self._shared_rows()
+            counts = {pid: int(sum(row[0] - row[1] for row in rows))
+                      for pid, rows in workers.items()}
+        counts[os.getpid()] = self.in_flight()
+        return counts
+
+    def recent_latency(self):
+        """Moving average latency, queueing included (None when idle)"""
+        if time.monotonic() - self._latency_at > LATENCY_WINDOW:
+            return None
+        return self._latency
+
+    def readiness(self):
+        """
+        Returns:
+            tuple: (ready, reason) - reason explains a False
+        """
+        if not self.warm:
+            return False, 'warming up'
+        # Only this worker runs the readiness request itself, so every
+        # worker is saturated above max_in_flight. The load balancer
+        # routes to the instance: it is ready while any worker is not
+        workers = self.workers_in_flight()
+        if all(count > self.max_in_flight for count in workers.values()):
+            busy = sum(workers.values()) - 1
+            return False, (f'saturated: {busy} requests in flight in '
+                           f'{len(workers)} worker(s)')
+        latency = self.recent_latency()
+        if latency is not None and latency > self.max_latency:
+            return False, f'saturated: {latency * 1000:.0f} ms average latency'
+        return True, 'ready'
+
+    def render(self):
+        """The Prometheus text exposition (bytes)"""
+        if self.directory:
+            workers, archive = self._shared_rows()
+            rows = [row for worker in workers.values() for row in worker]
+            pids = set(workers) | {os.getpid()}
+        else:
+            rows, archive, pids = self._rows, None, {os.getpid()}
+        live = self._sum(rows)
+        # A worker killed mid-request never finishes it: the gauge only
+        # counts live workers
+        in_flight = max(0, int(live[0] - live[1]))
+        totals = self._sum([live, archive]) if archive else live
+
+        requests, histograms = [], []
+        for r, route in enumerate(self.routes):
+            base = 2 + self._stride * r
+            statuses = totals[base:base + len(STATUS_CLASSES)]
+            count = sum(statuses)
+            if not count:
+                continue
+            for status, value in zip(STATUS_CLASSES, statuses):
+                if value:
+                    requests.append(f'http_requests_total{{route="{route}",'
+                                    f'status="{status}"}} {value:.0f}')
+            cumulative = 0
+            bucket_counts = totals[base + len(STATUS_CLASSES):
+                                   base + self._stride - 1]
+            for bound, value in zip(self.buckets + ('+Inf',), bucket_counts):
+                cumulative += value
+                histograms.append(
+                    f'http_request_duration_seconds_bucket{{route="{route}",'
+                    f'le="{bound}"}} {cumulative:.0f}')
+            histograms.append(
+                f'http_request_duration_seconds_sum{{route="{route}"}} '
+                f'{totals[base + self._stride - 1]:.6f}')
+            histograms.append(f'http_request_duration_seconds_count'
+                              f'{{route="{route}"}} {count:.0f}')
+
+        memory = {pid: rss for pid, rss in ((p, _rss_of(p)) for p in pids)
+                  if rss is not None}
+        cpu = os.times()
+        lines = [
+            '# HELP http_requests_total Requests handled, by route and '
+            'status class',
+            '# TYPE http_requests_total counter', *requests,
+            '# HELP http_request_duration_seconds Time to produce the '
+            'response',
+            '# TYPE http_request_duration_seconds histogram',
+            *histograms,
+            '# HELP http_requests_in_flight Requests being handled',
+            '# TYPE http_requests_in_flight gauge',
+            f'http_requests_in_flight {in_flight}',
+            '# HELP app_workers Worker processes reporting into these metrics',
+            '# TYPE app_workers gauge',
+            f'app_workers {len(memory) or 1}',
+            '# HELP app_workers_resident_memory_bytes RSS summed over the '
+            'live workers',
+            '# TYPE app_workers_resident_memory_bytes gauge',
+            f'app_workers_resident_memory_bytes '
+            f'{sum(memory.values()) or _process_rss()}',
+            '# HELP process_resident_memory_bytes RSS of the answering '
+            'process',
+            '# TYPE process_resident_memory_bytes gauge',
+            f'process_resident_memory_bytes {_process_rss()}',
+            '# HELP process_cpu_seconds_total User + system CPU time of the '
+            'answering process',
+            '# TYPE process_cpu_seconds_total counter',
+            f'process_cpu_seconds_total {cpu.user + cpu.system:.2f}',
+            '# HELP process_start_time_seconds Start of the answering '
+            'process (Unix time)',
+            '# TYPE process_start_time_seconds gauge',
+            f'process_start_time_seconds {self._started:.0f}',
+        ]
+        return ('\n'.join(lines) + '\n').encode()
+
+
+def clear_directory(directory):
+    """Remove the row files of a previous server run"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(('.metrics', '.metrics.tmp')):
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -4,8 +4,9 @@ Mini InfraGPT - Main Application
 """
 
 import sys
-from src.ai_parser import parse_infrastructure_request
-from src.terraform_generator import generate_terraform_code
+import time
+from src.ai_parser import parse_infrastructure_request, parse_infrastructure_requests
+from src.terraform_generator import generate_terraform_code, generate_stacks, stack_id
 
 def print_banner():
     banner = """
@@ -16,11 +17,104 @@ def print_banner():
 """
     print(banner)
 
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Mini InfraGPT - AI-Powered Infrastructure Creator")
+    parser.add_argument('request', nargs='*',
+                        help="Infrastructure request in plain English")
+    parser.add_argument('--bulk', metavar='FILE',
+                        help="Generate one stack per line of FILE; a line is "
+                             "either a request or 'stack_id<TAB>request'")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --bulk (default: CPU count)")
+    parser.add_argument('--output-dir', default='generated-terraform',
+                        help="Where to write Terraform (default: %(default)s)")
+    parser.add_argument('--format', choices=['hcl', 'json'], default='hcl',
+                        help="Per-concern .tf files or a single main.tf.json "
+                             "(default: %(default)s)")
+    parser.add_argument('--deploy', action='store_true',
+                        help="Deploy right away: terraform init and the AWS "
+                             "credential check run while the request is "
+                             "parsed and the configuration generated")
+    parser.add_argument('--no-refresh', action='store_true',
+                        help="With --deploy: skip the state refresh while "
+                             "planning (only when state is known fresh)")
+    parser.add_argument('--parallelism', type=int, metavar='N',
+                        help="With --deploy: concurrent Terraform operations "
+                             "for plan and apply (default: Terraform's 10)")
+    parser.add_argument('--serve', action='store_true',
+                        help="Run the HTTP generation service "
+                             "(POST /v1/generate) instead of one request")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Address for --serve (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8000,
+                        help="Port for --serve (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def read_bulk_requests(path):
+    """
+    Return (stack ids, requests) from a bulk request file
+
+    Lines without an explicit id get one derived from the request text
+    (see stack_id()), so editing the file never renames other stacks.
+    """
+    ids, requests, occurrences = [], [], {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            sid, sep, request = line.partition('\t')
+            if sep:
+                sid, request = sid.strip(), request.strip()
+            else:
+                request = line
+                sid = stack_id(request, occurrences.get(request, 0))
+                occurrences[request] = occurrences.get(request, 0) + 1
+            ids.append(sid)
+            requests.append(request)
+    return ids, requests
+
+def run_bulk(args):
+    ids, requests = read_bulk_requests(args.bulk)
+    print(f"📦 Bulk mode: {len(requests)} requests from {args.bulk}\n")
+
+    start = time.perf_counter()
+    stacks = list(zip(ids, parse_infrastructure_requests(requests)))
+    results = generate_stacks(stacks, base_dir=args.output_dir,
+                              max_workers=args.workers, fmt=args.format)
+    elapsed = time.perf_counter() - start
+
+    written = sum(1 for r in results if r.changed)
+    print(f"✅ {len(results)} stacks in {elapsed:.2f}s "
+          f"({written} written, {len(results) - written} unchanged)")
+    print(f"📁 Location: {args.output_dir}/<stack id>/\n")
+
+def run_service(args):
+    from src.generation_service import create_app
+
+    print(f"🌐 Generation service: POST http://{args.host}:{args.port}"
+          f"/v1/generate")
+    print("   (development server - see src/generation_service.py for "
+          "Gunicorn)\n")
+    create_app().run(host=args.host, port=args.port, threaded=True)
+
 def main():
+    args = parse_args()
     print_banner()
-    
-    if len(sys.argv) > 1:
-        request = ' '.join(sys.argv[1:])
+
+    if args.serve:
+        run_service(args)
+        return
+
+    if args.bulk:
+        run_bulk(args)
+        return
+
+    if args.request:
+        request = ' '.join(args.request)
     else:
         print("📝 What infrastructure do you need?\n")
         print("💡 Examples:")
@@ -35,22 +129,32 @@ def main():
     
     print(f"\n💭 Your request: {request}\n")
     print("="*60)
+
+    if args.deploy:
+        from src.deploy_pipeline import deploy_request
+
+        print()
+        deploy_request(request, output_dir=args.output_dir, fmt=args.format,
+                       refresh=not args.no_refresh,
+                       parallelism=args.parallelism)
+        return
     
     print("\n🧠 STEP 1: Analyzing request...\n")
     specs = parse_infrastructure_request(request)
     
     print("\n" + "="*60)
     print("\n📝 STEP 2: Generating Terraform code...\n")
-    tf_file = generate_terraform_code(specs)
+    tf_dir = generate_terraform_code(specs, output_dir=args.output_dir,
+                                     fmt=args.format)
     
     print("\n" + "="*60)
     print("\n✅ PREPARATION COMPLETE!")
     print("="*60)
     print("\n📋 Next Steps:\n")
     print("1️⃣  Review Terraform:")
-    print(f"   cat {tf_file}")
+    print(f"   cat {tf_dir}/*.tf*")
     print("\n2️⃣  Deploy to AWS:")
-    print("   cd generated-terraform")
+    print(f"   cd {args.output_dir}")
     print("   terraform init")
     print("   terraform apply")
     print("\n3️⃣  Cleanup:")
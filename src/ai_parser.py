@@ -2,71 +2,375 @@
 AI Parser - Uses Ollama or fallback parsing
 """
 
-import sys
+import re
+import zlib
+from functools import lru_cache
 
 try:
-    import requests
+    from .infra_spec import InfraSpec
 except ImportError:
-    print("Installing requests...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "requests"])
-    import requests
+    from infra_spec import InfraSpec
 
+# The Ollama client (and with it `requests`) is imported on first use only,
+# so the keyword parser - and main.py - start without loading it.
+_ollama_client = None
 
-def check_ollama_running():
-    """Check if Ollama is running"""
+
+def _ollama_module():
     try:
-        response = requests.get('http://localhost:11434/api/tags', timeout=2)
-        return response.status_code == 200
-    except Exception:
-        return False
+        from . import ollama_client
+    except ImportError:
+        import ollama_client
+    return ollama_client
 
 
-def parse_infrastructure_request(user_input):
+_capacity_module = None
+
+
+def _capacity_planner():
+    # Also deferred: compiling its load-hint patterns costs startup time.
+    # Kept in a global - an import statement per request is measurable
+    global _capacity_module
+    if _capacity_module is None:
+        try:
+            from . import capacity_planner
+        except ImportError:
+            import capacity_planner
+        _capacity_module = capacity_planner
+    return _capacity_module
+
+
+def get_ollama_client():
     """
-    Convert natural language to infrastructure specs
-    Uses fallback parsing (no AI needed)
+    Return the shared, pooled Ollama client
+
+    Raises:
+        ImportError: If `requests` is not installed
     """
+    global _ollama_client
+    if _ollama_client is None:
+        _ollama_client = _ollama_module().OllamaClient()
+    return _ollama_client
+
+
+def check_ollama_running():
+    """Check if Ollama is running (cached, see OllamaClient.health_ttl)"""
+    try:
+        return get_ollama_client().is_healthy()
+    except ImportError:
+        return False
+
+
+# Keyword tables
+DATABASE_KEYWORDS = ('database', 'db', 'mysql', 'postgres', 'postgresql',
+                     'sql', 'rds')
+POSTGRES_KEYWORDS = ('postgres', 'postgresql')
+MYSQL_KEYWORDS = ('mysql',)
+API_KEYWORDS = ('api', 'backend', 'rest', 'restful')
+SCALE_KEYWORDS = ('autoscaling', 'auto-scaling', 'auto scaling', 'autoscale',
+                  'scalable', 'scale out', 'horizontal scaling',
+                  'load balancer', 'load balanced', 'high availability',
+                  'highly available')
+
+_DATABASE_SET = frozenset(DATABASE_KEYWORDS)
+_POSTGRES_SET = frozenset(POSTGRES_KEYWORDS)
+_MYSQL_SET = frozenset(MYSQL_KEYWORDS)
+_API_SET = frozenset(API_KEYWORDS)
+_SCALE_SET = frozenset(SCALE_KEYWORDS)
+
+# All keyword tables compiled into one word-bounded alternation (longest
+# first so 'postgresql' wins over 'postgres'), so a request is classified
+# in a single scan instead of one scan per keyword
+_KEYWORD_PATTERN = re.compile(r'\b({})s?\b'.format('|'.join(
+    re.escape(kw) for kw in sorted(
+        _DATABASE_SET | _POSTGRES_SET | _MYSQL_SET | _API_SET | _SCALE_SET,
+        key=len, reverse=True)
+)))
+
+# Every load hint starts with a number (see capacity_planner)
+_DIGIT = re.compile(r'\d')
+
+# Requests above this many users get an Auto Scaling Group; its bounds
+# come from the capacity plan (keyword-only requests get the minimum)
+AUTOSCALING_USER_THRESHOLD = 1000
+MIN_SCALED_INSTANCES = 2
+MAX_SCALED_INSTANCES = 50
+
+
+# Bump when _classify changes in a way the keyword tables don't capture
+PARSER_REVISION = 4
 
-    print("🔍 Analyzing your request...")
 
+def _fingerprint(*parts):
+    return format(zlib.crc32(repr(parts).encode()), '08x')
+
+
+# Cache version of the keyword parser - changes with the keyword tables
+KEYWORD_PARSER_VERSION = _fingerprint(
+    PARSER_REVISION, DATABASE_KEYWORDS, POSTGRES_KEYWORDS, MYSQL_KEYWORDS,
+    API_KEYWORDS, SCALE_KEYWORDS, AUTOSCALING_USER_THRESHOLD,
+    MIN_SCALED_INSTANCES, MAX_SCALED_INSTANCES
+)
+
+
+@lru_cache(maxsize=1)
+def keyword_parser_version():
+    """Cache version of keyword parsing plus the capacity catalog it uses"""
+    return _fingerprint(KEYWORD_PARSER_VERSION,
+                        _capacity_planner().config_fingerprint())
+
+
+def _capacity_plan(load, database_needed, autoscaling):
+    """Capacity plan for the load hints, or None without hints or config"""
+    if not load.has_hints:
+        return None
+    try:
+        return _capacity_planner().plan_capacity(load, database_needed,
+                                                 autoscaling)
+    except (ImportError, OSError):
+        # PyYAML or configs/config.yaml unavailable: keep the defaults
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _keyword_spec(database_needed, database_type, app_type, users,
+                  autoscaling):
+    # Only a few hundred combinations occur: built once, then shared
+    return InfraSpec(
+        instance_type="t2.micro",
+        database_needed=database_needed,
+        database_type=database_type,
+        region="us-east-1",
+        app_type=app_type,
+        expected_users=users,
+        autoscaling=autoscaling,
+        min_size=MIN_SCALED_INSTANCES if autoscaling else 1,
+        max_size=MIN_SCALED_INSTANCES * 2 if autoscaling else 1
+    )
+
+
+def plan_request(user_input):
+    """
+    Classify a request and size it (no console output)
+
+    Returns:
+        tuple: (InfraSpec, CapacityPlan or None when the request states no
+        load or the capacity config can't be loaded)
+    """
     user_lower = user_input.lower()
+    found = set(_KEYWORD_PATTERN.findall(user_lower))
 
-    # Detect database
-    db_keywords = ['database', 'db', 'mysql', 'postgres', 'postgresql', 'sql',
-                   'rds']
-    database_needed = any(kw in user_lower for kw in db_keywords)
+    database_needed = not found.isdisjoint(_DATABASE_SET)
 
     # Database type
-    if 'postgres' in user_lower or 'postgresql' in user_lower:
+    if not found.isdisjoint(_POSTGRES_SET):
         database_type = 'postgres'
-    elif 'mysql' in user_lower:
+    elif not found.isdisjoint(_MYSQL_SET):
         database_type = 'mysql'
     else:
         database_type = 'none' if not database_needed else 'postgres'
 
     # App type
-    if 'api' in user_lower or 'backend' in user_lower or 'rest' in user_lower:
-        app_type = 'api'
-    else:
-        app_type = 'web'
+    app_type = 'api' if not found.isdisjoint(_API_SET) else 'web'
+
+    # Scale hints (most requests state no numbers at all)
+    load = None
+    if _DIGIT.search(user_lower) is not None:
+        load = _capacity_planner().extract_load(user_lower)
+    users = 0 if load is None else load.users
+    autoscaling = (not found.isdisjoint(_SCALE_SET)
+                   or users > AUTOSCALING_USER_THRESHOLD)
+
+    specs = _keyword_spec(database_needed, database_type, app_type, users,
+                          autoscaling)
+    if load is None:
+        return specs, None
+
+    plan = _capacity_plan(load, database_needed, autoscaling)
+    if plan is None:
+        return specs, None
 
-    specs = {
-        "instance_type": "t2.micro",
-        "database_needed": database_needed,
-        "database_type": database_type,
-        "region": "us-east-1",
-        "app_type": app_type
-    }
+    count = plan.instance_count
+    scaled = autoscaling or count > 1
+    return specs._replace(
+        instance_type=plan.instance_type,
+        autoscaling=scaled,
+        min_size=count,
+        max_size=min(count * 2, MAX_SCALED_INSTANCES) if scaled else count,
+        db_instance_class=plan.db_instance_class,
+        db_storage_gb=plan.db_storage_gb,
+        db_storage_type=plan.db_storage_type,
+        db_iops=plan.db_iops
+    ), plan
+
+
+def _classify(user_input):
+    """Build the InfraSpec for one request (no console output)"""
+    return plan_request(user_input)[0]
+
+
+def parse_infrastructure_request(user_input):
+    """
+    Convert natural language to infrastructure specs
+    Uses fallback parsing (no AI needed)
+    """
+
+    print("🔍 Analyzing your request...")
+
+    specs, plan = plan_request(user_input)
 
     print("✅ Request parsed successfully!")
     print("📋 Specifications:")
-    for key, value in specs.items():
+    for key, value in specs.to_dict().items():
         print(f"   • {key}: {value}")
 
+    if plan is not None:
+        print("📐 Capacity plan:")
+        print(f"   • {plan.required_rps:g} req/s -> {plan.instance_count} x "
+              f"{plan.instance_type} ({plan.instance_headroom:.0%} headroom)")
+        if specs.database_needed:
+            iops = f", {plan.db_iops} IOPS" if plan.db_iops else ""
+            print(f"   • {plan.db_instance_class}, {plan.db_storage_gb} GB "
+                  f"{plan.db_storage_type}{iops} "
+                  f"({plan.db_headroom:.0%} headroom)")
+
+    return specs
+
+
+def parse_infrastructure_requests(user_inputs, cache=None):
+    """
+    Parse many requests lazily (e.g. from a ticket queue)
+
+    Args:
+        user_inputs (iterable): Natural language requests
+        cache (ParseCache): Optional cache consulted before parsing
+
+    Yields:
+        InfraSpec: Specs for each request, in input order, without console
+        output
+    """
+    for user_input in user_inputs:
+        if cache is None:
+            yield _classify(user_input)
+            continue
+
+        specs = cache.get(user_input, keyword_parser_version())
+        if specs is None:
+            specs = _classify(user_input)
+            cache.put(user_input, keyword_parser_version(), specs)
+        yield specs
+
+
+LLM_PROMPT = """You convert infrastructure requests into JSON.
+Reply with a single JSON object with exactly these keys:
+  "instance_type": an EC2 instance type such as "t2.micro"
+  "database_needed": true or false
+  "database_type": "postgres", "mysql" or "none"
+  "region": an AWS region such as "us-east-1"
+  "app_type": "web" or "api"
+
+Request: {request}
+"""
+
+_INSTANCE_TYPE_PATTERN = re.compile(r'^[a-z][a-z0-9-]*\.[a-z0-9]+$')
+_REGION_PATTERN = re.compile(r'^[a-z]{2}(-[a-z]+)+-\d$')
+
+
+def _merge_llm_specs(text, specs):
+    """
+    Overlay the valid fields of a model reply onto keyword-parsed specs
+
+    Anything missing or malformed in the reply keeps the keyword value.
+    """
+    import json
+
+    try:
+        reply = json.loads(text)
+    except ValueError:
+        return specs
+    if not isinstance(reply, dict):
+        return specs
+
+    merged = specs.to_dict()
+    if isinstance(reply.get('database_needed'), bool):
+        merged['database_needed'] = reply['database_needed']
+    if reply.get('database_type') in ('postgres', 'mysql', 'none'):
+        merged['database_type'] = reply['database_type']
+    if reply.get('app_type') in ('web', 'api'):
+        merged['app_type'] = reply['app_type']
+    if _INSTANCE_TYPE_PATTERN.match(str(reply.get('instance_type', ''))):
+        merged['instance_type'] = reply['instance_type']
+    if _REGION_PATTERN.match(str(reply.get('region', ''))):
+        merged['region'] = reply['region']
+
+    # Keep the pair consistent whichever side the model got wrong
+    if not merged['database_needed']:
+        merged['database_type'] = 'none'
+    elif merged['database_type'] == 'none':
+        merged['database_type'] = 'postgres'
+    return InfraSpec.from_dict(merged)
+
+
+@lru_cache(maxsize=None)
+def llm_parser_version(model):
+    """Cache version of the Ollama parser - changes with model, prompt or tables"""
+    return _fingerprint(keyword_parser_version(), model, LLM_PROMPT)
+
+
+def parse_with_ollama(user_input, client=None, cache=None):
+    """
+    Parse a request with the local Ollama model
+
+    Falls back to the keyword parser when Ollama is down, slow, the
+    circuit breaker is open or the reply is unusable. Only model answers
+    are cached; fallbacks are retried on the next call.
+    """
+    try:
+        client = client or get_ollama_client()
+    except ImportError:
+        return _classify(user_input)
+
+    if cache is not None:
+        version = llm_parser_version(client.model)
+        cached = cache.get(user_input, version)
+        if cached is not None:
+            return cached
+
+    specs = _classify(user_input)
+    try:
+        text = client.generate(LLM_PROMPT.format(request=user_input),
+                               format='json')
+    except _ollama_module().OllamaUnavailable:
+        return specs
+
+    specs = _merge_llm_specs(text, specs)
+    if cache is not None:
+        cache.put(user_input, version, specs)
     return specs
 
 
+def parse_with_ollama_many(user_inputs, client=None, max_workers=8,
+                           cache=None):
+    """
+    Parse many requests with up to `max_workers` Ollama calls in flight
+
+    Yields:
+        InfraSpec: Specs for each request, in input order
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if client is None:
+        try:
+            client = get_ollama_client()
+        except ImportError:
+            yield from parse_infrastructure_requests(user_inputs, cache)
+            return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(lambda r: parse_with_ollama(r, client, cache),
+                            user_inputs)
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Testing Infrastructure Parser")
@@ -2,13 +2,33 @@
 AWS Deployer - Handles Terraform execution and AWS operations
 """
 
+import os
 import subprocess
 import sys
-import time
-import json
-
-
-def run_command(command, cwd=None, capture_output=False):
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .aws_identity import CredentialsError, caller_identity
+    from .terraform_manifest import is_current, mark_stage
+    from .terraform_providers import (seed_lock_file, share_lock_file,
+                                      terraform_env)
+    from .terraform_events import (ResourceTimeline, format_type_stats,
+                                   record_timeline, resource_type_stats)
+    from .terraform_state import format_raw, read_output, read_outputs
+except ImportError:
+    from aws_identity import CredentialsError, caller_identity
+    from terraform_manifest import is_current, mark_stage
+    from terraform_providers import (seed_lock_file, share_lock_file,
+                                     terraform_env)
+    from terraform_events import (ResourceTimeline, format_type_stats,
+                                  record_timeline, resource_type_stats)
+    from terraform_state import format_raw, read_output, read_outputs
+
+# Plan saved by terraform_plan and consumed by terraform_apply
+PLAN_FILE = 'mini-infra-gpt.tfplan'
+
+
+def run_command(command, cwd=None, capture_output=False, env=None):
     """
     Run a shell command and handle errors
 
@@ -16,6 +36,7 @@ def run_command(command, cwd=None, capture_output=False):
         command (list): Command and arguments as list
         cwd (str): Working directory
         capture_output (bool): Whether to capture output
+        env (dict): Environment for the command (default: inherited)
 
     Returns:
         CompletedProcess object if capture_output=True, else None
@@ -27,11 +48,12 @@ def run_command(command, cwd=None, capture_output=False):
                 cwd=cwd,
                 check=True,
                 capture_output=True,
-                text=True
+                text=True,
+                env=env
             )
             return result
         else:
-            subprocess.run(command, cwd=cwd, check=True)
+            subprocess.run(command, cwd=cwd, check=True, env=env)
             return None
     except subprocess.CalledProcessError as e:
         print(f"❌ Command failed: {' '.join(command)}")
@@ -44,22 +66,171 @@ def run_command(command, cwd=None, capture_output=False):
         sys.exit(1)
 
 
-def terraform_init(terraform_dir):
-    """Initialize Terraform"""
-    print("\n🔧 Initializing Terraform...")
-    run_command(['terraform', 'init'], cwd=terraform_dir)
-    print("✅ Terraform initialized!")
+def run_streaming(command, cwd=None, timeline=None, env=None):
+    """
+    Run a `-json` Terraform command, parsing its events as they arrive
+
+    Each event's message is printed as progress and folded into
+    `timeline`. Exits like run_command when the command fails.
+
+    Returns:
+        ResourceTimeline: The timeline the events were folded into
+    """
+    timeline = timeline or ResourceTimeline()
+    try:
+        process = subprocess.Popen(command, cwd=cwd, env=env, text=True,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, bufsize=1)
+    except FileNotFoundError:
+        print(f"❌ Command not found: {command[0]}")
+        print(f"💡 Make sure {command[0]} is installed and in your PATH")
+        sys.exit(1)
+
+    with process.stdout:
+        for event in timeline.feed_lines(process.stdout):
+            if event['type'] != 'version' and event.get('@message'):
+                print(f"   {event['@message']}")
+
+    if process.wait() != 0:
+        print(f"❌ Command failed: {' '.join(command)}")
+        for error in timeline.errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+    return timeline
+
+
+def init_is_current(terraform_dir):
+    """Whether the directory is initialized for its manifest's providers"""
+    return (os.path.isdir(os.path.join(terraform_dir, '.terraform'))
+            and is_current(terraform_dir, 'initialized', 'providers_hash'))
+
+
+def plan_is_current(terraform_dir):
+    """Whether an unapplied saved plan exists for the current configuration"""
+    return (os.path.exists(os.path.join(terraform_dir, PLAN_FILE))
+            and is_current(terraform_dir, 'planned'))
+
+
+def plan_command(refresh=True, parallelism=None):
+    """`terraform plan` arguments saving the plan to PLAN_FILE"""
+    command = ['terraform', 'plan', '-input=false', f'-out={PLAN_FILE}']
+    if not refresh:
+        command.append('-refresh=false')
+    if parallelism:
+        command.append(f'-parallelism={parallelism}')
+    return command
 
 
-def terraform_plan(terraform_dir):
-    """Run Terraform plan"""
+def apply_command(terraform_dir, parallelism=None):
+    """
+    `terraform apply` arguments for the saved plan (or -auto-approve),
+    with machine-readable `-json` output (see terraform_events)
+    """
+    command = ['terraform', 'apply', '-input=false', '-json']
+    if parallelism:
+        command.append(f'-parallelism={parallelism}')
+    saved = os.path.exists(os.path.join(terraform_dir, PLAN_FILE))
+    command.append(PLAN_FILE if saved else '-auto-approve')
+    return command
+
+
+def finish_apply(terraform_dir):
+    """Discard the used-up saved plan and record the applied configuration"""
+    plan_path = os.path.join(terraform_dir, PLAN_FILE)
+    if os.path.exists(plan_path):
+        os.unlink(plan_path)
+    mark_stage(terraform_dir, 'applied')
+
+
+def terraform_init(terraform_dir, force=False, mirror_dir=None, quiet=False):
+    """
+    Initialize Terraform
+
+    Skipped when the directory is already initialized for the provider
+    requirements recorded in the generator's manifest. Otherwise providers
+    come from the shared plugin cache (and the local mirror, if configured)
+    and the lock file is shared with other stacks using the same providers.
+
+    Args:
+        terraform_dir (str): Generated Terraform directory
+        force (bool): Initialize even if already initialized
+        mirror_dir (str): Local provider mirror to install from, for
+            offline init (default: MINI_INFRA_GPT_PROVIDER_MIRROR)
+        quiet (bool): Capture terraform's output and print nothing unless
+            it fails (for running in the background)
+    """
+    if not force and init_is_current(terraform_dir):
+        if not quiet:
+            print("\n🔧 Terraform already initialized for these providers "
+                  "(skipped)")
+        return
+
+    if not quiet:
+        print("\n🔧 Initializing Terraform...")
+    if seed_lock_file(terraform_dir) and not quiet:
+        print("   Reusing shared provider lock file")
+    run_command(['terraform', 'init', '-input=false'], cwd=terraform_dir,
+                capture_output=quiet, env=terraform_env(mirror_dir))
+    share_lock_file(terraform_dir)
+    mark_stage(terraform_dir, 'initialized', 'providers_hash')
+    if not quiet:
+        print("✅ Terraform initialized!")
+
+
+def warm_provider_mirror(terraform_dir, mirror_dir):
+    """
+    Download the providers a generated directory needs into a local
+    filesystem mirror, so later inits can run offline from it
+
+    Args:
+        terraform_dir (str): Generated Terraform directory
+        mirror_dir (str): Mirror directory to populate
+    """
+    print(f"\n📦 Mirroring providers into {mirror_dir}...")
+    os.makedirs(mirror_dir, exist_ok=True)
+    run_command(['terraform', 'providers', 'mirror',
+                 os.path.abspath(mirror_dir)], cwd=terraform_dir)
+    print("✅ Provider mirror ready!")
+
+
+def terraform_plan(terraform_dir, force=False, refresh=True, parallelism=None):
+    """
+    Run Terraform plan and save it to PLAN_FILE for terraform_apply
+
+    Skipped when this exact configuration was already planned (per the
+    generator's manifest) and the saved plan hasn't been applied yet.
+
+    Args:
+        terraform_dir (str): Generated Terraform directory
+        force (bool): Plan even if the saved plan is current
+        refresh (bool): Refresh resource state first; pass False only when
+            the state is known fresh (e.g. nothing changed since our last
+            apply) to skip a full round of AWS API reads
+        parallelism (int): Concurrent operations (Terraform default: 10)
+    """
+    if not force and plan_is_current(terraform_dir):
+        print("\n📋 Configuration unchanged since last plan (skipped)")
+        return
+
     print("\n📋 Creating execution plan...")
-    run_command(['terraform', 'plan'], cwd=terraform_dir)
+    run_command(plan_command(refresh, parallelism), cwd=terraform_dir)
+    mark_stage(terraform_dir, 'planned')
     print("✅ Plan created!")
 
 
-def terraform_apply(terraform_dir):
-    """Apply Terraform configuration"""
+def terraform_apply(terraform_dir, parallelism=None):
+    """
+    Apply the plan saved by terraform_plan
+
+    Applying the saved plan means Terraform neither refreshes nor plans a
+    second time, and exactly the changes that were shown are applied (it
+    refuses the plan if the state changed since). Without a saved plan,
+    falls back to a regular plan-and-apply.
+
+    Args:
+        terraform_dir (str): Generated Terraform directory
+        parallelism (int): Concurrent operations (Terraform default: 10)
+    """
     print("\n⚡ Applying infrastructure changes...")
     print("⏱️  This will take 3-5 minutes...")
 
@@ -69,26 +240,47 @@ def terraform_apply(terraform_dir):
         print("❌ Deployment cancelled!")
         sys.exit(0)
 
-    run_command(['terraform', 'apply', '-auto-approve'], cwd=terraform_dir)
+    timeline = run_streaming(apply_command(terraform_dir, parallelism),
+                             cwd=terraform_dir)
+    # A saved plan can only be applied once
+    finish_apply(terraform_dir)
+
+    print("\n⏱️  Resource timings:")
+    print(timeline.summary())
+    record_timeline(timeline, stack=os.path.basename(
+        os.path.abspath(terraform_dir)))
+    print("\n📈 Apply times by resource type (all runs):")
+    print(format_type_stats(resource_type_stats()))
     print("✅ Infrastructure deployed!")
 
 
 def terraform_output(terraform_dir, output_name=None):
-    """Get Terraform outputs"""
-    if output_name:
-        result = run_command(
-            ['terraform', 'output', '-raw', output_name],
-            cwd=terraform_dir,
-            capture_output=True
-        )
-        return result.stdout.strip()
-    else:
-        result = run_command(
-            ['terraform', 'output', '-json'],
-            cwd=terraform_dir,
-            capture_output=True
-        )
-        return json.loads(result.stdout)
+    """
+    Get Terraform outputs
+
+    Read in-process from the local state (see terraform_state); only
+    remote backends spawn `terraform output`, and exit like run_command
+    when it fails.
+
+    Returns:
+        str: With `output_name`, the value as `terraform output -raw`
+        prints it ('' if missing); else dict: all outputs as
+        `terraform output -json` prints them
+    """
+    try:
+        if output_name:
+            value = read_output(terraform_dir, output_name)
+            return '' if value is None else format_raw(value)
+        return read_outputs(terraform_dir)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Command failed: {' '.join(e.cmd)}")
+        if e.stderr:
+            print(f"Error: {e.stderr}")
+        sys.exit(1)
+    except FileNotFoundError:
+        print("❌ Command not found: terraform")
+        print("💡 Make sure terraform is installed and in your PATH")
+        sys.exit(1)
 
 
 def terraform_destroy(terraform_dir):
@@ -105,96 +297,105 @@ def terraform_destroy(terraform_dir):
     print("✅ Infrastructure destroyed!")
 
 
-def wait_for_instance(instance_ip, timeout=300):
+def wait_for_instance(instance_ip, timeout=300, until='ssh', **options):
     """
-    Wait for EC2 instance to be ready
+    Wait for an EC2 instance (or load balancer) to be ready
+
+    Probes TCP 22 and HTTP /health with backoff and returns as soon as the
+    `until` stage is reached (see readiness).
 
     Args:
-        instance_ip (str): Public IP of the instance
+        instance_ip (str): Public IP or DNS name to probe
         timeout (int): Maximum wait time in seconds
-    """
-    print(f"\n⏳ Waiting for instance {instance_ip} to be ready...")
-    print("   (This may take 2-3 minutes)")
+        until (str): 'ssh' (ready for deploy-app.sh) or 'healthy'
+        **options: Passed to readiness.probe_instance (ports, health path)
 
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        try:
-            # Try to ping the instance
-            result = subprocess.run(
-                ['ping', '-c', '1', '-W', '2', instance_ip],
-                capture_output=True,
-                timeout=5
-            )
-
-            if result.returncode == 0:
-                print("✅ Instance is responding to ping!")
-
-                # Wait a bit more for SSH to be ready
-                print("   Waiting for SSH service...")
-                time.sleep(30)
-                return True
+    Returns:
+        bool: True if the stage was reached within the timeout
+    """
+    try:
+        from .readiness import wait_until_ready
+    except ImportError:
+        from readiness import wait_until_ready
+
+    print(f"\n⏳ Waiting for {instance_ip} to be ready ({until})...")
+    result, = wait_until_ready([instance_ip], until=until, timeout=timeout,
+                               **options)
+
+    for label, seconds in (("First response", result.time_to_first_ping),
+                           ("SSH ready", result.time_to_ssh),
+                           ("Healthy", result.time_to_healthy)):
+        if seconds is not None:
+            print(f"   • {label}: {seconds:.1f}s")
+
+    if result.ok:
+        print(f"✅ {instance_ip} is ready!")
+    else:
+        print("⚠️  Timeout waiting for instance. It might still be starting up.")
+    return result.ok
 
-        except subprocess.TimeoutExpired:
-            pass
-        except Exception:
-            print(f"   Still waiting... ({int(time.time() - start_time)}s)")
 
-        time.sleep(10)
+def resolve_credentials():
+    """
+    Resolve the AWS identity without printing (safe to run in a thread)
 
-    print("⚠️  Timeout waiting for instance. It might still be starting up.")
+    Returns:
+        tuple: (CallerIdentity or None, exception or None)
+    """
+    try:
+        return caller_identity(), None
+    except (CredentialsError, ImportError) as e:
+        return None, e
+
+
+def report_credentials(identity, error):
+    """Print the outcome of resolve_credentials; True if usable"""
+    if identity is not None:
+        print(f"✅ AWS credentials configured for account: {identity.account}")
+        return True
+    if isinstance(error, ImportError):
+        print("❌ boto3 not installed!")
+        print("\n💡 Install the Python dependencies:")
+        print("   pip install -r requirements.txt")
+    else:
+        print(f"❌ AWS credentials not configured! ({error})")
+        print("\n💡 Configure AWS CLI:")
+        print("   aws configure")
     return False
 
 
 def check_aws_credentials():
-    """Check if AWS credentials are configured"""
-    try:
-        result = subprocess.run(
-            ['aws', 'sts', 'get-caller-identity'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
-        if result.returncode == 0:
-            identity = json.loads(result.stdout)
-            print(f"✅ AWS credentials configured for account: {identity['Account']}")
-            return True
-        else:
-            print("❌ AWS credentials not configured!")
-            print("\n💡 Configure AWS CLI:")
-            print("   aws configure")
-            return False
-
-    except FileNotFoundError:
-        print("❌ AWS CLI not installed!")
-        print("\n💡 Install AWS CLI:")
-        print("   https://aws.amazon.com/cli/")
-        return False
-    except Exception as e:
-        print(f"❌ Error checking AWS credentials: {e}")
-        return False
+    """Check if AWS credentials are configured (in-process STS call)"""
+    return report_credentials(*resolve_credentials())
 
 
-def deploy_infrastructure(terraform_dir='generated-terraform'):
+def deploy_infrastructure(terraform_dir='generated-terraform', refresh=True,
+                          parallelism=None, credentials=None):
     """
     Complete deployment workflow
 
     Args:
         terraform_dir (str): Path to Terraform configuration directory
+        refresh (bool): Refresh state while planning (see terraform_plan)
+        parallelism (int): Concurrent Terraform operations for plan/apply
+        credentials (Future): Credential check already in flight (a
+            submitted resolve_credentials); default: checked alongside init
     """
     print("\n" + "=" * 60)
     print("☁️  AWS DEPLOYMENT")
     print("=" * 60)
 
-    # Check AWS credentials
-    if not check_aws_credentials():
-        sys.exit(1)
+    # Init needs no AWS credentials, so the STS round trip overlaps it
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        if credentials is None:
+            credentials = pool.submit(resolve_credentials)
+        terraform_init(terraform_dir)
+        if not report_credentials(*credentials.result()):
+            sys.exit(1)
 
     # Run Terraform workflow
-    terraform_init(terraform_dir)
-    terraform_plan(terraform_dir)
-    terraform_apply(terraform_dir)
+    terraform_plan(terraform_dir, refresh=refresh, parallelism=parallelism)
+    terraform_apply(terraform_dir, parallelism=parallelism)
 
     # Get outputs
     print("\n📊 Retrieving deployment information...")
@@ -202,20 +403,31 @@ def deploy_infrastructure(terraform_dir='generated-terraform'):
 
     instance_ip = outputs.get('instance_public_ip', {}).get('value')
     instance_id = outputs.get('instance_id', {}).get('value')
+    alb_dns = outputs.get('alb_dns_name', {}).get('value')
+    asg_name = outputs.get('autoscaling_group_name', {}).get('value')
     app_url = outputs.get('application_url', {}).get('value')
 
     print("\n✅ Deployment Information:")
-    print(f"   Instance ID: {instance_id}")
-    print(f"   Public IP: {instance_ip}")
+    if alb_dns:
+        print(f"   Auto Scaling Group: {asg_name}")
+        print(f"   Load Balancer: {alb_dns}")
+    else:
+        print(f"   Instance ID: {instance_id}")
+        print(f"   Public IP: {instance_ip}")
     print(f"   Application URL: {app_url}")
 
-    # Wait for instance
-    if instance_ip:
+    # A single instance only needs SSH (deploy-app.sh installs the app);
+    # behind the ALB, wait for the /health checks to pass
+    if alb_dns:
+        wait_for_instance(alb_dns, until='healthy')
+    elif instance_ip:
         wait_for_instance(instance_ip)
 
     return {
         'instance_ip': instance_ip,
         'instance_id': instance_id,
+        'alb_dns_name': alb_dns,
+        'autoscaling_group_name': asg_name,
         'app_url': app_url
     }
 
@@ -0,0 +1,105 @@
+"""
+AWS Identity - In-process STS credential check with a cached identity
+
+`aws sts get-caller-identity` starts the AWS CLI (a separate Python
+process) on every deployment. Here the same call is made with boto3 on
+one reused session, and the resolved identity is cached until shortly
+before the credentials expire, so repeated checks in a process (stack
+after stack, or a long-running service) cost a dictionary lookup.
+boto3 is imported on first use only.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+# Re-verify at least this often, even for long-lived credentials
+DEFAULT_TTL = 15 * 60
+
+# Stop trusting the cache this long before temporary credentials expire
+EXPIRY_MARGIN = 60
+
+_lock = threading.Lock()
+_session = None
+
+# access key id -> (identity, expires_at on the time.monotonic() clock)
+_identity_cache = {}
+
+
+class CallerIdentity(namedtuple('CallerIdentity', ['account', 'arn',
+                                                   'user_id'])):
+    """Result of sts:GetCallerIdentity"""
+
+    __slots__ = ()
+
+
+class CredentialsError(Exception):
+    """No usable AWS credentials (missing, expired or rejected)"""
+
+
+def get_session():
+    """The process-wide boto3 session (created on first use)"""
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+            _session = boto3.session.Session()
+        return _session
+
+
+def _seconds_until_expiry(credentials):
+    """Seconds left on temporary credentials, None if they do not expire"""
+    expiry = getattr(credentials, '_expiry_time', None)
+    if expiry is None:
+        return None
+    return expiry.timestamp() - time.time()
+
+
+def caller_identity(session=None, ttl=DEFAULT_TTL, client=None):
+    """
+    Resolve the caller's AWS identity, cached per access key
+
+    Args:
+        session: boto3 session to use (default: the shared one)
+        ttl (float): Longest time to reuse a verified identity; shortened
+            to the remaining lifetime of temporary credentials
+        client: STS client to call (default: one from the session)
+
+    Returns:
+        CallerIdentity: The account, ARN and user id
+
+    Raises:
+        CredentialsError: When no credentials are found or STS rejects them
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    session = session or get_session()
+    credentials = session.get_credentials()
+    if credentials is None:
+        raise CredentialsError("No AWS credentials found")
+
+    access_key = credentials.access_key
+    now = time.monotonic()
+    cached = _identity_cache.get(access_key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    try:
+        client = client or session.client('sts')
+        response = client.get_caller_identity()
+    except (BotoCoreError, ClientError) as e:
+        raise CredentialsError(str(e)) from e
+
+    identity = CallerIdentity(response['Account'], response['Arn'],
+                              response['UserId'])
+    remaining = _seconds_until_expiry(credentials)
+    if remaining is not None:
+        ttl = min(ttl, remaining - EXPIRY_MARGIN)
+    if ttl > 0:
+        _identity_cache[access_key] = (identity, now + ttl)
+    return identity
+
+
+def clear_cache():
+    """Forget verified identities (e.g. after changing credentials)"""
+    _identity_cache.clear()
@@ -0,0 +1,283 @@
+"""
+Capacity Planner - Sizes EC2 and RDS from load hints in a request
+
+Extracts numeric load requirements (requests/sec, concurrent users,
+dataset size, write rate) from the request text and picks the cheapest
+instance type/count and RDS class, storage type and IOPS that serve them
+at the target utilization, using the catalogs in configs/config.yaml.
+"""
+
+import math
+import os
+import re
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+
+DEFAULT_CONFIG_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'configs',
+    'config.yaml'
+))
+
+_NUMBER = r'(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|m|million)?'
+_DIGIT = re.compile(r'\d')
+_MULTIPLIERS = {'k': 1_000, 'thousand': 1_000, 'm': 1_000_000,
+                'million': 1_000_000}
+
+# "5000 users", "5,000 concurrent users", "10k active users", "2 million users"
+_USERS_PATTERN = re.compile(
+    r'\b' + _NUMBER
+    + r'(?:\s+(?:concurrent|simultaneous|active|daily|online))?\s+users?\b'
+)
+# "2000 rps", "1.5k req/s", "300 requests per second", "600 requests/minute"
+_RPS_PATTERN = re.compile(
+    r'\b' + _NUMBER + r'\s*(?:(rps|qps|req/s)\b|'
+    r'(?:requests?|queries|hits)\s*(?:per|/|a)\s*(second|sec|s|minute|min)\b)'
+)
+# "500 gb", "2 tb of data", "1.5 tib dataset"
+_SIZE_PATTERN = re.compile(r'\b(\d[\d,]*(?:\.\d+)?)\s*(mb|gb|gib|tb|tib)\b')
+_SIZE_GB = {'mb': 1 / 1024, 'gb': 1, 'gib': 1, 'tb': 1024, 'tib': 1024}
+# "200 writes/sec", "1k inserts per second", "500 tps"
+_WRITES_PATTERN = re.compile(
+    r'\b' + _NUMBER + r'\s*(?:writes?|inserts?|updates?|transactions?|tps)\b'
+    r'(?:\s*(?:per|/|a)\s*(second|sec|s|minute|min)\b)?'
+)
+
+
+class LoadProfile(namedtuple('LoadProfile',
+                             ['rps', 'users', 'dataset_gb', 'writes_per_sec'],
+                             defaults=[0, 0, 0, 0])):
+    """Load requirements stated in a request (0 = not mentioned)"""
+
+    __slots__ = ()
+
+    @property
+    def has_hints(self):
+        return any(self)
+
+
+_NO_LOAD = LoadProfile()
+
+
+class CapacityPlan(namedtuple('CapacityPlan', [
+        'required_rps', 'instance_type', 'instance_count',
+        'instance_headroom', 'db_instance_class', 'db_storage_gb',
+        'db_storage_type', 'db_iops', 'db_headroom'])):
+    """
+    Sizing decision for a LoadProfile
+
+    `*_headroom` is the spare fraction of capacity at the stated load
+    (1 - load / capacity); it goes negative when even the largest option
+    in the catalog is too small.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self):
+        return self._asdict()
+
+
+def _amount(number, unit):
+    return float(number.replace(',', '')) * _MULTIPLIERS.get(unit, 1)
+
+
+def extract_load(user_input):
+    """
+    Extract the load hints from a request
+
+    Args:
+        user_input (str): Natural language request
+
+    Returns:
+        LoadProfile: Largest value of each hint mentioned in the request
+    """
+    text = user_input.lower()
+    # Every hint starts with a number: most requests state none
+    if _DIGIT.search(text) is None:
+        return _NO_LOAD
+
+    users = 0
+    for number, unit in _USERS_PATTERN.findall(text):
+        users = max(users, int(_amount(number, unit)))
+
+    rps = 0.0
+    for number, unit, short, per in _RPS_PATTERN.findall(text):
+        value = _amount(number, unit)
+        rps = max(rps, value / 60 if per in ('minute', 'min') else value)
+
+    dataset_gb = 0.0
+    for number, unit in _SIZE_PATTERN.findall(text):
+        dataset_gb = max(dataset_gb, float(number.replace(',', ''))
+                         * _SIZE_GB[unit])
+
+    writes = 0.0
+    for number, unit, per in _WRITES_PATTERN.findall(text):
+        value = _amount(number, unit)
+        writes = max(writes, value / 60 if per in ('minute', 'min') else value)
+
+    return LoadProfile(rps=round(rps, 2), users=min(users, 10 ** 9),
+                       dataset_gb=round(dataset_gb, 2),
+                       writes_per_sec=round(writes, 2))
+
+
+@lru_cache(maxsize=8)
+def load_config(path=DEFAULT_CONFIG_PATH):
+    """
+    Load the project config (PyYAML is imported on first use only)
+
+    Raises:
+        ImportError: If PyYAML is not installed
+        OSError: If the config file cannot be read
+    """
+    import yaml
+
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+@lru_cache(maxsize=8)
+def config_fingerprint(path=DEFAULT_CONFIG_PATH):
+    """Checksum of the config file, so cached plans follow catalog edits"""
+    try:
+        with open(path, 'rb') as f:
+            return format(zlib.crc32(f.read()), '08x')
+    except OSError:
+        return 'missing'
+
+
+def _sustained(spec, per_vcpu):
+    """Throughput a catalog entry sustains (burstable: at its CPU baseline)"""
+    share = spec['baseline'] if spec.get('burstable') else 1.0
+    return spec['vcpu'] * per_vcpu * share
+
+
+def _instance_rps(spec, model):
+    """Requests/sec an instance sustains - CPU or network bound"""
+    network = (spec['network_gbps'] * 1e9 / 8) / (model['response_kb'] * 1024)
+    return min(_sustained(spec, model['rps_per_vcpu']), network)
+
+
+def _plan_instances(required_rps, autoscaling, config):
+    model = config['capacity']['model']
+    catalog = config['capacity']['instance_catalog']
+    min_count = model['min_scaled_instances'] if autoscaling else 1
+
+    if not required_rps:
+        return config['aws']['instance_types']['small'], min_count, 1.0
+
+    target = model['target_utilization']
+    options = []
+    for name, spec in catalog.items():
+        capacity = _instance_rps(spec, model)
+        count = max(min_count, math.ceil(required_rps / (capacity * target)))
+        if count <= model['max_instances']:
+            # Equal cost (common - prices scale with vCPUs): fewer instances
+            cost = round(count * spec['hourly_usd'], 4)
+            options.append((cost, count, name, capacity))
+
+    best = min(options, default=None)
+    if best is None:
+        # Nothing fits under max_instances: the largest type, maxed out
+        name, spec = max(catalog.items(),
+                         key=lambda item: _instance_rps(item[1], model))
+        best = (0, model['max_instances'], name, _instance_rps(spec, model))
+
+    _, count, name, capacity = best
+    return name, count, 1 - required_rps / (count * capacity)
+
+
+def _plan_database(load, required_rps, config):
+    model = config['capacity']['model']
+    catalog = config['capacity']['database_catalog']
+    target = model['target_utilization']
+    working_set = load.dataset_gb * model['working_set_ratio']
+
+    def utilization(spec):
+        memory = spec['memory_gib'] * model['buffer_pool_ratio']
+        writes = _sustained(spec, model['writes_per_vcpu'])
+        reads = _sustained(spec, model['reads_per_vcpu'])
+        return max(working_set / memory, load.writes_per_sec / writes,
+                   required_rps * model['reads_per_request'] / reads)
+
+    options = [(spec['hourly_usd'], name, utilization(spec))
+               for name, spec in catalog.items()
+               if utilization(spec) <= target]
+    best = min(options, default=None)
+    if best is None:
+        # Nothing reaches the target: the class with the most headroom
+        name = min(catalog, key=lambda n: utilization(catalog[n]))
+        best = (0, name, utilization(catalog[name]))
+    _, db_class, used = best
+
+    storage_gb = max(config['database']['default_storage_gb'],
+                     math.ceil(load.dataset_gb * model['storage_growth']))
+    iops = math.ceil((load.writes_per_sec * model['iops_per_write']
+                      + required_rps * model['read_iops_per_request'])
+                     / target)
+    if iops <= model['gp3_baseline_iops']:
+        # gp3 includes a 3000 IOPS baseline at any size
+        storage_type, iops = 'gp3', 0
+    else:
+        # io1 allows at most 50 IOPS per GiB and needs at least 100 GiB
+        storage_type = 'io1'
+        iops = min(-(-iops // 1000) * 1000, model['max_iops'])
+        storage_gb = max(storage_gb, 100, -(-iops // 50))
+
+    return db_class, storage_gb, storage_type, iops, 1 - used
+
+
+@lru_cache(maxsize=1024)
+def plan_capacity(load, database_needed=False, autoscaling=False,
+                  config_path=DEFAULT_CONFIG_PATH):
+    """
+    Size the web tier and database for a load profile
+
+    Args:
+        load (LoadProfile): Load hints (see extract_load)
+        database_needed (bool): Also size an RDS instance
+        autoscaling (bool): Plan at least `min_scaled_instances` instances
+        config_path (str): YAML config holding the `capacity` section
+
+    Returns:
+        CapacityPlan: Cheapest option meeting the target utilization
+    """
+    config = load_config(config_path)
+    model = config['capacity']['model']
+    required_rps = load.rps or load.users * model['rps_per_user']
+
+    instance_type, count, headroom = _plan_instances(required_rps,
+                                                     autoscaling, config)
+    if database_needed:
+        db_class, storage_gb, storage_type, iops, db_headroom = \
+            _plan_database(load, required_rps, config)
+    else:
+        db_class = config['database']['instance_class']
+        storage_gb = config['database']['default_storage_gb']
+        storage_type, iops, db_headroom = 'gp3', 0, 1.0
+
+    return CapacityPlan(
+        required_rps=round(required_rps, 2),
+        instance_type=instance_type,
+        instance_count=count,
+        instance_headroom=round(headroom, 3),
+        db_instance_class=db_class,
+        db_storage_gb=storage_gb,
+        db_storage_type=storage_type,
+        db_iops=iops,
+        db_headroom=round(db_headroom, 3)
+    )
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from ai_parser import plan_request
+
+    # One JSON line per request - the extracted load, the resulting plan and
+    # its headroom - for tuning the model constants offline
+    for request in sys.argv[1:] or sys.stdin.read().splitlines():
+        specs, plan = plan_request(request)
+        print(json.dumps({'request': request,
+                          'load': extract_load(request)._asdict(),
+                          'plan': plan.to_dict() if plan else None}))
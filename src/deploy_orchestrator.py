@@ -0,0 +1,243 @@
+"""
+Deploy Orchestrator - Concurrent init/plan/apply across many stack directories
+
+Each stack runs the same pipeline as aws_deployer (skipping stages the
+manifest shows are current, applying the saved plan), but as asyncio
+subprocesses so up to `max_concurrency` stacks progress at once. Output
+goes to a log file per stack instead of the console, approval comes from
+a policy instead of input(), and a failing stack never stops the others.
+"""
+
+import asyncio
+import os
+import time
+from collections import namedtuple
+
+try:
+    from .aws_deployer import (apply_command, finish_apply, init_is_current,
+                               plan_command, plan_is_current)
+    from .terraform_events import ResourceTimeline, record_timeline
+    from .terraform_manifest import mark_stage
+    from .terraform_providers import (seed_lock_file, share_lock_file,
+                                      terraform_env)
+except ImportError:
+    from aws_deployer import (apply_command, finish_apply, init_is_current,
+                              plan_command, plan_is_current)
+    from terraform_events import ResourceTimeline, record_timeline
+    from terraform_manifest import mark_stage
+    from terraform_providers import (seed_lock_file, share_lock_file,
+                                     terraform_env)
+
+LOG_NAME = 'deploy.log'
+
+# `terraform plan -detailed-exitcode`: 0 = no changes, 2 = changes
+_PLAN_NO_CHANGES, _PLAN_CHANGES = 0, 2
+
+
+class StackOutcome(namedtuple('StackOutcome', [
+        'stack', 'status', 'durations', 'log_path', 'error'])):
+    """
+    Result of deploying one stack
+
+    status: 'applied', 'unchanged' (nothing to apply), 'planned' (not
+    approved) or 'failed'. durations maps each stage that ran to seconds.
+    """
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return sum(self.durations.values())
+
+
+def approve_all(stack):
+    return True
+
+
+def approve_none(stack):
+    return False
+
+
+APPROVAL_POLICIES = {'all': approve_all, 'none': approve_none}
+
+
+class StageFailed(Exception):
+    """A terraform command exited non-zero"""
+
+
+async def _terraform(command, cwd, log, env):
+    """Run one terraform command, appending its output to the stack log"""
+    log.write(f"$ {' '.join(command)}\n")
+    log.flush()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=cwd, env=env, stdin=asyncio.subprocess.DEVNULL,
+        stdout=log, stderr=asyncio.subprocess.STDOUT
+    )
+    return await process.wait()
+
+
+def _record_apply_timings(stack, log_path, offset):
+    """Add the resource timings of the apply logged after `offset`"""
+    timeline = ResourceTimeline()
+    with open(log_path) as f:
+        f.seek(offset)
+        for _ in timeline.feed_lines(f):
+            pass
+    record_timeline(timeline, stack=stack)
+
+
+async def _deploy_stack(stack, terraform_dir, log_path, approve, env,
+                        init_lock, refresh, parallelism):
+    durations = {}
+
+    async def stage(name, command, ok_codes=(0,)):
+        start = time.perf_counter()
+        code = await _terraform(command, terraform_dir, log, env)
+        durations[name] = round(time.perf_counter() - start, 3)
+        if code not in ok_codes:
+            raise StageFailed(f"{name} exited with status {code}")
+        return code
+
+    with open(log_path, 'a') as log:
+        try:
+            if not init_is_current(terraform_dir):
+                # The plugin cache is not safe for concurrent installs, so
+                # inits take turns (they are quick once the cache is warm)
+                async with init_lock:
+                    seed_lock_file(terraform_dir)
+                    await stage('init', ['terraform', 'init', '-input=false'])
+                    share_lock_file(terraform_dir)
+                mark_stage(terraform_dir, 'initialized', 'providers_hash')
+
+            if not plan_is_current(terraform_dir):
+                code = await stage(
+                    'plan',
+                    plan_command(refresh, parallelism) + ['-detailed-exitcode'],
+                    ok_codes=(_PLAN_NO_CHANGES, _PLAN_CHANGES)
+                )
+                mark_stage(terraform_dir, 'planned')
+                if code == _PLAN_NO_CHANGES:
+                    finish_apply(terraform_dir)
+                    return StackOutcome(stack, 'unchanged', durations,
+                                        log_path, None)
+
+            if not approve(stack):
+                log.write("Apply not approved by policy\n")
+                return StackOutcome(stack, 'planned', durations, log_path,
+                                    None)
+
+            log.flush()
+            apply_offset = os.path.getsize(log_path)
+            await stage('apply', apply_command(terraform_dir, parallelism))
+            finish_apply(terraform_dir)
+            _record_apply_timings(stack, log_path, apply_offset)
+            return StackOutcome(stack, 'applied', durations, log_path, None)
+
+        except (StageFailed, OSError) as e:
+            log.write(f"Failed: {e}\n")
+            return StackOutcome(stack, 'failed', durations, log_path, str(e))
+
+
+async def deploy_stacks_async(stacks, max_concurrency=4, approve='all',
+                              refresh=True, parallelism=None, mirror_dir=None,
+                              log_dir=None):
+    """
+    Deploy many stack directories concurrently
+
+    Args:
+        stacks (dict or iterable): Stack name -> directory, or directories
+            (named after their basename)
+        max_concurrency (int): Stacks running terraform at the same time
+        approve (str or callable): 'all', 'none' (plan only), or a function
+            taking the stack name and returning whether to apply
+        refresh (bool): Refresh state while planning
+        parallelism (int): Terraform -parallelism for plan/apply
+        mirror_dir (str): Local provider mirror for offline init
+        log_dir (str): Directory for `<stack>.log` files (default: a
+            deploy.log inside each stack directory)
+
+    Returns:
+        list: StackOutcome per stack, in input order
+
+    Raises:
+        ValueError: If two directories share a basename
+    """
+    if not isinstance(stacks, dict):
+        named = {}
+        for terraform_dir in stacks:
+            stack = os.path.basename(os.path.normpath(terraform_dir))
+            if stack in named:
+                raise ValueError(f"Duplicate stack name {stack!r}: "
+                                 f"{named[stack]} and {terraform_dir}")
+            named[stack] = terraform_dir
+        stacks = named
+    if not callable(approve):
+        approve = APPROVAL_POLICIES[approve]
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    env = terraform_env(mirror_dir)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    init_lock = asyncio.Lock()
+
+    async def bounded(stack, terraform_dir):
+        log_path = (os.path.join(log_dir, f'{stack}.log') if log_dir
+                    else os.path.join(terraform_dir, LOG_NAME))
+        async with semaphore:
+            return await _deploy_stack(stack, terraform_dir, log_path,
+                                       approve, env, init_lock, refresh,
+                                       parallelism)
+
+    return await asyncio.gather(*(bounded(stack, terraform_dir)
+                                  for stack, terraform_dir in stacks.items()))
+
+
+def deploy_stacks(stacks, **options):
+    """Blocking wrapper around deploy_stacks_async (same arguments)"""
+    return asyncio.run(deploy_stacks_async(stacks, **options))
+
+
+def format_summary(outcomes):
+    """Fixed-width table of stack outcomes and stage durations"""
+    rows = [('STACK', 'STATUS', 'INIT', 'PLAN', 'APPLY', 'TOTAL', 'LOG')]
+    for outcome in outcomes:
+        times = [outcome.durations.get(stage) for stage in
+                 ('init', 'plan', 'apply')]
+        rows.append((outcome.stack, outcome.status,
+                     *('-' if t is None else f'{t:.1f}s' for t in times),
+                     f'{outcome.duration:.1f}s', outcome.log_path))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths))
+        + '  ' + row[-1]
+        for row in rows
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Deploy many generated Terraform directories concurrently")
+    parser.add_argument('stack_dirs', nargs='+')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--approve', choices=sorted(APPROVAL_POLICIES),
+                        default='none',
+                        help="apply without prompting ('all') or plan only")
+    parser.add_argument('--no-refresh', action='store_true')
+    parser.add_argument('--parallelism', type=int)
+    parser.add_argument('--log-dir')
+    args = parser.parse_args()
+
+    try:
+        outcomes = deploy_stacks(args.stack_dirs,
+                                 max_concurrency=args.concurrency,
+                                 approve=args.approve,
+                                 refresh=not args.no_refresh,
+                                 parallelism=args.parallelism,
+                                 log_dir=args.log_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_summary(outcomes))
+    sys.exit(1 if any(o.status == 'failed' for o in outcomes) else 0)
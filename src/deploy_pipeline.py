@@ -0,0 +1,103 @@
+"""
+Deploy Pipeline - From a plain-English request to a running stack
+
+Parse -> generate -> deploy, overlapped where the stages are independent:
+the provider requirements (the `terraform {}` block) do not depend on the
+request, so a provider-only configuration is written and `terraform init`
+starts in the background right away, next to the AWS credential check.
+Parsing and rendering run meanwhile; the full configuration is written
+once init finishes, then plan and apply follow as in aws_deployer.
+
+If the parsed request turns out to need other providers, the manifest's
+providers hash changes and the regular init step re-initializes. A
+directory that already holds a generated configuration keeps it: init
+starts on those files instead of a provider-only copy.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .ai_parser import parse_infrastructure_request
+    from .aws_deployer import (deploy_infrastructure, init_is_current,
+                               resolve_credentials, terraform_init)
+    from .infra_spec import InfraSpec
+    from .terraform_generator import (generate_terraform_code, providers_hash,
+                                      render_config, write_provider_config)
+    from .terraform_manifest import read_manifest
+except ImportError:
+    from ai_parser import parse_infrastructure_request
+    from aws_deployer import (deploy_infrastructure, init_is_current,
+                              resolve_credentials, terraform_init)
+    from infra_spec import InfraSpec
+    from terraform_generator import (generate_terraform_code, providers_hash,
+                                     render_config, write_provider_config)
+    from terraform_manifest import read_manifest
+
+
+def start_init(pool, output_dir, split=True, fmt='hcl'):
+    """
+    Begin `terraform init` in the background for the provider requirements,
+    unless the directory is already initialized for them
+
+    Returns:
+        Future or None: The running init
+    """
+    specs = InfraSpec()
+    if (init_is_current(output_dir) and read_manifest(output_dir)
+            .get('providers_hash') == providers_hash(specs)):
+        return None
+    write_provider_config(specs, output_dir, split, fmt)
+    return pool.submit(terraform_init, output_dir, quiet=True)
+
+
+def deploy_request(request, output_dir='generated-terraform', split=True,
+                   fmt='hcl', refresh=True, parallelism=None,
+                   parse=parse_infrastructure_request):
+    """
+    Parse, generate and deploy one request, overlapping init and the
+    credential check with parsing and generation
+
+    Args:
+        request (str): Infrastructure request in plain English
+        output_dir (str): Directory for the generated Terraform
+        split (bool): Per-concern files (True) or a single main.tf (False)
+        fmt (str): 'hcl' or 'json' (main.tf.json)
+        refresh (bool): Refresh state while planning
+        parallelism (int): Concurrent Terraform operations for plan/apply
+        parse (callable): Request -> InfraSpec
+
+    Returns:
+        dict: Deployment information (see deploy_infrastructure)
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        credentials = pool.submit(resolve_credentials)
+        init = start_init(pool, output_dir, split, fmt)
+        if init is not None:
+            print("🔧 terraform init started in the background\n")
+
+        print("🧠 STEP 1: Analyzing request...\n")
+        specs = parse(request)
+        # Rendering is cached, so the write below reuses this work
+        render_config(specs, split, fmt)
+        prepared = time.perf_counter() - start
+
+        if init is not None:
+            init.result()
+            waited = time.perf_counter() - start - prepared
+            print(f"\n✅ Terraform initialized in the background "
+                  f"(waited {waited:.1f}s after {prepared:.1f}s of "
+                  f"parsing and rendering)")
+
+        print("\n" + "=" * 60)
+        print("\n📝 STEP 2: Generating Terraform code...\n")
+        generate_terraform_code(specs, output_dir=output_dir, split=split,
+                                fmt=fmt)
+
+        result = deploy_infrastructure(output_dir, refresh=refresh,
+                                       parallelism=parallelism,
+                                       credentials=credentials)
+
+    print(f"\n⏱️  Request to running stack: {time.perf_counter() - start:.1f}s")
+    return result
@@ -0,0 +1,366 @@
+"""
+Generation Service - Parse -> generate over HTTP for many callers
+
+A long-running process keeps what main.py rebuilds per run warm: the
+parser tables, the capacity config and the render caches. Jobs run on a
+bounded thread pool:
+
+- identical requests in flight at the same time (same normalized text,
+  parser, format and layout) share one computation and one job id
+- finished jobs stay in memory (LRU, at most `max_jobs`, for `job_ttl`
+  seconds): repeats and GET /v1/jobs/<id> are answered without work,
+  from response bytes serialized once
+- at most `max_pending` jobs queue or run; beyond that POST /v1/generate
+  answers 503 with Retry-After instead of queueing without bound
+
+Nothing is written to disk - the rendered files are in the response.
+
+API:
+    POST /v1/generate   {"request": "...", "parser": "keyword"|"ollama",
+                         "format": "hcl"|"json", "split": true, "wait": 10}
+                        200 with the files when done within `wait`
+                        seconds, else 202 with the job id (Location header)
+    GET /v1/jobs/<id>   200 done, 202 pending, 500 failed, 404 unknown
+    GET /health         status and job counters
+
+Serve with `python main.py --serve`, or in production with Gunicorn -
+one process, since job ids are only known to the process that made them:
+
+    WEB_WORKERS=1 WEB_THREADS=32 gunicorn -c docker/gunicorn.conf.py \\
+        'src.generation_service:create_app()'
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .ai_parser import (get_ollama_client, keyword_parser_version,
+                            llm_parser_version, parse_with_ollama,
+                            plan_request)
+    from .parse_cache import normalize_request
+    from .terraform_generator import render_config
+    from .terraform_manifest import content_hash
+except ImportError:
+    from ai_parser import (get_ollama_client, keyword_parser_version,
+                           llm_parser_version, parse_with_ollama,
+                           plan_request)
+    from parse_cache import normalize_request
+    from terraform_generator import render_config
+    from terraform_manifest import content_hash
+
+PARSERS = ('keyword', 'ollama')
+FORMATS = ('hcl', 'json')
+
+# Longest request text accepted (characters)
+MAX_REQUEST_LENGTH = 2000
+
+# Seconds POST /v1/generate waits for the result by default, and at most
+# (below the server's worker timeout)
+DEFAULT_WAIT = float(os.environ.get('SERVICE_WAIT', '10'))
+MAX_WAIT = 25.0
+
+JOB_TTL = 300.0
+MAX_JOBS = 4096
+
+
+class ServiceBusy(Exception):
+    """Raised when `max_pending` jobs are already queued or running"""
+
+
+class Job:
+    """
+    One generation; every request coalesced into it shares the result
+
+    `body` holds the finished job's JSON response bytes.
+    """
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'pending'
+        self.body = None
+        self.error = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Block until the job finished; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def _finish(self, status, body=None, error=None):
+        self.body, self.error = body, error
+        self.finished_at = time.monotonic()
+        self.status = status
+        self._done.set()
+
+
+def _parse(request, parser):
+    if parser == 'ollama':
+        # Falls back to the keyword parser when Ollama is unavailable
+        return parse_with_ollama(request)
+    return plan_request(request)[0]
+
+
+def _parser_version(parser):
+    if parser == 'ollama':
+        try:
+            return llm_parser_version(get_ollama_client().model)
+        except ImportError:
+            pass  # parse_with_ollama falls back to the keyword parser too
+    return keyword_parser_version()
+
+
+def generate(request, parser='keyword', fmt='hcl', split=True):
+    """
+    Parse a request and render its configuration (no file or console I/O)
+
+    Returns:
+        dict: 'specs', 'files' (name -> contents) and 'config_hash' - the
+        hash the manifest records when these files are written
+    """
+    specs = _parse(request, parser)
+    files = render_config(specs, split, fmt)
+    digests = ''.join(f'{name}\0{content_hash(files[name])}\0'
+                      for name in sorted(files))
+    return {'specs': specs.to_dict(), 'files': files,
+            'config_hash': content_hash(digests)}
+
+
+class GenerationService:
+    """
+    Bounded, coalescing job runner for generate()
+
+    Args:
+        max_workers (int): Pool threads (SERVICE_WORKERS, default CPUs + 4,
+            at most 32 - Ollama calls wait on I/O)
+        max_pending (int): Jobs queued or running before submit() raises
+            ServiceBusy (SERVICE_MAX_PENDING, default 64 per worker)
+        job_ttl (float): Seconds a finished job is reused and retrievable
+        max_jobs (int): Jobs kept in memory (least recently used go first)
+        work (callable): (request, parser, fmt, split) -> result dict
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, job_ttl=JOB_TTL,
+                 max_jobs=MAX_JOBS, work=generate):
+        if max_workers is None:
+            max_workers = int(os.environ.get('SERVICE_WORKERS')
+                              or min(32, (os.cpu_count() or 1) + 4))
+        if max_pending is None:
+            max_pending = int(os.environ.get('SERVICE_MAX_PENDING')
+                              or 64 * max_workers)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.work = work
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool = None
+        self.stats = {'submitted': 0, 'computed': 0, 'coalesced': 0,
+                      'reused': 0, 'rejected': 0, 'failed': 0}
+        # A server may fork after import (Gunicorn preload): pool threads
+        # do not survive the fork, so workers start their own
+        os.register_at_fork(after_in_child=self._forget_pool)
+
+    def _forget_pool(self):
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_id(request, parser='keyword', fmt='hcl', split=True):
+        """
+        Deterministic id of a job - equal for requests that coalesce
+
+        Keyed like the parse cache (see normalize_request): requests
+        stating different load never share a job, and Ollama jobs are
+        keyed on the model's parser version (see llm_parser_version).
+        """
+        key = (_parser_version(parser), normalize_request(request), parser,
+               fmt, bool(split))
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:20]
+
+    def _lookup(self, job_id):
+        # Caller holds the lock
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if (job.finished_at is not None
+                and time.monotonic() - job.finished_at > self.job_ttl):
+            del self._jobs[job_id]
+            return None
+        self._jobs.move_to_end(job_id)
+        return job
+
+    def _evict(self):
+        # Caller holds the lock. Least recently used finished jobs go;
+        # pending ones stay (their callers are waiting for them)
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        stale = []
+        for job_id, job in self._jobs.items():
+            if job.status != 'pending':
+                stale.append(job_id)
+                if len(stale) == excess:
+                    break
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    def submit(self, request, parser='keyword', fmt='hcl', split=True):
+        """
+        Start a job, or join the identical one in flight or finished
+
+        Returns:
+            Job: The job computing (or holding) the result
+
+        Raises:
+            ServiceBusy: If `max_pending` jobs are already queued or running
+        """
+        job_id = self.job_id(request, parser, fmt, split)
+        with self._lock:
+            self.stats['submitted'] += 1
+            job = self._lookup(job_id)
+            # A failed job is retried by the next identical request
+            if job is not None and job.status != 'failed':
+                self.stats['coalesced' if job.status == 'pending'
+                           else 'reused'] += 1
+                return job
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise ServiceBusy(f"{self._pending} jobs pending")
+            job = self._jobs[job_id] = Job(job_id)
+            self._pending += 1
+            self._evict()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='generate')
+            pool = self._pool
+        pool.submit(self._run, job, request, parser, fmt, split)
+        return job
+
+    def _run(self, job, request, parser, fmt, split):
+        try:
+            result = self.work(request, parser, fmt, split)
+            body = json.dumps({'job_id': job.id, 'status': 'done', **result},
+                              separators=(',', ':')).encode()
+        except Exception as exc:
+            job._finish('failed', error=f"{type(exc).__name__}: {exc}")
+        else:
+            job._finish('done', body)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.stats['failed' if job.status == 'failed'
+                           else 'computed'] += 1
+
+    def get(self, job_id):
+        """The job with this id, or None if unknown or expired"""
+        with self._lock:
+            return self._lookup(job_id)
+
+    def counters(self):
+        """Job counters plus the current number of pending and kept jobs"""
+        with self._lock:
+            return dict(self.stats, pending=self._pending,
+                        jobs=len(self._jobs))
+
+
+def read_options(payload):
+    """
+    Validate a POST /v1/generate body
+
+    Returns:
+        tuple: (request, parser, fmt, split, wait)
+
+    Raises:
+        ValueError: With a message for the client
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object")
+    request = payload.get('request')
+    if not isinstance(request, str) or not request.strip():
+        raise ValueError("'request' must be a non-empty string")
+    if len(request) > MAX_REQUEST_LENGTH:
+        raise ValueError(f"'request' is longer than {MAX_REQUEST_LENGTH} "
+                         f"characters")
+    parser = payload.get('parser', 'keyword')
+    if parser not in PARSERS:
+        raise ValueError(f"'parser' must be one of {', '.join(PARSERS)}")
+    fmt = payload.get('format', 'hcl')
+    if fmt not in FORMATS:
+        raise ValueError(f"'format' must be one of {', '.join(FORMATS)}")
+    split = payload.get('split', True)
+    if not isinstance(split, bool):
+        raise ValueError("'split' must be true or false")
+    wait = payload.get('wait', DEFAULT_WAIT)
+    if (isinstance(wait, bool) or not isinstance(wait, (int, float))
+            or wait < 0):
+        raise ValueError("'wait' must be a number of seconds")
+    return request, parser, fmt, split, min(float(wait), MAX_WAIT)
+
+
+def create_app(service=None):
+    """
+    Build the Flask app serving a GenerationService
+
+    Args:
+        service (GenerationService): Default: one configured from the
+            environment
+
+    Returns:
+        Flask: The app (the service is app.extensions['generation'])
+    """
+    from flask import Flask, Response, request
+
+    service = service or GenerationService()
+    app = Flask(__name__)
+    app.extensions['generation'] = service
+
+    def reply(status, payload, headers=None):
+        return Response(json.dumps(payload, separators=(',', ':')),
+                        status=status, mimetype='application/json',
+                        headers=headers)
+
+    def job_response(job):
+        if job.status == 'done':
+            return Response(job.body, mimetype='application/json')
+        if job.status == 'failed':
+            return reply(500, {'job_id': job.id, 'status': 'failed',
+                               'error': job.error})
+        return reply(202, {'job_id': job.id, 'status': 'pending'},
+                     {'Location': f'/v1/jobs/{job.id}'})
+
+    @app.post('/v1/generate')
+    def generate_endpoint():
+        try:
+            text, parser, fmt, split, wait = read_options(
+                request.get_json(silent=True))
+        except ValueError as exc:
+            return reply(400, {'error': str(exc)})
+        try:
+            job = service.submit(text, parser, fmt, split)
+        except ServiceBusy as exc:
+            return reply(503, {'error': f"busy: {exc}"}, {'Retry-After': '1'})
+        if wait:
+            job.wait(wait)
+        return job_response(job)
+
+    @app.get('/v1/jobs/<job_id>')
+    def job_endpoint(job_id):
+        job = service.get(job_id)
+        if job is None:
+            return reply(404, {'error': f"unknown job {job_id}"})
+        return job_response(job)
+
+    @app.get('/health')
+    def health():
+        return reply(200, {'status': 'healthy', 'jobs': service.counters()})
+
+    return app
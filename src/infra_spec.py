@@ -0,0 +1,123 @@
+"""
+Infrastructure Spec - Typed, immutable result of parsing a request
+"""
+
+import struct
+from collections import namedtuple
+
+DATABASE_TYPES = ('none', 'postgres', 'mysql')
+APP_TYPES = ('web', 'api')
+
+# Field name -> (type, default), in storage order
+SPEC_FIELDS = {
+    'instance_type': (str, 't2.micro'),
+    'database_needed': (bool, False),
+    'database_type': (str, 'none'),
+    'region': (str, 'us-east-1'),
+    'app_type': (str, 'web'),
+    'expected_users': (int, 0),
+    'autoscaling': (bool, False),
+    'min_size': (int, 1),
+    'max_size': (int, 1),
+    'db_instance_class': (str, 'db.t3.micro'),
+    'db_storage_gb': (int, 20),
+    'db_storage_type': (str, 'gp3'),
+    'db_iops': (int, 0),
+}
+
+# Fields stored as a one-byte index into their table in the binary form
+_CODED_FIELDS = {
+    'database_type': DATABASE_TYPES,
+    'app_type': APP_TYPES,
+}
+
+_BINARY_VERSION = 3
+
+
+class InfraSpec(namedtuple('InfraSpec', SPEC_FIELDS,
+                           defaults=[d for _, d in SPEC_FIELDS.values()])):
+    """
+    Parsed infrastructure specification
+
+    An immutable tuple with named fields and no per-instance __dict__:
+    hashable (usable as a cache/dedup key), cheap to compare and much
+    smaller than the equivalent dict. Built on namedtuple rather than a
+    dataclass to keep `dataclasses`/`inspect` off the CLI startup path.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a spec from a specs dict, ignoring unknown keys"""
+        return cls(**{k: v for k, v in data.items() if k in SPEC_FIELDS})
+
+    @classmethod
+    def coerce(cls, specs):
+        """Accept an InfraSpec or a legacy specs dict"""
+        return specs if isinstance(specs, cls) else cls.from_dict(specs)
+
+    def to_dict(self):
+        return self._asdict()
+
+    def to_json(self):
+        """Compact JSON (no whitespace)"""
+        import json
+
+        return json.dumps(self._asdict(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        import json
+
+        return cls.from_dict(json.loads(text))
+
+    def to_bytes(self):
+        """
+        Compact binary form: a version byte, then each field in order -
+        bools as one byte, coded fields as a one-byte table index, ints as
+        uint32 and other strings as UTF-8 behind a one-byte length
+
+        Raises:
+            ValueError: If a string field is longer than 255 bytes, or a
+                coded field holds a value outside its table
+        """
+        parts = [bytes([_BINARY_VERSION])]
+        for name, value in zip(self._fields, self):
+            field_type = SPEC_FIELDS[name][0]
+            if name in _CODED_FIELDS:
+                parts.append(bytes([_CODED_FIELDS[name].index(value)]))
+            elif field_type is bool:
+                parts.append(bytes([value]))
+            elif field_type is int:
+                parts.append(struct.pack('<I', value))
+            else:
+                data = value.encode()
+                if len(data) > 255:
+                    raise ValueError(f"{name} is too long for the binary "
+                                     f"form ({len(data)} bytes, at most 255)")
+                parts.append(bytes([len(data)]) + data)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[0] != _BINARY_VERSION:
+            raise ValueError(f"Unsupported InfraSpec binary version: {data[0]}")
+
+        values = []
+        offset = 1
+        for name, (field_type, _) in SPEC_FIELDS.items():
+            if name in _CODED_FIELDS:
+                values.append(_CODED_FIELDS[name][data[offset]])
+                offset += 1
+            elif field_type is bool:
+                values.append(bool(data[offset]))
+                offset += 1
+            elif field_type is int:
+                values.append(struct.unpack_from('<I', data, offset)[0])
+                offset += 4
+            else:
+                length = data[offset]
+                values.append(data[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+        return cls._make(values)
@@ -0,0 +1,162 @@
+"""
+Ollama Client - Pooled HTTP client for a local Ollama server
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = 'http://localhost:11434'
+DEFAULT_MODEL = 'llama3.2'
+
+
+class OllamaUnavailable(Exception):
+    """Raised when Ollama cannot serve a request (down, slow or circuit open)"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed    -> calls go through; `failure_threshold` failures in a row open it
+    open      -> calls are rejected until `reset_timeout` seconds have passed
+    half-open -> one trial call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class OllamaClient:
+    """
+    Thread-safe Ollama client built on one keep-alive requests.Session
+
+    Args:
+        base_url (str): Ollama server URL
+        model (str): Model name passed to /api/generate
+        timeout (float): Per-call timeout for generate requests (seconds)
+        pool_size (int): Max pooled connections, i.e. calls in flight
+        health_ttl (float): How long a /api/tags probe result is reused
+        breaker (CircuitBreaker): Breaker guarding generate calls
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, model=DEFAULT_MODEL, timeout=20.0,
+                 pool_size=16, health_ttl=10.0, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.health_ttl = health_ttl
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._health = None
+        self._health_checked_at = 0.0
+        self._health_lock = threading.Lock()
+
+    def is_healthy(self, force=False):
+        """Return the cached health status, probing /api/tags when stale"""
+        with self._health_lock:
+            now = time.monotonic()
+            if (not force and self._health is not None
+                    and now - self._health_checked_at < self.health_ttl):
+                return self._health
+
+            try:
+                response = self.session.get(f'{self.base_url}/api/tags',
+                                            timeout=2)
+                self._health = response.status_code == 200
+            except requests.RequestException:
+                self._health = False
+            self._health_checked_at = now
+            return self._health
+
+    def _mark_unhealthy(self):
+        with self._health_lock:
+            self._health = False
+            self._health_checked_at = time.monotonic()
+
+    def generate(self, prompt, timeout=None, **options):
+        """
+        Send a non-streaming /api/generate request
+
+        Returns:
+            str: The model's response text
+
+        Raises:
+            OllamaUnavailable: If the breaker is open, the server is down,
+                the call times out or returns an error status
+        """
+        if not self.breaker.allow():
+            raise OllamaUnavailable('circuit open')
+        if not self.is_healthy():
+            self.breaker.record_failure()
+            raise OllamaUnavailable('ollama not running')
+
+        payload = {'model': self.model, 'prompt': prompt, 'stream': False}
+        payload.update(options)
+        try:
+            response = self.session.post(
+                f'{self.base_url}/api/generate',
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+            response.raise_for_status()
+            text = response.json()['response']
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.breaker.record_failure()
+            if isinstance(e, requests.ConnectionError):
+                self._mark_unhealthy()
+            raise OllamaUnavailable(str(e)) from e
+
+        self.breaker.record_success()
+        return text
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,164 @@
+"""
+Parse Cache - Two-tier (memory LRU + SQLite) cache for parsed requests
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .infra_spec import InfraSpec
+except ImportError:
+    from infra_spec import InfraSpec
+
+# Filler words that never change how a request is parsed
+STOPWORDS = frozenset([
+    'a', 'an', 'the', 'i', 'we', 'me', 'my', 'our', 'need', 'want', 'would',
+    'like', 'please', 'can', 'you', 'create', 'make', 'build', 'set', 'up',
+    'with', 'and', 'for', 'to', 'of', 'on', 'in', 'some', 'just',
+])
+
+# Punctuation, except '/' ("req/s") and '.' or ',' inside a number
+# ("1.5k", "5,000") - the load hints read them
+_PUNCTUATION = re.compile(r'(?:[^\w\s.,/]|(?<!\d)[.,]|[.,](?!\d))+')
+_DIGIT = re.compile(r'\d')
+
+
+def normalize_request(user_input, stopwords=STOPWORDS):
+    """
+    Normalize a request for use as a cache key
+
+    Lowercases, replaces punctuation with spaces, drops stopwords and
+    collapses whitespace, so "Web App with MySQL!" == "web app mysql".
+    Requests with numbers keep their stopwords: the load hints depend on
+    them ("300 requests a second" is a rate, "300 requests second" is not).
+    """
+    words = _PUNCTUATION.sub(' ', user_input.lower()).split()
+    if _DIGIT.search(user_input):
+        return ' '.join(words)
+    return ' '.join(w for w in words if w not in stopwords)
+
+
+class ParseCache:
+    """
+    In-process LRU with TTL in front of an optional on-disk SQLite store
+
+    Entries are keyed by the normalized request and a parser version, so
+    results from older keyword tables or another model are never returned.
+
+    Args:
+        path (str): SQLite file for the persistent tier (None = memory only)
+        max_entries (int): LRU capacity of the in-process tier
+        ttl (float): Seconds an in-process entry stays valid (None = forever)
+    """
+
+    def __init__(self, path=None, max_entries=4096, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                       'evictions': 0, 'expirations': 0}
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS parse_cache ('
+                ' key TEXT PRIMARY KEY, version TEXT NOT NULL,'
+                ' specs TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(user_input, version):
+        normalized = normalize_request(user_input)
+        return hashlib.sha256(f'{version}\0{normalized}'.encode()).hexdigest()
+
+    def get(self, user_input, version):
+        """Return the cached InfraSpec for the request, or None on a miss"""
+        key = self.make_key(user_input, version)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                specs, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return specs
+                del self._memory[key]
+                self._stats['expirations'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT specs FROM parse_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    specs = InfraSpec.from_json(row[0])
+                    self._remember(key, specs)
+                    self._stats['disk_hits'] += 1
+                    return specs
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, user_input, version, specs):
+        """Store an InfraSpec for the request in both tiers"""
+        key = self.make_key(user_input, version)
+        with self._lock:
+            self._remember(key, specs)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?)',
+                    (key, version, specs.to_json(), time.time())
+                )
+                self._db.commit()
+
+    def _remember(self, key, specs):
+        self._memory[key] = (specs, time.monotonic())
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def prune(self, keep_versions):
+        """Delete persisted entries whose parser version is not in `keep_versions`"""
+        if self._db is None:
+            return 0
+        keep_versions = list(keep_versions)
+        marks = ','.join('?' * len(keep_versions)) or "''"
+        with self._lock:
+            cursor = self._db.execute(
+                f'DELETE FROM parse_cache WHERE version NOT IN ({marks})',
+                keep_versions
+            )
+            self._db.commit()
+        return cursor.rowcount
+
+    def stats(self):
+        """Hit/miss/eviction counters plus current tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute(
+                    'SELECT COUNT(*) FROM parse_cache').fetchone()[0]
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = ((stats['memory_hits'] + stats['disk_hits'])
+                             / lookups if lookups else 0.0)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM parse_cache')
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,175 @@
+"""
+Readiness - Async TCP/HTTP probing of freshly launched instances
+
+Replaces ping + fixed sleeps: each probe round checks TCP 22 (SSH banner)
+and HTTP /health concurrently, rounds are spaced by exponential backoff
+with jitter, and probing stops the moment the target stage is reached.
+Many hosts are probed concurrently on one event loop.
+
+Stages, reported as seconds since probing started:
+- first_ping: the host answered at all (any TCP response, even a refused
+  connection, proves the instance is up - unlike ICMP it is rarely blocked)
+- ssh: port 22 sent an SSH banner
+- healthy: GET /health returned 200
+"""
+
+import asyncio
+import random
+from collections import namedtuple
+
+STAGES = ('first_ping', 'ssh', 'healthy')
+
+
+class ProbeResult(namedtuple('ProbeResult', [
+        'host', 'ok', 'time_to_first_ping', 'time_to_ssh', 'time_to_healthy',
+        'attempts'])):
+    """Outcome of probing one host (stage times are None if never reached)"""
+
+    __slots__ = ()
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=10.0, rng=random.random):
+    """
+    Exponential backoff with equal jitter: half the capped delay, plus a
+    random share of the other half, so concurrent probes spread out
+
+    Args:
+        attempt (int): Zero-based retry number
+    """
+    delay = min(max_delay, base_delay * 2 ** attempt)
+    return delay / 2 + rng() * delay / 2
+
+
+async def _open(host, port, timeout):
+    """
+    Returns:
+        tuple: (reachable, (reader, writer) or None) - a refused connection
+        is reachable, a timeout or unreachable network is not
+    """
+    try:
+        streams = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                         timeout)
+    except ConnectionRefusedError:
+        return True, None
+    except (OSError, asyncio.TimeoutError):
+        return False, None
+    return True, streams
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+async def check_ssh(host, port=22, timeout=3.0):
+    """
+    Returns:
+        tuple: (reachable, ready) - ready once the server sends its banner
+    """
+    reachable, streams = await _open(host, port, timeout)
+    if streams is None:
+        return reachable, False
+    reader, writer = streams
+    try:
+        banner = await asyncio.wait_for(reader.read(4), timeout)
+    except (OSError, asyncio.TimeoutError):
+        banner = b''
+    finally:
+        await _close(writer)
+    return True, banner == b'SSH-'
+
+
+async def check_http(host, port=80, path='/health', timeout=3.0):
+    """
+    Returns:
+        tuple: (reachable, healthy) - healthy on an HTTP 200 response
+    """
+    reachable, streams = await _open(host, port, timeout)
+    if streams is None:
+        return reachable, False
+    reader, writer = streams
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+                     f'Connection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        status = b''
+    finally:
+        await _close(writer)
+    parts = status.split()
+    return True, len(parts) >= 2 and parts[1] == b'200'
+
+
+async def probe_instance(host, until='healthy', timeout=300.0, ssh_port=22,
+                         http_port=80, health_path='/health',
+                         connect_timeout=3.0, base_delay=0.5, max_delay=10.0):
+    """
+    Probe one host until it reaches `until` or `timeout` runs out
+
+    Args:
+        host (str): IP address or DNS name
+        until (str): Stage to wait for - 'first_ping', 'ssh' or 'healthy'
+        timeout (float): Overall seconds before giving up
+        connect_timeout (float): Seconds per individual check
+
+    Returns:
+        ProbeResult: Stage times in seconds since probing started
+    """
+    if until not in STAGES:
+        raise ValueError(f"Unknown readiness stage: {until}")
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    reached = {}
+    attempt = 0
+
+    while True:
+        attempt += 1
+        ssh, http = await asyncio.gather(
+            check_ssh(host, ssh_port, connect_timeout),
+            check_http(host, http_port, health_path, connect_timeout),
+        )
+        (ssh_reachable, ssh_ready), (http_reachable, healthy) = ssh, http
+        elapsed = loop.time() - start
+        for stage, hit in (('first_ping', ssh_reachable or http_reachable),
+                           ('ssh', ssh_ready), ('healthy', healthy)):
+            if hit:
+                reached.setdefault(stage, round(elapsed, 3))
+
+        remaining = timeout - (loop.time() - start)
+        if until in reached or remaining <= 0:
+            return ProbeResult(host, until in reached,
+                               *(reached.get(stage) for stage in STAGES),
+                               attempt)
+
+        await asyncio.sleep(min(backoff_delay(attempt - 1, base_delay,
+                                              max_delay), remaining))
+
+
+async def probe_instances(hosts, concurrency=32, **options):
+    """
+    Probe many hosts concurrently (at most `concurrency` at a time)
+
+    Args:
+        hosts (iterable): IP addresses or DNS names
+        **options: Passed to probe_instance
+
+    Returns:
+        list: ProbeResult per host, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(host):
+        async with semaphore:
+            return await probe_instance(host, **options)
+
+    return await asyncio.gather(*(bounded(host) for host in hosts))
+
+
+def wait_until_ready(hosts, **options):
+    """Blocking wrapper around probe_instances for synchronous callers"""
+    return asyncio.run(probe_instances(hosts, **options))
@@ -0,0 +1,200 @@
+"""
+Terraform Events - Parse `terraform apply -json` output into a timeline
+
+With `-json`, Terraform writes one JSON event per line (apply_start,
+apply_progress, apply_complete, apply_errored, diagnostic, ...; see
+https://developer.hashicorp.com/terraform/internals/machine-readable-ui).
+Events are parsed as they stream in and folded into a per-resource
+timeline. Completed resource timings are appended to a history file so
+p50/p95 apply times per resource type can be compared across runs.
+"""
+
+import json
+import math
+import os
+import time
+from collections import namedtuple
+
+try:
+    from . import terraform_providers
+except ImportError:
+    import terraform_providers
+
+HISTORY_NAME = 'resource-timings.jsonl'
+
+# Per resource type (and action), only the most recent samples count
+MAX_SAMPLES = 500
+
+
+class ResourceTiming(namedtuple('ResourceTiming', [
+        'address', 'resource_type', 'action', 'started', 'finished',
+        'seconds', 'status', 'attempts'])):
+    """
+    Apply timeline entry for one resource
+
+    started/finished are the event timestamps (ISO 8601), seconds is
+    Terraform's own elapsed time, status is 'running', 'complete' or
+    'errored', attempts counts apply_start events (>1 means it was retried).
+    """
+
+    __slots__ = ()
+
+
+def parse_event(line):
+    """Return the event dict for a `-json` output line, else None"""
+    line = line.strip()
+    if not line.startswith('{'):
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) and 'type' in event else None
+
+
+class ResourceTimeline:
+    """Per-resource apply timings, built incrementally from events"""
+
+    def __init__(self):
+        self.resources = {}
+        self.errors = []
+        self.change_summary = None
+
+    def feed(self, event):
+        """Fold one parsed event into the timeline"""
+        kind = event['type']
+        if kind == 'diagnostic' and event.get('@level') == 'error':
+            self.errors.append(event.get('@message', ''))
+            return
+        if kind == 'change_summary':
+            self.change_summary = event.get('changes')
+            return
+        if kind not in ('apply_start', 'apply_complete', 'apply_errored'):
+            return
+
+        hook = event.get('hook', {})
+        resource = hook.get('resource', {})
+        address = resource.get('addr')
+        if not address:
+            return
+        timing = self.resources.get(address)
+
+        if kind == 'apply_start':
+            attempts = timing.attempts + 1 if timing else 1
+            self.resources[address] = ResourceTiming(
+                address, resource.get('resource_type', ''),
+                hook.get('action', ''), event.get('@timestamp'), None, None,
+                'running', attempts
+            )
+        elif timing is not None:
+            self.resources[address] = timing._replace(
+                finished=event.get('@timestamp'),
+                seconds=hook.get('elapsed_seconds'),
+                status='complete' if kind == 'apply_complete' else 'errored'
+            )
+
+    def feed_lines(self, lines):
+        """Parse and fold an iterable of output lines; yields each event"""
+        for line in lines:
+            event = parse_event(line)
+            if event is not None:
+                self.feed(event)
+                yield event
+
+    def finished(self):
+        """Completed or errored resources, slowest first"""
+        return sorted((t for t in self.resources.values()
+                       if t.seconds is not None),
+                      key=lambda t: -t.seconds)
+
+    def summary(self):
+        """Human-readable per-resource timing table"""
+        timings = self.finished()
+        if not timings:
+            return "No resource changes applied"
+        width = max(len(t.address) for t in timings)
+        lines = [f"{'RESOURCE'.ljust(width)}  {'ACTION':<8} {'TIME':>7}  STATUS"]
+        for t in timings:
+            retried = f" ({t.attempts} attempts)" if t.attempts > 1 else ""
+            lines.append(f"{t.address.ljust(width)}  {t.action:<8} "
+                         f"{t.seconds:>6}s  {t.status}{retried}")
+        return '\n'.join(lines)
+
+
+def history_path():
+    return os.path.join(terraform_providers.HOME_DIR, HISTORY_NAME)
+
+
+def record_timeline(timeline, stack=None, path=None):
+    """Append the timeline's finished resources to the timing history"""
+    timings = timeline.finished()
+    if not timings:
+        return
+    path = path or history_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    now = time.time()
+    with open(path, 'a') as f:
+        for t in timings:
+            f.write(json.dumps({
+                'time': now, 'stack': stack, 'address': t.address,
+                'type': t.resource_type, 'action': t.action,
+                'seconds': t.seconds, 'status': t.status,
+                'attempts': t.attempts,
+            }, separators=(',', ':')) + '\n')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = math.ceil(len(sorted_values) * fraction)
+    return sorted_values[max(rank, 1) - 1]
+
+
+def resource_type_stats(path=None, max_samples=MAX_SAMPLES):
+    """
+    p50/p95 apply time per (resource type, action) from the history
+
+    The history is read line by line; only completed applies count, and
+    only the latest `max_samples` of each type/action.
+
+    Returns:
+        dict: (type, action) -> {'count', 'p50', 'p95', 'max'}
+    """
+    samples = {}
+    try:
+        with open(path or history_path()) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if row.get('status') != 'complete':
+                    continue
+                values = samples.setdefault((row['type'], row['action']), [])
+                values.append(row['seconds'])
+                if len(values) > 2 * max_samples:
+                    del values[:-max_samples]
+    except OSError:
+        return {}
+
+    stats = {}
+    for key, values in samples.items():
+        values = sorted(values[-max_samples:])
+        stats[key] = {'count': len(values),
+                      'p50': percentile(values, 0.5),
+                      'p95': percentile(values, 0.95),
+                      'max': values[-1]}
+    return stats
+
+
+def format_type_stats(stats):
+    """Table of per-type percentiles, slowest p95 first"""
+    if not stats:
+        return "No timing history yet"
+    rows = sorted(stats.items(), key=lambda item: -item[1]['p95'])
+    width = max(len(f'{t} ({a})') for (t, a), _ in rows)
+    lines = [f"{'RESOURCE TYPE'.ljust(width)}  {'RUNS':>5} {'P50':>7} {'P95':>7}"]
+    for (resource_type, action), s in rows:
+        label = f'{resource_type} ({action})'
+        lines.append(f"{label.ljust(width)}  {s['count']:>5} "
+                     f"{s['p50']:>6}s {s['p95']:>6}s")
+    return '\n'.join(lines)
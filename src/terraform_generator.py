@@ -1,148 +1,362 @@
 """
 Terraform Generator - Creates Terraform configuration files dynamically
+
+The configuration is composed from a registry of resource blocks. Each
+block is compiled once into static text and `{{ field }}` placeholders.
+The blocks a spec needs only depend on its shape (database or not,
+autoscaling or not), so per shape and layout the active blocks are merged
+into one list of static text runs and placeholder slots per file: a
+render fills the slots and joins, with no per-block work. Each block
+belongs to a per-concern file (network.tf, compute.tf, ...), and only
+files whose content changed are rewritten.
 """
 
+import hashlib
 import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    from .infra_spec import InfraSpec
+    from .terraform_manifest import (content_hash, read_manifest,
+                                     write_if_changed, write_manifest)
+except ImportError:
+    from infra_spec import InfraSpec
+    from terraform_manifest import (content_hash, read_manifest,
+                                    write_if_changed, write_manifest)
+
+_PLACEHOLDER = re.compile(r'\{\{ (\w+) \}\}')
 
+# Rendered texts kept per block (distinct value combinations)
+BLOCK_CACHE_SIZE = 256
 
-def generate_terraform_code(specs):
+
+class Block:
     """
-    Generate Terraform configuration based on parsed specifications
+    A named Terraform block compiled into static text and placeholders
+
+    Args:
+        name (str): Registry name, e.g. 'vpc'
+        template (str): HCL text with `{{ field }}` placeholders
+        file (str): Generated file the block belongs to, e.g. 'network.tf'
+        when (callable): Predicate on the InfraSpec; the block is only
+            emitted when it returns True (None = always)
     """
 
-    print("📝 Generating Terraform configuration...")
-
-    # Create output directory
-    output_dir = 'generated-terraform'
-    os.makedirs(output_dir, exist_ok=True)
+    __slots__ = ('name', 'file', 'when', 'fields', 'static', '_parts',
+                 '_substitute')
+
+    def __init__(self, name, template, file='main.tf', when=None):
+        self.name = name
+        self.file = file
+        self.when = when
+        self._parts = _PLACEHOLDER.split(template)
+        self.fields = tuple(dict.fromkeys(self._parts[1::2]))
+        # Static blocks are rendered exactly once, here
+        self.static = None if self.fields else template
+        # Bounded: a long-running process (generation_service) sees an
+        # open-ended set of value combinations
+        self._substitute = lru_cache(maxsize=BLOCK_CACHE_SIZE,
+                                     typed=True)(self._fill)
+
+    def _fill(self, *values):
+        parts = self._parts[:]
+        lookup = dict(zip(self.fields, values))
+        for i in range(1, len(parts), 2):
+            parts[i] = str(lookup[parts[i]])
+        return ''.join(parts)
+
+    def render(self, context):
+        """Render with the values from `context` (a dict of field values)"""
+        if self.static is not None:
+            return self.static
+        return self._substitute(*[context[f] for f in self.fields])
+
+
+# Ordered resource registry - blocks are emitted in registration order
+RESOURCE_BLOCKS = []
+
+
+# The distinct `when` predicates of the registry; their results are a
+# spec's shape
+_CONDITIONS = []
+
+
+def register_block(name, template, file, when=None):
+    """Add a block to the resource registry and return it"""
+    block = Block(name, template, file, when)
+    RESOURCE_BLOCKS.append(block)
+    if when is not None and when not in _CONDITIONS:
+        _CONDITIONS.append(when)
+    _layout.cache_clear()
+    return block
+
+
+@lru_cache(maxsize=None)
+def _layout(shape, split):
+    """
+    The blocks active for a shape, merged file by file
 
-    # Main Terraform configuration
-    main_tf = f"""
-terraform {{
+    Returns:
+        tuple: (file name, parts, slots) per file - `parts` alternates
+        static text and placeholder slots (odd indices), `slots` holds
+        the index into the _render_values row of each slot
+    """
+    met = dict(zip(_CONDITIONS, shape))
+    files = {}
+    for block in RESOURCE_BLOCKS:
+        if block.when is not None and not met[block.when]:
+            continue
+        parts = files.setdefault(block.file if split else 'main.tf', [''])
+        # Adjacent static text of consecutive blocks becomes one run
+        parts[-1] += block._parts[0]
+        parts.extend(block._parts[1:])
+    layout = []
+    for name, parts in files.items():
+        if split:
+            parts[0] = parts[0].lstrip('\n')
+        layout.append((name, tuple(parts), tuple(
+            _VALUE_INDEX[field] for field in parts[1::2])))
+    return tuple(layout)
+
+
+def _render_layout(specs, split):
+    """(file name, text) per file, in registry order"""
+    row = _render_values(specs)
+    rendered = []
+    for name, parts, slots in _layout(
+            tuple([when(specs) for when in _CONDITIONS]), split):
+        filled = list(parts)
+        filled[1::2] = [str(row[i]) for i in slots]
+        rendered.append((name, ''.join(filled)))
+    return rendered
+
+
+def _needs_database(specs):
+    return specs.database_needed
+
+
+def _single_instance(specs):
+    return not specs.autoscaling
+
+
+def _autoscaling(specs):
+    return specs.autoscaling
+
+
+register_block('terraform', """
+terraform {
   required_version = ">= 1.0"
 
-  required_providers {{
-    aws = {{
+  required_providers {
+    aws = {
       source  = "hashicorp/aws"
       version = "~> 5.0"
-    }}
-  }}
-}}
+    }
+  }
+}
+""", 'providers.tf')
 
-provider "aws" {{
-  region = "{specs['region']}"
-}}
+register_block('provider', """
+provider "aws" {
+  region = "{{ region }}"
+}
+""", 'providers.tf')
 
+register_block('vpc', """
 # VPC
-resource "aws_vpc" "main" {{
+resource "aws_vpc" "main" {
   cidr_block           = "10.0.0.0/16"
   enable_dns_hostnames = true
   enable_dns_support   = true
 
-  tags = {{
+  tags = {
     Name    = "mini-infra-gpt-vpc"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'network.tf')
 
+register_block('public_subnet', """
 # Public Subnet (AZ auto-selected)
-resource "aws_subnet" "public" {{
+resource "aws_subnet" "public" {
+  vpc_id                  = aws_vpc.main.id
+  cidr_block              = "10.0.1.0/24"
+  map_public_ip_on_launch = true
+
+  tags = {
+    Name    = "public-subnet"
+    Project = "mini-infra-gpt"
+  }
+}
+""", 'network.tf', when=_single_instance)
+
+register_block('public_subnets_multi_az', """
+# Availability Zones for the scaled-out tier
+data "aws_availability_zones" "available" {
+  state = "available"
+}
+
+# Public Subnets (one per AZ for the load balancer and Auto Scaling Group)
+resource "aws_subnet" "public" {
   vpc_id                  = aws_vpc.main.id
   cidr_block              = "10.0.1.0/24"
+  availability_zone       = data.aws_availability_zones.available.names[0]
   map_public_ip_on_launch = true
 
-  tags = {{
+  tags = {
     Name    = "public-subnet"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
 
+resource "aws_subnet" "public_b" {
+  vpc_id                  = aws_vpc.main.id
+  cidr_block              = "10.0.3.0/24"
+  availability_zone       = data.aws_availability_zones.available.names[1]
+  map_public_ip_on_launch = true
+
+  tags = {
+    Name    = "public-subnet-b"
+    Project = "mini-infra-gpt"
+  }
+}
+""", 'network.tf', when=_autoscaling)
+
+register_block('internet_gateway', """
 # Internet Gateway
-resource "aws_internet_gateway" "igw" {{
+resource "aws_internet_gateway" "igw" {
   vpc_id = aws_vpc.main.id
 
-  tags = {{
+  tags = {
     Name    = "mini-infra-gpt-igw"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'network.tf')
 
+register_block('route_table', """
 # Route Table
-resource "aws_route_table" "public" {{
+resource "aws_route_table" "public" {
   vpc_id = aws_vpc.main.id
 
-  route {{
+  route {
     cidr_block = "0.0.0.0/0"
     gateway_id = aws_internet_gateway.igw.id
-  }}
+  }
 
-  tags = {{
+  tags = {
     Name    = "public-route-table"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'network.tf')
 
+register_block('route_table_association', """
 # Route Table Association
-resource "aws_route_table_association" "public" {{
+resource "aws_route_table_association" "public" {
   subnet_id      = aws_subnet.public.id
   route_table_id = aws_route_table.public.id
-}}
+}
+""", 'network.tf')
 
+register_block('route_table_association_b', """
+resource "aws_route_table_association" "public_b" {
+  subnet_id      = aws_subnet.public_b.id
+  route_table_id = aws_route_table.public.id
+}
+""", 'network.tf', when=_autoscaling)
+
+register_block('web_security_group', """
 # Security Group
-resource "aws_security_group" "web" {{
+resource "aws_security_group" "web" {
   name        = "mini-infra-gpt-web-sg"
   description = "Allow HTTP and SSH"
   vpc_id      = aws_vpc.main.id
 
-  ingress {{
+  ingress {
     description = "HTTP"
     from_port   = 80
     to_port     = 80
     protocol    = "tcp"
     cidr_blocks = ["0.0.0.0/0"]
-  }}
+  }
 
-  ingress {{
+  ingress {
     description = "SSH"
     from_port   = 22
     to_port     = 22
     protocol    = "tcp"
     cidr_blocks = ["0.0.0.0/0"]
-  }}
+  }
 
-  egress {{
+  egress {
     from_port   = 0
     to_port     = 0
     protocol    = "-1"
     cidr_blocks = ["0.0.0.0/0"]
-  }}
+  }
 
-  tags = {{
+  tags = {
     Name    = "web-security-group"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'network.tf')
+
+register_block('alb_security_group', """
+# Load Balancer Security Group
+resource "aws_security_group" "alb" {
+  name        = "mini-infra-gpt-alb-sg"
+  description = "Allow HTTP to the load balancer"
+  vpc_id      = aws_vpc.main.id
 
+  ingress {
+    description = "HTTP"
+    from_port   = 80
+    to_port     = 80
+    protocol    = "tcp"
+    cidr_blocks = ["0.0.0.0/0"]
+  }
+
+  egress {
+    from_port   = 0
+    to_port     = 0
+    protocol    = "-1"
+    cidr_blocks = ["0.0.0.0/0"]
+  }
+
+  tags = {
+    Name    = "alb-security-group"
+    Project = "mini-infra-gpt"
+  }
+}
+""", 'network.tf', when=_autoscaling)
+
+register_block('ami', """
 # Get latest Amazon Linux 2 AMI
-data "aws_ami" "amazon_linux_2" {{
+data "aws_ami" "amazon_linux_2" {
   most_recent = true
   owners      = ["amazon"]
 
-  filter {{
+  filter {
     name   = "name"
     values = ["amzn2-ami-hvm-*-x86_64-gp2"]
-  }}
+  }
 
-  filter {{
+  filter {
     name   = "virtualization-type"
     values = ["hvm"]
-  }}
-}}
+  }
+}
+""", 'compute.tf')
 
+register_block('web_instance', """
 # EC2 Instance
-resource "aws_instance" "web" {{
+resource "aws_instance" "web" {
   ami           = data.aws_ami.amazon_linux_2.id
-  instance_type = "t3.micro"
+  instance_type = "{{ instance_type }}"
   subnet_id     = aws_subnet.public.id
 
   vpc_security_group_ids = [aws_security_group.web.id]
@@ -154,99 +368,247 @@ resource "aws_instance" "web" {{
               pip3 install flask
               EOF
 
-  tags = {{
+  tags = {
     Name    = "mini-infra-gpt-server"
     Project = "mini-infra-gpt"
-    Type    = "{specs['app_type']}"
-  }}
-}}
+    Type    = "{{ app_type }}"
+  }
+}
+""", 'compute.tf', when=_single_instance)
+
+register_block('launch_template', """
+# Launch Template
+resource "aws_launch_template" "web" {
+  name_prefix            = "mini-infra-gpt-web-"
+  image_id               = data.aws_ami.amazon_linux_2.id
+  instance_type          = "{{ instance_type }}"
+  vpc_security_group_ids = [aws_security_group.web.id]
+
+  user_data = base64encode(<<-EOF
+              #!/bin/bash
+              yum update -y
+              yum install -y python3
+              mkdir -p /opt/app && cd /opt/app
+              echo "mini-infra-gpt {{ app_type }} on $(hostname)" > index.html
+              echo "ok" > health
+              nohup python3 -m http.server 80 > /var/log/app.log 2>&1 &
+              EOF
+  )
 
+  tag_specifications {
+    resource_type = "instance"
+
+    tags = {
+      Name    = "mini-infra-gpt-server"
+      Project = "mini-infra-gpt"
+      Type    = "{{ app_type }}"
+    }
+  }
+}
+
+# Auto Scaling Group (spread across both public subnets / AZs)
+resource "aws_autoscaling_group" "web" {
+  name_prefix               = "mini-infra-gpt-web-"
+  min_size                  = {{ min_size }}
+  max_size                  = {{ max_size }}
+  desired_capacity          = {{ min_size }}
+  vpc_zone_identifier       = [aws_subnet.public.id, aws_subnet.public_b.id]
+  target_group_arns         = [aws_lb_target_group.web.arn]
+  health_check_type         = "ELB"
+  health_check_grace_period = 120
+
+  launch_template {
+    id      = aws_launch_template.web.id
+    version = "$Latest"
+  }
+
+  tag {
+    key                 = "Project"
+    value               = "mini-infra-gpt"
+    propagate_at_launch = true
+  }
+}
+
+# Target tracking: keep average CPU and requests per instance in range
+resource "aws_autoscaling_policy" "cpu" {
+  name                   = "mini-infra-gpt-cpu-target"
+  autoscaling_group_name = aws_autoscaling_group.web.name
+  policy_type            = "TargetTrackingScaling"
+
+  target_tracking_configuration {
+    predefined_metric_specification {
+      predefined_metric_type = "ASGAverageCPUUtilization"
+    }
+    target_value = 60
+  }
+}
+
+resource "aws_autoscaling_policy" "requests" {
+  name                   = "mini-infra-gpt-request-target"
+  autoscaling_group_name = aws_autoscaling_group.web.name
+  policy_type            = "TargetTrackingScaling"
+
+  target_tracking_configuration {
+    predefined_metric_specification {
+      predefined_metric_type = "ALBRequestCountPerTarget"
+      resource_label         = "${aws_lb.web.arn_suffix}/${aws_lb_target_group.web.arn_suffix}"
+    }
+    target_value = 1000
+  }
+}
+""", 'compute.tf', when=_autoscaling)
+
+register_block('load_balancer', """
+# Application Load Balancer
+resource "aws_lb" "web" {
+  name               = "mini-infra-gpt-alb"
+  load_balancer_type = "application"
+  security_groups    = [aws_security_group.alb.id]
+  subnets            = [aws_subnet.public.id, aws_subnet.public_b.id]
+
+  tags = {
+    Name    = "mini-infra-gpt-alb"
+    Project = "mini-infra-gpt"
+  }
+}
+
+resource "aws_lb_target_group" "web" {
+  name     = "mini-infra-gpt-web"
+  port     = 80
+  protocol = "HTTP"
+  vpc_id   = aws_vpc.main.id
+
+  health_check {
+    path                = "/health"
+    matcher             = "200"
+    interval            = 15
+    timeout             = 5
+    healthy_threshold   = 2
+    unhealthy_threshold = 3
+  }
+
+  tags = {
+    Project = "mini-infra-gpt"
+  }
+}
+
+resource "aws_lb_listener" "http" {
+  load_balancer_arn = aws_lb.web.arn
+  port              = 80
+  protocol          = "HTTP"
+
+  default_action {
+    type             = "forward"
+    target_group_arn = aws_lb_target_group.web.arn
+  }
+}
+""", 'loadbalancer.tf', when=_autoscaling)
+
+register_block('web_outputs', """
 # Outputs
-output "instance_id" {{
+output "instance_id" {
   description = "EC2 instance ID"
   value       = aws_instance.web.id
-}}
+}
 
-output "instance_public_ip" {{
+output "instance_public_ip" {
   description = "Public IP address"
   value       = aws_instance.web.public_ip
-}}
+}
 
-output "instance_public_dns" {{
+output "instance_public_dns" {
   description = "Public DNS name"
   value       = aws_instance.web.public_dns
-}}
+}
 
-output "application_url" {{
+output "application_url" {
   description = "Application URL"
-  value       = "http://${{aws_instance.web.public_ip}}"
-}}
-"""
+  value       = "http://${aws_instance.web.public_ip}"
+}
+""", 'outputs.tf', when=_single_instance)
 
-    # Add database if needed
-    if specs.get('database_needed', False):
-        print("  ✅ Adding RDS database configuration...")
+register_block('scaled_outputs', """
+# Outputs
+output "alb_dns_name" {
+  description = "Load balancer DNS name"
+  value       = aws_lb.web.dns_name
+}
+
+output "autoscaling_group_name" {
+  description = "Auto Scaling Group name"
+  value       = aws_autoscaling_group.web.name
+}
 
-        db_port = 3306 if specs['database_type'] == 'mysql' else 5432
-        db_version = '8.0' if specs['database_type'] == 'mysql' else '15'
+output "application_url" {
+  description = "Application URL"
+  value       = "http://${aws_lb.web.dns_name}"
+}
+""", 'outputs.tf', when=_autoscaling)
 
-        db_config = f"""
+register_block('private_subnet', """
 
 # Private Subnet for Database
-resource "aws_subnet" "private" {{
+resource "aws_subnet" "private" {
   vpc_id     = aws_vpc.main.id
   cidr_block = "10.0.2.0/24"
 
-  tags = {{
+  tags = {
     Name    = "private-subnet-db"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'database.tf', when=_needs_database)
 
+register_block('db_subnet_group', """
 # DB Subnet Group
-resource "aws_db_subnet_group" "main" {{
+resource "aws_db_subnet_group" "main" {
   name       = "mini-infra-gpt-db-subnet"
   subnet_ids = [aws_subnet.public.id, aws_subnet.private.id]
 
-  tags = {{
+  tags = {
     Name    = "mini-infra-gpt-db-subnet-group"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'database.tf', when=_needs_database)
 
+register_block('db_security_group', """
 # Database Security Group
-resource "aws_security_group" "db" {{
+resource "aws_security_group" "db" {
   name        = "mini-infra-gpt-db-sg"
   description = "Allow database traffic from web server"
   vpc_id      = aws_vpc.main.id
 
-  ingress {{
-    from_port       = {db_port}
-    to_port         = {db_port}
+  ingress {
+    from_port       = {{ db_port }}
+    to_port         = {{ db_port }}
     protocol        = "tcp"
     security_groups = [aws_security_group.web.id]
-  }}
+  }
 
-  egress {{
+  egress {
     from_port   = 0
     to_port     = 0
     protocol    = "-1"
     cidr_blocks = ["0.0.0.0/0"]
-  }}
+  }
 
-  tags = {{
+  tags = {
     Name    = "database-security-group"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'database.tf', when=_needs_database)
 
+register_block('database', """
 # RDS Database
-resource "aws_db_instance" "main" {{
+resource "aws_db_instance" "main" {
   identifier        = "mini-infra-gpt-db"
-  engine            = "{specs['database_type']}"
-  engine_version    = "{db_version}"
-  instance_class    = "db.t3.micro"
-  allocated_storage = 20
+  engine            = "{{ database_type }}"
+  engine_version    = "{{ db_version }}"
+  instance_class    = "{{ db_instance_class }}"
+  allocated_storage = {{ db_storage_gb }}
+  storage_type      = "{{ db_storage_type }}"{{ db_iops_setting }}
 
   db_name  = "miniinfragpt"
   username = "admin"
@@ -258,39 +620,367 @@ resource "aws_db_instance" "main" {{
   skip_final_snapshot = true
   publicly_accessible = false
 
-  tags = {{
+  tags = {
     Name    = "mini-infra-gpt-database"
     Project = "mini-infra-gpt"
-  }}
-}}
+  }
+}
+""", 'database.tf', when=_needs_database)
 
-output "database_endpoint" {{
+register_block('database_outputs', """
+output "database_endpoint" {
   description = "Database endpoint"
   value       = aws_db_instance.main.endpoint
-}}
+}
 
-output "database_name" {{
+output "database_name" {
   description = "Database name"
   value       = aws_db_instance.main.db_name
-}}
-"""
-        main_tf += db_config
+}
+""", 'outputs.tf', when=_needs_database)
+
+
+# Placeholders computed from the spec rather than read from it
+_DERIVED_FIELDS = ('db_port', 'db_version', 'db_iops_setting')
+
+# Placeholder name -> index in the _render_values row
+_VALUE_INDEX = {field: i for i, field in
+                enumerate(InfraSpec._fields + _DERIVED_FIELDS)}
+
+
+def _render_values(specs):
+    """The spec's fields followed by the _DERIVED_FIELDS values"""
+    mysql = specs.database_type == 'mysql'
+    return (*specs, 3306 if mysql else 5432, '8.0' if mysql else '15',
+            f'\n  iops              = {specs.db_iops}' if specs.db_iops
+            else '')
+
+
+def _render_context(specs):
+    """Field values available to block placeholders"""
+    return dict(zip(_VALUE_INDEX, _render_values(specs)))
+
+
+# Whole renders are kept for the few specs in use at a time (the deploy
+# pipeline renders while init runs, then writes the same spec)
+@lru_cache(maxsize=1024)
+def _render_text(specs):
+    return _render_layout(specs, False)[0][1]
+
+
+@lru_cache(maxsize=1024)
+def _render_files(specs):
+    return tuple(_render_layout(specs, True))
+
 
-    # Write to file
-    terraform_file = os.path.join(output_dir, 'main.tf')
-    with open(terraform_file, 'w') as f:
-        f.write(main_tf)
+def render_terraform(specs):
+    """
+    Render the whole Terraform configuration for a spec as one file's
+    text (no file or console I/O)
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+
+    Returns:
+        str: Single-file (main.tf) contents
+    """
+    return _render_text(InfraSpec.coerce(specs))
+
+
+def render_terraform_files(specs):
+    """
+    Render the configuration split into per-concern files
+
+    Returns:
+        dict: File name (e.g. 'network.tf') -> contents, in registry order
+    """
+    return dict(_render_files(InfraSpec.coerce(specs)))
+
+
+def providers_hash(specs):
+    """Hash of the terraform {} block - what `terraform init` depends on"""
+    context = _render_context(specs)
+    return content_hash(''.join(block.render(context)
+                                for block in RESOURCE_BLOCKS
+                                if block.name == 'terraform'))
+
+
+def render_config(specs, split=True, fmt='hcl'):
+    """
+    Render the files of a configuration in memory (no file I/O)
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+        split (bool): Per-concern files (True) or a single main.tf (False)
+        fmt (str): 'hcl', or 'json' for a single main.tf.json built from
+            the resource graph (see terraform_graph)
+
+    Returns:
+        dict: File name -> contents
+    """
+    specs = InfraSpec.coerce(specs)
+    if fmt == 'json':
+        try:
+            from .terraform_graph import render_terraform_json
+        except ImportError:
+            from terraform_graph import render_terraform_json
+        return {'main.tf.json': render_terraform_json(specs)}
+    if split:
+        return render_terraform_files(specs)
+    return {'main.tf': render_terraform(specs)}
+
+
+def render_provider_config(specs, split=True, fmt='hcl'):
+    """
+    Render only the `terraform {}` block, in the file the full layout puts
+    it in - enough for `terraform init` to install the providers
+
+    Returns:
+        dict: File name -> contents
+    """
+    specs = InfraSpec.coerce(specs)
+    if fmt == 'json':
+        try:
+            from .terraform_graph import render_providers_json
+        except ImportError:
+            from terraform_graph import render_providers_json
+        return {'main.tf.json': render_providers_json(specs)}
+    context = _render_context(specs)
+    text = ''.join(block.render(context) for block in RESOURCE_BLOCKS
+                   if block.name == 'terraform').lstrip('\n')
+    return {'providers.tf' if split else 'main.tf': text}
+
+
+# Single-file outputs written before the manifest existed; recognised by
+# the generator's VPC tag so a hand-written main.tf is never taken over
+_LEGACY_FILES = ('main.tf', 'main.tf.json')
+_LEGACY_MARKER = 'mini-infra-gpt-vpc'
+
+
+def _adopt_legacy_files(output_dir, manifest):
+    """
+    Record generator output from before the manifest (a bare main.tf or
+    main.tf.json) as owned, so switching layouts removes it rather than
+    leaving a second copy of every resource next to the new files
+    """
+    if manifest.get('files') is not None:
+        return
+    owned = manifest.setdefault('files', {})
+    for name in _LEGACY_FILES:
+        try:
+            with open(os.path.join(output_dir, name)) as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if _LEGACY_MARKER in text:
+            owned[name] = content_hash(text)
+
+
+def _write_files(output_dir, files, specs):
+    """
+    Write `files` into output_dir as the complete generated configuration:
+    unchanged files are not rewritten, previously generated files missing
+    from `files` are removed, and the manifest hashes are updated
+
+    Returns:
+        list: Names of the files written or removed
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    _adopt_legacy_files(output_dir, manifest)
+    changed = [name for name, text in files.items()
+               if write_if_changed(output_dir, name, text, manifest)]
+
+    owned = manifest.setdefault('files', {})
+    for name in sorted(set(owned) - set(files)):
+        try:
+            os.unlink(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+        del owned[name]
+        changed.append(name)
+
+    config_hash = content_hash(''.join(f'{name}\0{owned[name]}\0'
+                                       for name in sorted(owned)))
+    if changed or manifest.get('config_hash') != config_hash:
+        manifest['config_hash'] = config_hash
+        manifest['providers_hash'] = providers_hash(specs)
+        write_manifest(output_dir, manifest)
+
+    return changed
+
+
+def write_terraform(specs, output_dir='generated-terraform', split=True,
+                    fmt='hcl'):
+    """
+    Render a spec into output_dir, rewriting only the files whose content
+    changed, and record their hashes in the directory manifest
+
+    Generated files that are no longer needed (e.g. database.tf once the
+    database is dropped, or main.tf when switching to the split layout) are
+    removed, as is the main.tf of a directory generated before the
+    manifest existed. Files the generator did not write are never touched.
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+        output_dir (str): Directory for the .tf files and manifest
+        split (bool): Per-concern files (True) or a single main.tf (False)
+        fmt (str): 'hcl', or 'json' for a single main.tf.json built from
+            the resource graph (see terraform_graph)
+
+    Returns:
+        tuple: (output_dir, names of the files written or removed - empty
+        when nothing changed)
+    """
+    specs = InfraSpec.coerce(specs)
+    files = render_config(specs, split, fmt)
+    return output_dir, _write_files(output_dir, files, specs)
+
+
+def write_provider_config(specs, output_dir='generated-terraform', split=True,
+                          fmt='hcl'):
+    """
+    Write a provider-only configuration (see render_provider_config) so
+    `terraform init` can start before the full configuration is generated;
+    a later write_terraform replaces it with the complete configuration
+
+    Nothing is written when output_dir already holds a generated
+    configuration: replacing it would delete the files its state was
+    applied from. `terraform init` runs on that configuration as it is.
+
+    Returns:
+        tuple: (output_dir, names of the files written or removed)
+    """
+    if read_manifest(output_dir).get('files'):
+        return output_dir, []
+    specs = InfraSpec.coerce(specs)
+    files = render_provider_config(specs, split, fmt)
+    return output_dir, _write_files(output_dir, files, specs)
 
-    print("✅ Terraform configuration generated!")
-    print(f"📁 Location: {terraform_file}")
+
+def generate_terraform_code(specs, output_dir='generated-terraform',
+                            split=True, fmt='hcl'):
+    """
+    Generate Terraform configuration based on parsed specifications
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+        output_dir (str): Directory for the .tf files and their manifest
+        split (bool): Per-concern files (True) or a single main.tf (False)
+        fmt (str): 'hcl' or 'json' (main.tf.json)
+
+    Returns:
+        str: The output directory
+    """
+
+    specs = InfraSpec.coerce(specs)
+
+    print("📝 Generating Terraform configuration...")
+
+    if specs.database_needed:
+        print("  ✅ Adding RDS database configuration...")
+
+    output_dir, changed = write_terraform(specs, output_dir, split, fmt)
+
+    if changed:
+        print("✅ Terraform configuration generated!")
+        print(f"   Updated: {', '.join(changed)}")
+    else:
+        print("✅ Terraform configuration unchanged (not rewritten)")
+    print(f"📁 Location: {output_dir}/")
     print("📊 Resources to create:")
     print("   • VPC and Networking")
     print("   • Security Groups")
-    print("   • EC2 Instance (t3.micro)")
-    if specs.get('database_needed'):
-        print(f"   • RDS Database ({specs['database_type']})")
+    if specs.autoscaling:
+        print(f"   • Auto Scaling Group ({specs.min_size}-{specs.max_size} x "
+              f"{specs.instance_type}) behind an Application Load Balancer")
+    else:
+        print(f"   • EC2 Instance ({specs.instance_type})")
+    if specs.database_needed:
+        print(f"   • RDS Database ({specs.database_type})")
 
-    return terraform_file
+    return output_dir
+
+
+_STACK_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+StackResult = namedtuple('StackResult', ['stack_id', 'path', 'changed'])
+
+
+def stack_id(key, occurrence=0):
+    """
+    Default directory name for a stack without an explicit id
+
+    Derived from `key` (the request text, or the spec's JSON), not from
+    the stack's position in the batch, so inserting or removing other
+    lines never moves a tenant onto another tenant's directory.
+
+    Args:
+        key (str): Request text or serialized spec
+        occurrence (int): Earlier stacks in the batch with the same key -
+            two tenants asking for the same thing still get a directory each
+
+    Returns:
+        str: 'stack-<12 hex digits>', suffixed '-2', '-3', ... for repeats
+    """
+    digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+    return f'stack-{digest}-{occurrence + 1}' if occurrence else f'stack-{digest}'
+
+
+def _generate_stack(job):
+    """Process-pool worker: render one stack into its directory"""
+    sid, specs, base_dir, fmt = job
+    path, changed = write_terraform(specs, os.path.join(base_dir, sid),
+                                    fmt=fmt)
+    return StackResult(sid, path, bool(changed))
+
+
+def generate_stacks(stacks, base_dir='generated-terraform', max_workers=None,
+                    fmt='hcl'):
+    """
+    Generate many stacks, each into base_dir/<stack id>/, over a process pool
+
+    Args:
+        stacks (iterable): InfraSpecs (ids derived from the spec, see
+            stack_id()) or (stack_id, InfraSpec) pairs
+        base_dir (str): Parent directory for the per-stack directories
+        max_workers (int): Worker processes (default: CPU count, max 32)
+        fmt (str): 'hcl' or 'json'
+
+    Returns:
+        list: StackResult(stack_id, path, changed) per stack, in input order
+
+    Raises:
+        ValueError: If a stack id is invalid or used twice
+    """
+    jobs, seen, occurrences = [], set(), {}
+    for item in stacks:
+        if isinstance(item, tuple) and not isinstance(item, InfraSpec):
+            sid, specs = item
+        else:
+            specs = InfraSpec.coerce(item)
+            key = specs.to_json()
+            sid = stack_id(key, occurrences.get(key, 0))
+            occurrences[key] = occurrences.get(key, 0) + 1
+        if not _STACK_ID_PATTERN.match(sid):
+            raise ValueError(f"Invalid stack id: {sid!r}")
+        if sid in seen:
+            raise ValueError(f"Duplicate stack id: {sid!r}")
+        seen.add(sid)
+        jobs.append((sid, InfraSpec.coerce(specs), base_dir, fmt))
+
+    max_workers = max_workers or min(os.cpu_count() or 1, 32)
+    os.makedirs(base_dir, exist_ok=True)
+
+    # Small batches aren't worth the pool start-up cost
+    if max_workers == 1 or len(jobs) < 2 * max_workers:
+        return [_generate_stack(job) for job in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(jobs) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_generate_stack, jobs, chunksize=chunksize))
 
 
 if __name__ == "__main__":
@@ -298,12 +988,12 @@ if __name__ == "__main__":
     print("Testing Terraform Generator")
     print("=" * 60)
 
-    test_specs = {
-        "instance_type": "t3.micro",
-        "database_needed": False,
-        "database_type": "none",
-        "region": "us-east-1",
-        "app_type": "web"
-    }
+    test_specs = InfraSpec(
+        instance_type="t3.micro",
+        database_needed=False,
+        database_type="none",
+        region="us-east-1",
+        app_type="web"
+    )
 
     generate_terraform_code(test_specs)
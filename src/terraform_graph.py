@@ -0,0 +1,494 @@
+"""
+Terraform Graph - In-memory resource graph serialized as Terraform JSON
+
+An alternative to the HCL blocks in terraform_generator: the configuration
+is built as a graph of resources, data sources and outputs that can be
+inspected, transformed and validated in Python, then written as
+`main.tf.json` (https://developer.hashicorp.com/terraform/language/syntax/json).
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    from .infra_spec import InfraSpec
+except ImportError:
+    from infra_spec import InfraSpec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ${aws_vpc.main.id} / ${data.aws_ami.amazon_linux_2.id}
+_REFERENCE = re.compile(r'\$\{((?:data\.)?[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+)\.')
+
+_TAGS = {'Project': 'mini-infra-gpt'}
+
+
+class Node(namedtuple('Node', ['kind', 'type', 'name'])):
+    """A resource or data source in the graph"""
+
+    __slots__ = ()
+
+    @property
+    def address(self):
+        prefix = 'data.' if self.kind == 'data' else ''
+        return f'{prefix}{self.type}.{self.name}'
+
+    def ref(self, attribute):
+        """Interpolation string for one of the node's attributes"""
+        return f'${{{self.address}.{attribute}}}'
+
+
+class ResourceGraph:
+    """
+    Terraform configuration held as the Terraform JSON document
+
+    Dependencies are derived from the `${...}` references in attribute
+    values, so the graph needs no separate edge bookkeeping.
+    """
+
+    def __init__(self):
+        self.terraform = {}
+        self.providers = {}
+        self.resources = {}
+        self.data_sources = {}
+        self.outputs = {}
+
+    def provider(self, name, /, **attrs):
+        self.providers[name] = attrs
+
+    def resource(self, type_, name, /, **attrs):
+        self.resources.setdefault(type_, {})[name] = attrs
+        return Node('resource', type_, name)
+
+    def data(self, type_, name, /, **attrs):
+        self.data_sources.setdefault(type_, {})[name] = attrs
+        return Node('data', type_, name)
+
+    def output(self, name, value, description=None):
+        output = {'value': value}
+        if description:
+            output['description'] = description
+        self.outputs[name] = output
+
+    def attributes(self, address):
+        """Attribute dict of the node at `address` (e.g. 'aws_vpc.main')"""
+        kind, type_, name = _split_address(address)
+        table = self.data_sources if kind == 'data' else self.resources
+        return table[type_][name]
+
+    def nodes(self):
+        """All resource and data source nodes, in insertion order"""
+        for type_, named in self.resources.items():
+            for name in named:
+                yield Node('resource', type_, name)
+        for type_, named in self.data_sources.items():
+            for name in named:
+                yield Node('data', type_, name)
+
+    def dependencies(self):
+        """
+        Returns:
+            dict: Node address -> set of addresses it references
+        """
+        return {node.address: set(_references(self.attributes(node.address)))
+                for node in self.nodes()}
+
+    def topological_order(self):
+        """Node addresses ordered so every node follows its dependencies"""
+        deps = self.dependencies()
+        order, done, visiting = [], set(), set()
+
+        def visit(address):
+            if address in done:
+                return
+            if address in visiting:
+                raise ValueError(f"Dependency cycle at {address}")
+            visiting.add(address)
+            for dep in sorted(deps.get(address, ())):
+                if dep in deps:
+                    visit(dep)
+            visiting.discard(address)
+            done.add(address)
+            order.append(address)
+
+        for address in deps:
+            visit(address)
+        return order
+
+    def to_dict(self):
+        """The Terraform JSON document (shares structure with the graph)"""
+        doc = {}
+        if self.terraform:
+            doc['terraform'] = self.terraform
+        if self.providers:
+            doc['provider'] = self.providers
+        if self.data_sources:
+            doc['data'] = self.data_sources
+        if self.resources:
+            doc['resource'] = self.resources
+        if self.outputs:
+            doc['output'] = self.outputs
+        return doc
+
+    def to_json(self, indent=True):
+        """
+        Serialize with orjson when installed, else the stdlib encoder
+
+        Args:
+            indent (bool): Two-space indented (reviewable) or compact output.
+                Without orjson, compact is much faster: the stdlib only uses
+                its C encoder when not indenting.
+        """
+        doc = self.to_dict()
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if indent else 0
+            return orjson.dumps(doc, option=option).decode() + '\n'
+        import json
+
+        if indent:
+            return json.dumps(doc, indent=2) + '\n'
+        return json.dumps(doc, separators=(',', ':')) + '\n'
+
+
+def _split_address(address):
+    parts = address.split('.')
+    if parts[0] == 'data':
+        return 'data', parts[1], parts[2]
+    return 'resource', parts[0], parts[1]
+
+
+def _references(value):
+    """Yield every node address referenced inside a (nested) value"""
+    if isinstance(value, str):
+        yield from _REFERENCE.findall(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _references(item)
+
+
+def _rule(from_port, to_port, protocol, cidr_blocks=(), security_groups=(),
+          description=''):
+    """
+    Security group rule - in JSON every attribute of an attributes-as-blocks
+    object must be present, so the unused ones are set to empty values
+    """
+    return {
+        'description': description,
+        'from_port': from_port,
+        'to_port': to_port,
+        'protocol': protocol,
+        'cidr_blocks': list(cidr_blocks),
+        'ipv6_cidr_blocks': [],
+        'prefix_list_ids': [],
+        'security_groups': list(security_groups),
+        'self': False,
+    }
+
+
+def _tags(name, **extra):
+    return {'Name': name, **_TAGS, **extra}
+
+
+def _scaled_user_data(app_type):
+    """Boot script for Auto Scaling instances - serves / and /health on :80"""
+    return ('#!/bin/bash\n'
+            'yum update -y\n'
+            'yum install -y python3\n'
+            'mkdir -p /opt/app && cd /opt/app\n'
+            f'echo "mini-infra-gpt {app_type} on $(hostname)" > index.html\n'
+            'echo "ok" > health\n'
+            'nohup python3 -m http.server 80 > /var/log/app.log 2>&1 &\n')
+
+
+def _add_scaled_web_tier(graph, specs, vpc, ami, web_sg, subnet_ids):
+    """Launch template + Auto Scaling Group behind an Application Load Balancer"""
+    alb_sg = graph.resource(
+        'aws_security_group', 'alb',
+        name='mini-infra-gpt-alb-sg',
+        description='Allow HTTP to the load balancer',
+        vpc_id=vpc.ref('id'),
+        ingress=[_rule(80, 80, 'tcp', ['0.0.0.0/0'], description='HTTP')],
+        egress=[_rule(0, 0, '-1', ['0.0.0.0/0'])],
+        tags=_tags('alb-security-group')
+    )
+    lb = graph.resource('aws_lb', 'web',
+                        name='mini-infra-gpt-alb',
+                        load_balancer_type='application',
+                        security_groups=[alb_sg.ref('id')],
+                        subnets=subnet_ids,
+                        tags=_tags('mini-infra-gpt-alb'))
+    target_group = graph.resource(
+        'aws_lb_target_group', 'web',
+        name='mini-infra-gpt-web',
+        port=80,
+        protocol='HTTP',
+        vpc_id=vpc.ref('id'),
+        health_check=[{'path': '/health', 'matcher': '200', 'interval': 15,
+                       'timeout': 5, 'healthy_threshold': 2,
+                       'unhealthy_threshold': 3}],
+        tags=dict(_TAGS)
+    )
+    graph.resource('aws_lb_listener', 'http',
+                   load_balancer_arn=lb.ref('arn'),
+                   port=80,
+                   protocol='HTTP',
+                   default_action=[{'type': 'forward',
+                                    'target_group_arn': target_group.ref('arn')}])
+
+    # user_data is base64-encoded in the template, as the HCL heredoc is
+    launch_template = graph.resource(
+        'aws_launch_template', 'web',
+        name_prefix='mini-infra-gpt-web-',
+        image_id=ami.ref('id'),
+        instance_type=specs.instance_type,
+        vpc_security_group_ids=[web_sg.ref('id')],
+        user_data=_base64(_scaled_user_data(specs.app_type)),
+        tag_specifications=[{
+            'resource_type': 'instance',
+            'tags': _tags('mini-infra-gpt-server', Type=specs.app_type),
+        }]
+    )
+    group = graph.resource(
+        'aws_autoscaling_group', 'web',
+        name_prefix='mini-infra-gpt-web-',
+        min_size=specs.min_size,
+        max_size=specs.max_size,
+        desired_capacity=specs.min_size,
+        vpc_zone_identifier=subnet_ids,
+        target_group_arns=[target_group.ref('arn')],
+        health_check_type='ELB',
+        health_check_grace_period=120,
+        launch_template=[{'id': launch_template.ref('id'),
+                          'version': '$Latest'}],
+        tag=[{'key': 'Project', 'value': 'mini-infra-gpt',
+              'propagate_at_launch': True}]
+    )
+
+    request_label = (f"{lb.ref('arn_suffix')}/"
+                     f"{target_group.ref('arn_suffix')}")
+    for name, policy_name, metric, target, label in (
+            ('cpu', 'mini-infra-gpt-cpu-target',
+             'ASGAverageCPUUtilization', 60, None),
+            ('requests', 'mini-infra-gpt-request-target',
+             'ALBRequestCountPerTarget', 1000, request_label)):
+        metric_spec = {'predefined_metric_type': metric}
+        if label:
+            metric_spec['resource_label'] = label
+        graph.resource(
+            'aws_autoscaling_policy', name,
+            name=policy_name,
+            autoscaling_group_name=group.ref('name'),
+            policy_type='TargetTrackingScaling',
+            target_tracking_configuration=[{
+                'predefined_metric_specification': [metric_spec],
+                'target_value': target,
+            }]
+        )
+
+    graph.output('alb_dns_name', lb.ref('dns_name'), 'Load balancer DNS name')
+    graph.output('autoscaling_group_name', group.ref('name'),
+                 'Auto Scaling Group name')
+    graph.output('application_url', f"http://{lb.ref('dns_name')}",
+                 'Application URL')
+
+
+def _base64(text):
+    import base64
+
+    return base64.b64encode(text.encode()).decode()
+
+
+def build_graph(specs):
+    """
+    Build the resource graph for a spec - the same infrastructure as the
+    HCL generator, except the default route is a separate aws_route (inline
+    `route` blocks need every attribute spelled out in JSON). Autoscaling
+    specs get a launch template + Auto Scaling Group behind an ALB instead
+    of the single EC2 instance.
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+    """
+    specs = InfraSpec.coerce(specs)
+    graph = ResourceGraph()
+
+    graph.terraform = {
+        'required_version': '>= 1.0',
+        'required_providers': {
+            'aws': {'source': 'hashicorp/aws', 'version': '~> 5.0'},
+        },
+    }
+    graph.provider('aws', region=specs.region)
+
+    # Network
+    vpc = graph.resource('aws_vpc', 'main',
+                         cidr_block='10.0.0.0/16',
+                         enable_dns_hostnames=True,
+                         enable_dns_support=True,
+                         tags=_tags('mini-infra-gpt-vpc'))
+    if specs.autoscaling:
+        zones = graph.data('aws_availability_zones', 'available',
+                           state='available')
+        public = graph.resource(
+            'aws_subnet', 'public',
+            vpc_id=vpc.ref('id'),
+            cidr_block='10.0.1.0/24',
+            availability_zone=f"${{{zones.address}.names[0]}}",
+            map_public_ip_on_launch=True,
+            tags=_tags('public-subnet')
+        )
+        public_b = graph.resource(
+            'aws_subnet', 'public_b',
+            vpc_id=vpc.ref('id'),
+            cidr_block='10.0.3.0/24',
+            availability_zone=f"${{{zones.address}.names[1]}}",
+            map_public_ip_on_launch=True,
+            tags=_tags('public-subnet-b')
+        )
+    else:
+        public = graph.resource('aws_subnet', 'public',
+                                vpc_id=vpc.ref('id'),
+                                cidr_block='10.0.1.0/24',
+                                map_public_ip_on_launch=True,
+                                tags=_tags('public-subnet'))
+    igw = graph.resource('aws_internet_gateway', 'igw',
+                         vpc_id=vpc.ref('id'),
+                         tags=_tags('mini-infra-gpt-igw'))
+    route_table = graph.resource('aws_route_table', 'public',
+                                 vpc_id=vpc.ref('id'),
+                                 tags=_tags('public-route-table'))
+    graph.resource('aws_route', 'internet',
+                   route_table_id=route_table.ref('id'),
+                   destination_cidr_block='0.0.0.0/0',
+                   gateway_id=igw.ref('id'))
+    graph.resource('aws_route_table_association', 'public',
+                   subnet_id=public.ref('id'),
+                   route_table_id=route_table.ref('id'))
+    if specs.autoscaling:
+        graph.resource('aws_route_table_association', 'public_b',
+                       subnet_id=public_b.ref('id'),
+                       route_table_id=route_table.ref('id'))
+    web_sg = graph.resource(
+        'aws_security_group', 'web',
+        name='mini-infra-gpt-web-sg',
+        description='Allow HTTP and SSH',
+        vpc_id=vpc.ref('id'),
+        ingress=[_rule(80, 80, 'tcp', ['0.0.0.0/0'], description='HTTP'),
+                 _rule(22, 22, 'tcp', ['0.0.0.0/0'], description='SSH')],
+        egress=[_rule(0, 0, '-1', ['0.0.0.0/0'])],
+        tags=_tags('web-security-group')
+    )
+
+    # Compute
+    ami = graph.data('aws_ami', 'amazon_linux_2',
+                     most_recent=True,
+                     owners=['amazon'],
+                     filter=[
+                         {'name': 'name',
+                          'values': ['amzn2-ami-hvm-*-x86_64-gp2']},
+                         {'name': 'virtualization-type', 'values': ['hvm']},
+                     ])
+    if specs.autoscaling:
+        _add_scaled_web_tier(graph, specs, vpc, ami, web_sg,
+                             [public.ref('id'), public_b.ref('id')])
+    else:
+        web = graph.resource('aws_instance', 'web',
+                             ami=ami.ref('id'),
+                             instance_type=specs.instance_type,
+                             subnet_id=public.ref('id'),
+                             vpc_security_group_ids=[web_sg.ref('id')],
+                             user_data=('#!/bin/bash\n'
+                                        'yum update -y\n'
+                                        'yum install -y python3 python3-pip\n'
+                                        'pip3 install flask\n'),
+                             tags=_tags('mini-infra-gpt-server',
+                                        Type=specs.app_type))
+
+        graph.output('instance_id', web.ref('id'), 'EC2 instance ID')
+        graph.output('instance_public_ip', web.ref('public_ip'),
+                     'Public IP address')
+        graph.output('instance_public_dns', web.ref('public_dns'),
+                     'Public DNS name')
+        graph.output('application_url', f"http://{web.ref('public_ip')}",
+                     'Application URL')
+
+    # Database
+    if specs.database_needed:
+        mysql = specs.database_type == 'mysql'
+        db_port = 3306 if mysql else 5432
+
+        private = graph.resource('aws_subnet', 'private',
+                                 vpc_id=vpc.ref('id'),
+                                 cidr_block='10.0.2.0/24',
+                                 tags=_tags('private-subnet-db'))
+        subnet_group = graph.resource(
+            'aws_db_subnet_group', 'main',
+            name='mini-infra-gpt-db-subnet',
+            subnet_ids=[public.ref('id'), private.ref('id')],
+            tags=_tags('mini-infra-gpt-db-subnet-group')
+        )
+        db_sg = graph.resource(
+            'aws_security_group', 'db',
+            name='mini-infra-gpt-db-sg',
+            description='Allow database traffic from web server',
+            vpc_id=vpc.ref('id'),
+            ingress=[_rule(db_port, db_port, 'tcp',
+                           security_groups=[web_sg.ref('id')])],
+            egress=[_rule(0, 0, '-1', ['0.0.0.0/0'])],
+            tags=_tags('database-security-group')
+        )
+        db = graph.resource('aws_db_instance', 'main',
+                            identifier='mini-infra-gpt-db',
+                            engine=specs.database_type,
+                            engine_version='8.0' if mysql else '15',
+                            instance_class=specs.db_instance_class,
+                            allocated_storage=specs.db_storage_gb,
+                            storage_type=specs.db_storage_type,
+                            db_name='miniinfragpt',
+                            username='admin',
+                            password='ChangeMe123!',
+                            db_subnet_group_name=subnet_group.ref('name'),
+                            vpc_security_group_ids=[db_sg.ref('id')],
+                            skip_final_snapshot=True,
+                            publicly_accessible=False,
+                            tags=_tags('mini-infra-gpt-database'))
+        if specs.db_iops:
+            graph.attributes(db.address)['iops'] = specs.db_iops
+
+        graph.output('database_endpoint', db.ref('endpoint'),
+                     'Database endpoint')
+        graph.output('database_name', db.ref('db_name'), 'Database name')
+
+    return graph
+
+
+@lru_cache(maxsize=1024)
+def _render_json(specs):
+    return build_graph(specs).to_json()
+
+
+def render_terraform_json(specs):
+    """
+    Render the configuration as Terraform JSON (main.tf.json contents)
+
+    Args:
+        specs (InfraSpec): Parsed specs (a legacy specs dict is also accepted)
+    """
+    return _render_json(InfraSpec.coerce(specs))
+
+
+def render_providers_json(specs):
+    """
+    Only the `terraform {}` block as Terraform JSON - enough for
+    `terraform init` before the rest of the configuration exists
+    """
+    graph = ResourceGraph()
+    graph.terraform = build_graph(InfraSpec.coerce(specs)).terraform
+    return graph.to_json()
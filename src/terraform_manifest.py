@@ -0,0 +1,121 @@
+"""
+Terraform Manifest - Content hashes and pipeline state for a generated directory
+
+The manifest (`.mini-infra-gpt.json` next to the generated files) records
+the hash of every generated file, so unchanged output is never rewritten,
+and which configuration the deployer last initialized, planned and applied.
+"""
+
+import os
+
+MANIFEST_NAME = '.mini-infra-gpt.json'
+
+
+def content_hash(text):
+    """SHA-256 hex digest of a str or bytes"""
+    import hashlib
+
+    if isinstance(text, str):
+        text = text.encode()
+    return hashlib.sha256(text).hexdigest()
+
+
+def atomic_write(path, data):
+    """
+    Write `data` (str or bytes) to `path` via a temp file and rename, so
+    concurrent readers see either the old or the new file, never a partial one
+    """
+    import tempfile
+
+    directory = os.path.dirname(path) or '.'
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                    prefix=f'.{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_manifest(directory):
+    """Return the manifest dict for `directory` ({} if missing or corrupt)"""
+    import json
+
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(directory, manifest):
+    import json
+
+    atomic_write(os.path.join(directory, MANIFEST_NAME),
+                 json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+
+
+def update_manifest(directory, **fields):
+    """Merge `fields` into the manifest and write it back"""
+    manifest = read_manifest(directory)
+    manifest.update(fields)
+    write_manifest(directory, manifest)
+    return manifest
+
+
+def write_if_changed(directory, filename, text, manifest):
+    """
+    Write `text` to directory/filename unless the manifest and the file on
+    disk already hold exactly this content
+
+    Updates manifest['files'] in place (the caller writes the manifest).
+
+    Returns:
+        bool: True if the file was written, False if it was unchanged
+    """
+    path = os.path.join(directory, filename)
+    digest = content_hash(text)
+    files = manifest.setdefault('files', {})
+
+    if files.get(filename) == digest:
+        # Trust the manifest only if the file wasn't edited by hand since
+        try:
+            with open(path, 'rb') as f:
+                if content_hash(f.read()) == digest:
+                    return False
+        except OSError:
+            pass
+
+    atomic_write(path, text)
+    files[filename] = digest
+    return True
+
+
+def is_current(directory, stage, key='config_hash'):
+    """
+    Check whether a pipeline stage already ran for the current configuration
+
+    Args:
+        directory (str): Generated Terraform directory
+        stage (str): 'initialized', 'planned' or 'applied'
+        key (str): Manifest hash the stage depends on - 'providers_hash'
+            for init, 'config_hash' for plan/apply
+    """
+    manifest = read_manifest(directory)
+    return bool(manifest.get(key)) and manifest.get(stage) == manifest[key]
+
+
+def mark_stage(directory, stage, key='config_hash'):
+    """Record that `stage` ran for the manifest's current `key` hash"""
+    manifest = read_manifest(directory)
+    if manifest.get(key):
+        manifest[stage] = manifest[key]
+        write_manifest(directory, manifest)
@@ -0,0 +1,168 @@
+"""
+Terraform Providers - Shared plugin cache, local mirror and lock files
+
+Every generated directory needs the same AWS provider. Instead of each
+`terraform init` downloading it, all stacks share:
+
+- a plugin cache directory (TF_PLUGIN_CACHE_DIR), so a provider version is
+  downloaded at most once per machine
+- optionally a local filesystem mirror (`terraform providers mirror`), used
+  instead of the registry so init works fully offline
+- the `.terraform.lock.hcl` of the first stack initialized for a provider
+  set, so later stacks resolve the same versions without a registry lookup
+  and can link the cached plugins (Terraform only reuses cached plugins
+  whose checksums are already in the lock file)
+"""
+
+import os
+import re
+import shutil
+
+try:
+    from .terraform_manifest import atomic_write, content_hash, read_manifest
+except ImportError:
+    from terraform_manifest import atomic_write, content_hash, read_manifest
+
+LOCK_FILE = '.terraform.lock.hcl'
+
+# Shared state lives here unless overridden by the environment
+HOME_DIR = os.environ.get('MINI_INFRA_GPT_HOME',
+                          os.path.join(os.path.expanduser('~'),
+                                       '.mini-infra-gpt'))
+
+# Providers are only installed from here (never the registry) when set
+MIRROR_ENV = 'MINI_INFRA_GPT_PROVIDER_MIRROR'
+
+
+def plugin_cache_dir():
+    """Shared plugin cache (TF_PLUGIN_CACHE_DIR if the user already set one)"""
+    return os.environ.get('TF_PLUGIN_CACHE_DIR') or os.path.join(
+        HOME_DIR, 'plugin-cache')
+
+
+def provider_mirror_dir():
+    """Local filesystem mirror from MINI_INFRA_GPT_PROVIDER_MIRROR, or None"""
+    return os.environ.get(MIRROR_ENV) or None
+
+
+_PROVIDER_INSTALLATION = re.compile(r'^\s*provider_installation\b', re.M)
+
+
+def _cli_config(cache_dir, mirror_dir, user_config=None):
+    """
+    Terraform CLI configuration for the shared cache and mirror
+
+    With `user_config` (the text of the user's own CLI config) the mirror
+    settings are appended to it; the cache is then set through
+    TF_PLUGIN_CACHE_DIR alone, so a plugin_cache_dir there is not redefined.
+    """
+    if user_config is None:
+        config = f'plugin_cache_dir = "{cache_dir}"\n'
+    else:
+        config = user_config.rstrip('\n') + '\n'
+    if mirror_dir:
+        config += f'''
+provider_installation {{
+  filesystem_mirror {{
+    path    = "{mirror_dir}"
+    include = ["*/*/*"]
+  }}
+  direct {{
+    exclude = ["*/*/*"]
+  }}
+}}
+'''
+    return config
+
+
+def terraform_env(mirror_dir=None):
+    """
+    Environment for running terraform with the shared provider setup
+
+    Writes a CLI config file (only when its content changes) and points
+    TF_CLI_CONFIG_FILE at it. A CLI config the user already set is kept
+    as is without a mirror, and copied with the mirror settings added
+    with one.
+
+    Args:
+        mirror_dir (str): Local provider mirror to install from instead of
+            the registry (default: MINI_INFRA_GPT_PROVIDER_MIRROR)
+
+    Returns:
+        dict: os.environ plus the Terraform settings
+
+    Raises:
+        ValueError: If a mirror is requested but the user's CLI config
+            already has its own provider_installation block
+    """
+    mirror_dir = mirror_dir or provider_mirror_dir()
+    cache_dir = plugin_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    env = dict(os.environ)
+    env['TF_IN_AUTOMATION'] = '1'
+    env['TF_PLUGIN_CACHE_DIR'] = cache_dir
+    user_config = None
+    if 'TF_CLI_CONFIG_FILE' in env:
+        if not mirror_dir:
+            return env
+        with open(env['TF_CLI_CONFIG_FILE']) as f:
+            user_config = f.read()
+        if _PROVIDER_INSTALLATION.search(user_config):
+            raise ValueError(
+                f"{env['TF_CLI_CONFIG_FILE']} (TF_CLI_CONFIG_FILE) already "
+                f"sets provider_installation; add the mirror {mirror_dir} "
+                f"there or drop the mirror option")
+
+    config = _cli_config(os.path.abspath(cache_dir),
+                         mirror_dir and os.path.abspath(mirror_dir),
+                         user_config)
+    path = os.path.join(HOME_DIR, f'terraformrc-{content_hash(config)[:12]}')
+    if not os.path.exists(path):
+        os.makedirs(HOME_DIR, exist_ok=True)
+        atomic_write(path, config)
+    env['TF_CLI_CONFIG_FILE'] = path
+    return env
+
+
+def _shared_lock_path(providers_hash):
+    return os.path.join(HOME_DIR, 'locks', f'{providers_hash}.hcl')
+
+
+def seed_lock_file(terraform_dir):
+    """
+    Copy the shared lock file for this directory's provider set into it,
+    unless the directory already has its own
+
+    Returns:
+        bool: True if a lock file was copied in
+    """
+    providers_hash = read_manifest(terraform_dir).get('providers_hash')
+    target = os.path.join(terraform_dir, LOCK_FILE)
+    if not providers_hash or os.path.exists(target):
+        return False
+
+    source = _shared_lock_path(providers_hash)
+    if not os.path.exists(source):
+        return False
+    shutil.copyfile(source, target)
+    return True
+
+
+def share_lock_file(terraform_dir):
+    """Publish the directory's lock file for other stacks with its providers"""
+    providers_hash = read_manifest(terraform_dir).get('providers_hash')
+    source = os.path.join(terraform_dir, LOCK_FILE)
+    if not providers_hash or not os.path.exists(source):
+        return
+
+    with open(source) as f:
+        lock = f.read()
+    target = _shared_lock_path(providers_hash)
+    try:
+        with open(target) as f:
+            if f.read() == lock:
+                return
+    except OSError:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+    atomic_write(target, lock)
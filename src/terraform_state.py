@@ -0,0 +1,232 @@
+"""
+Terraform State - Read outputs and resource attributes from local state
+
+`terraform output` starts a Terraform process and loads the whole state
+for every call. With the local backend the same data is in
+terraform.tfstate, so it is read in-process instead:
+
+- streaming: the top-level object is decoded one key at a time and
+  `resources` one resource at a time, so reading outputs (which Terraform
+  writes before the resources) never materializes the resources at all
+- cached per file by (mtime, size), so repeated reads cost a stat() call
+
+Directories configured for a remote backend fall back to the CLI.
+"""
+
+import json
+import os
+import subprocess
+
+STATE_FILE = 'terraform.tfstate'
+
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+
+# path -> ((mtime_ns, size), outputs)
+_outputs_cache = {}
+
+
+class _JsonStream:
+    """Incremental decoder over a file holding one JSON object"""
+
+    def __init__(self, f):
+        self._file = f
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        chunk = self._file.read(size or _CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in _WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed state: expected {char!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer end may be cut short
+                # (e.g. a number), unless the file has no more data
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Grow geometrically so a large value is re-scanned O(log n) times
+            self._fill(max(_CHUNK_SIZE, len(self._buffer) - self._pos))
+
+    def members(self):
+        """Yield the keys of the object at the current position; the caller
+        consumes each value (with value() or items()) before the next key"""
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def items(self):
+        """Yield the elements of the array at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def uses_remote_backend(terraform_dir):
+    """Whether `terraform init` configured a non-local backend"""
+    try:
+        with open(os.path.join(terraform_dir, '.terraform', STATE_FILE)) as f:
+            backend = json.load(f).get('backend') or {}
+    except (OSError, ValueError):
+        return False
+    return backend.get('type', 'local') != 'local'
+
+
+def _stream_state(path):
+    """Yield (key, stream) for each top-level state key, value unread"""
+    with open(path) as f:
+        stream = _JsonStream(f)
+        for key in stream.members():
+            yield key, stream
+
+
+def _read_outputs(path):
+    for key, stream in _stream_state(path):
+        if key == 'outputs':
+            return stream.value()
+        if key == 'resources':
+            for _ in stream.items():
+                pass
+        else:
+            stream.value()
+    return {}
+
+
+def read_outputs(terraform_dir):
+    """
+    Outputs in the shape of `terraform output -json`
+
+    Returns:
+        dict: name -> {'value', 'type', 'sensitive'} ({} before any apply)
+    """
+    if uses_remote_backend(terraform_dir):
+        result = subprocess.run(['terraform', 'output', '-json'],
+                                cwd=terraform_dir, check=True,
+                                capture_output=True, text=True)
+        return json.loads(result.stdout)
+
+    path = os.path.join(terraform_dir, STATE_FILE)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _outputs_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    outputs = _read_outputs(path)
+    _outputs_cache[path] = (key, outputs)
+    return outputs
+
+
+def read_output(terraform_dir, name):
+    """Value of one output (like `terraform output -raw`), or None"""
+    output = read_outputs(terraform_dir).get(name)
+    return None if output is None else output.get('value')
+
+
+def format_raw(value):
+    """
+    An output value as `terraform output -raw` prints it: strings as they
+    are, numbers and bools in their HCL/JSON spelling ('true', '3'), lists
+    and maps as JSON
+    """
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def resource_attributes(terraform_dir, address, index=0):
+    """
+    Attributes of a resource instance, streamed from local state
+
+    Args:
+        terraform_dir (str): Terraform directory with a local state
+        address (str): e.g. 'aws_instance.web' or 'data.aws_ami.amazon_linux_2'
+        index (int): Instance number for count/for_each resources
+
+    Returns:
+        dict: The instance attributes, or None if not in the state
+    """
+    mode = 'managed'
+    if address.startswith('data.'):
+        mode, address = 'data', address[len('data.'):]
+    type_, name = address.split('.', 1)
+
+    path = os.path.join(terraform_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    for key, stream in _stream_state(path):
+        if key != 'resources':
+            stream.value()
+            continue
+        for resource in stream.items():
+            if (resource.get('mode') == mode and resource.get('type') == type_
+                    and resource.get('name') == name
+                    and 'module' not in resource):
+                instances = resource.get('instances', [])
+                if index < len(instances):
+                    return instances[index].get('attributes')
+                return None
+        return None
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Shell helper: `python src/terraform_state.py DIR NAME` prints the raw
+    # value of output NAME, like `terraform output -raw NAME`
+    if len(sys.argv) != 3:
+        sys.exit("usage: terraform_state.py TERRAFORM_DIR OUTPUT_NAME")
+    value = read_output(sys.argv[1], sys.argv[2])
+    if value is None:
+        sys.exit(f"Output {sys.argv[2]!r} not found")
+    print(format_raw(value))
@@ -0,0 +1,116 @@
+"""
+Pytest configuration - makes the src/ modules importable like the tests expect
+"""
+
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import terraform_providers  # noqa: E402
+
+# Stand-in `terraform` binary: logs each call (argv, cwd, the Terraform
+# environment and start/end times) as a JSON line and fakes the files the
+# real commands create. Behaviour knobs (environment variables):
+#   FAKE_TERRAFORM_SLEEP     seconds each call takes
+#   FAKE_TERRAFORM_FAIL      "<command>:<dir basename>" pairs that exit 1
+#   FAKE_TERRAFORM_NO_CHANGES  plan -detailed-exitcode reports no changes
+# `apply -json` emits creation events for a VPC (2s) and an RDS instance (300s).
+_FAKE_TERRAFORM = '''\
+#!{python}
+import json, os, sys, time
+
+args = sys.argv[1:]
+start = time.time()
+print('terraform', *args, file=sys.stderr)
+time.sleep(float(os.environ.get('FAKE_TERRAFORM_SLEEP', '0')))
+
+for arg in args:
+    if arg.startswith('-out='):
+        with open(arg[len('-out='):], 'w') as f:
+            f.write('saved plan\\n')
+
+if args[:1] == ['init']:
+    os.makedirs('.terraform', exist_ok=True)
+    if not os.path.exists('.terraform.lock.hcl'):
+        with open('.terraform.lock.hcl', 'w') as f:
+            f.write('provider "registry.terraform.io/hashicorp/aws" {{}}\\n')
+
+if args[:1] == ['apply'] and '-json' in args:
+    print(json.dumps({{'type': 'version', '@message': 'Terraform 1.9.0'}}))
+    for addr, seconds in (('aws_vpc.main', 2), ('aws_db_instance.main', 300)):
+        resource = {{'addr': addr, 'resource_type': addr.split('.')[0]}}
+        print(json.dumps({{'type': 'apply_start',
+                          '@message': addr + ': Creating...',
+                          'hook': {{'resource': resource,
+                                   'action': 'create'}}}}))
+        print(json.dumps({{'type': 'apply_complete',
+                          '@message': addr + ': Creation complete',
+                          'hook': {{'resource': resource, 'action': 'create',
+                                   'elapsed_seconds': seconds}}}}))
+
+if args[:2] == ['output', '-json']:
+    print(json.dumps({{'source': {{'value': 'cli', 'type': 'string'}}}}))
+
+code = 0
+if '-detailed-exitcode' in args:
+    code = 0 if os.environ.get('FAKE_TERRAFORM_NO_CHANGES') else 2
+failing = os.environ.get('FAKE_TERRAFORM_FAIL', '').split(',')
+if f"{{args[0]}}:{{os.path.basename(os.getcwd())}}" in failing:
+    print('Error: simulated failure')
+    code = 1
+
+with open({log!r}, 'a') as f:
+    f.write(json.dumps({{
+        'args': args,
+        'cwd': os.getcwd(),
+        'env': {{k: v for k, v in os.environ.items() if k.startswith('TF_')}},
+        'start': start,
+        'end': time.time(),
+    }}) + '\\n')
+sys.exit(code)
+'''
+
+
+class FakeTerraform:
+    def __init__(self, log):
+        self.log = log
+
+    def calls(self):
+        """Logged calls, oldest first"""
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return [json.loads(line) for line in f]
+
+    def commands(self):
+        """The subcommand of every logged call, e.g. ['init', 'plan']"""
+        return [call['args'][0] for call in self.calls()]
+
+
+@pytest.fixture(autouse=True)
+def terraform_home(tmp_path, monkeypatch):
+    """Keep the shared plugin cache, lock files and CLI config per test"""
+    home = tmp_path / "mini-infra-gpt-home"
+    monkeypatch.setattr(terraform_providers, 'HOME_DIR', str(home))
+    for name in ('TF_PLUGIN_CACHE_DIR', 'TF_CLI_CONFIG_FILE',
+                 terraform_providers.MIRROR_ENV):
+        monkeypatch.delenv(name, raising=False)
+    return home
+
+
+@pytest.fixture
+def fake_terraform(tmp_path, monkeypatch):
+    """Put a logging stub `terraform` first on PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = str(tmp_path / "terraform-calls.jsonl")
+    script = bin_dir / "terraform"
+    script.write_text(_FAKE_TERRAFORM.format(python=sys.executable, log=log))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return FakeTerraform(log)
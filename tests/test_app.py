@@ -0,0 +1,88 @@
+"""
+Tests for the demo web app served on the instance (app.py)
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as webapp  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return webapp.app.test_client()
+
+
+def test_homepage_has_host_info_and_validators(client):
+    response = client.get('/')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    hostname = webapp.resolve_host()[0]
+    assert f"<strong>🖥️ Hostname:</strong> {hostname}" in response.text
+    assert "UTC" in response.text
+
+@pytest.mark.parametrize('header', ['{etag}', 'W/{etag}', '"other", {etag}',
+                                    '*'])
+def test_conditional_get_returns_304(client, header):
+    etag = client.get('/').headers['ETag'].removeprefix('W/')
+
+    response = client.get('/', headers={'If-None-Match':
+                                        header.format(etag=etag)})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+def test_stale_etag_gets_the_page(client):
+    response = client.get('/', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+
+def test_request_path_does_not_resolve(client, monkeypatch):
+    def resolver(name):
+        raise AssertionError("resolver called on the request path")
+    monkeypatch.setattr(webapp.socket, 'gethostbyname', resolver)
+
+    assert client.get('/').status_code == 200
+    assert client.get('/health').status_code == 200
+
+def test_host_info_refreshes_periodically(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(webapp, 'HOST_REFRESH_SECONDS', 60)
+    monkeypatch.setattr(webapp, 'resolve_host',
+                        lambda: lookups.append(1) or ('web-2', '10.0.1.9'))
+    monkeypatch.setattr(webapp, '_page', webapp.build_page('web-1', '10.0.1.5',
+                                                           resolved_at=0))
+
+    assert b'web-1' in webapp.current_page(30).head
+    assert lookups == []
+    page = webapp.current_page(61)
+    assert lookups == [1]
+    assert b'10.0.1.9' in page.head
+    assert webapp.current_page(100) is page
+
+def test_health(client):
+    response = client.get('/health')
+
+    body = json.loads(response.data)
+    assert body['status'] == 'healthy'
+    assert body['project'] == 'mini-infra-gpt'
+    assert body['hostname'] == webapp.resolve_host()[0]
+    assert response.headers['Cache-Control'] == 'no-store'
+
+def test_probes_and_metrics(client, monkeypatch):
+    assert client.get('/health/live').data == b'ok\n'
+    assert client.get('/health/ready').status_code == 200
+
+    monkeypatch.setattr(webapp.METRICS, 'warm', False)
+    assert client.get('/health').status_code == 503
+    assert client.get('/health/live').status_code == 200
+
+    text = client.get('/metrics').text
+    assert 'http_requests_total{route="/health",status="5xx"}' in text
+    assert 'http_requests_total{route="/health/live",status="2xx"}' in text
@@ -0,0 +1,90 @@
+"""
+Tests for the in-process AWS credential check (STS stubbed with botocore)
+"""
+
+import datetime
+
+import boto3
+import pytest
+from botocore.credentials import Credentials
+from botocore.stub import Stubber
+
+import aws_deployer
+import aws_identity
+from aws_identity import CredentialsError, caller_identity
+from infra_spec import InfraSpec
+from terraform_generator import write_terraform
+
+IDENTITY = {'Account': '123456789012', 'UserId': 'AIDAEXAMPLE',
+            'Arn': 'arn:aws:iam::123456789012:user/deployer'}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    aws_identity.clear_cache()
+    yield
+    aws_identity.clear_cache()
+
+
+@pytest.fixture
+def session():
+    return boto3.session.Session(aws_access_key_id='AKIAEXAMPLE',
+                                 aws_secret_access_key='secret',
+                                 region_name='us-east-1')
+
+
+@pytest.fixture
+def sts(session):
+    client = session.client('sts')
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_identity_is_cached_per_access_key(session, sts):
+    client, stubber = sts
+    stubber.add_response('get_caller_identity', IDENTITY)
+
+    first = caller_identity(session, client=client)
+    # A second STS call would fail: the stubber has no response queued
+    second = caller_identity(session, client=client)
+
+    assert first == second
+    assert first.account == '123456789012'
+    assert first.arn.endswith(':user/deployer')
+
+def test_expiring_credentials_are_not_cached(session, sts, monkeypatch):
+    client, stubber = sts
+    credentials = Credentials('ASIAEXAMPLE', 'secret', 'token')
+    credentials._expiry_time = (datetime.datetime.now(datetime.timezone.utc)
+                                + datetime.timedelta(seconds=30))
+    monkeypatch.setattr(session, 'get_credentials', lambda: credentials)
+    stubber.add_response('get_caller_identity', IDENTITY)
+    stubber.add_response('get_caller_identity', IDENTITY)
+
+    caller_identity(session, client=client)
+    caller_identity(session, client=client)
+
+def test_rejected_credentials_raise(session, sts):
+    client, stubber = sts
+    stubber.add_client_error('get_caller_identity', 'ExpiredToken',
+                             'The security token included in the request '
+                             'is expired')
+
+    with pytest.raises(CredentialsError, match='ExpiredToken'):
+        caller_identity(session, client=client)
+
+def test_deploy_checks_credentials_alongside_init(tmp_path, monkeypatch,
+                                                  fake_terraform, capsys):
+    out, _ = write_terraform(InfraSpec(), str(tmp_path / "tf"))
+
+    def rejected():
+        raise CredentialsError("The security token is invalid")
+    monkeypatch.setattr(aws_deployer, 'caller_identity', rejected)
+
+    with pytest.raises(SystemExit):
+        aws_deployer.deploy_infrastructure(out)
+
+    # Init ran while STS was asked; nothing was planned with bad credentials
+    assert fake_terraform.commands() == ['init']
+    assert "AWS credentials not configured" in capsys.readouterr().out
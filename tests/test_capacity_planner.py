@@ -0,0 +1,62 @@
+"""
+Unit tests for the capacity planner
+"""
+
+from capacity_planner import LoadProfile, extract_load, plan_capacity
+from infra_spec import InfraSpec
+from terraform_generator import render_terraform
+
+
+def test_extract_load_hints():
+    load = extract_load("API for 10k concurrent users, 1.5k req/s peak, "
+                        "2 TB of data and 600 inserts per minute")
+
+    assert load.users == 10000
+    assert load.rps == 1500
+    assert load.dataset_gb == 2048
+    assert load.writes_per_sec == 10
+    assert extract_load("simple web server").has_hints is False
+
+def test_plan_meets_target_utilization():
+    plan = plan_capacity(LoadProfile(users=5000))
+
+    assert plan.required_rps == 500
+    assert plan.instance_count >= 1
+    assert 0.4 <= plan.instance_headroom < 1
+    assert plan.db_storage_type == 'gp3'
+
+def test_plan_autoscaling_minimum():
+    plan = plan_capacity(LoadProfile(rps=10), autoscaling=True)
+
+    assert plan.instance_count == 2
+
+def test_plan_database_provisioned_iops():
+    plan = plan_capacity(LoadProfile(rps=100, dataset_gb=50,
+                                     writes_per_sec=2000),
+                         database_needed=True)
+
+    assert plan.db_storage_type == 'io1'
+    assert plan.db_iops % 1000 == 0 and plan.db_iops > 3000
+    assert plan.db_storage_gb * 50 >= plan.db_iops
+    assert plan.db_headroom >= 0.4
+
+def test_plan_database_sized_for_reads():
+    light = plan_capacity(LoadProfile(users=100), database_needed=True)
+    heavy = plan_capacity(LoadProfile(rps=5000), database_needed=True)
+
+    assert light.db_instance_class == 'db.t3.micro'
+    assert heavy.db_instance_class != light.db_instance_class
+    assert heavy.db_headroom >= 0.4
+    # A load no class can serve is reported, not hidden behind a micro class
+    assert plan_capacity(LoadProfile(users=2_000_000), database_needed=True) \
+        .db_headroom < 0
+
+def test_render_planned_database():
+    spec = InfraSpec(database_needed=True, database_type="postgres",
+                     db_instance_class="db.r6g.large", db_storage_gb=200,
+                     db_storage_type="io1", db_iops=8000)
+    tf = render_terraform(spec)
+
+    assert 'instance_class    = "db.r6g.large"' in tf
+    assert 'storage_type      = "io1"\n  iops              = 8000\n' in tf
+    assert 'iops' not in render_terraform(spec._replace(db_iops=0))
@@ -0,0 +1,86 @@
+"""
+Tests for the concurrent multi-stack deploy orchestrator (stub terraform)
+"""
+
+import os
+
+import pytest
+
+from deploy_orchestrator import deploy_stacks, format_summary
+from infra_spec import InfraSpec
+from terraform_events import resource_type_stats
+from terraform_generator import write_terraform
+
+
+def _stacks(tmp_path, count):
+    return [write_terraform(InfraSpec(region=f"us-east-{i % 2 + 1}"),
+                            str(tmp_path / f"stack-{i}"))[0]
+            for i in range(count)]
+
+
+def test_deploys_all_stacks_with_bounded_concurrency(tmp_path, monkeypatch,
+                                                     fake_terraform):
+    monkeypatch.setenv('FAKE_TERRAFORM_SLEEP', '0.1')
+    dirs = _stacks(tmp_path, 4)
+
+    outcomes = deploy_stacks(dirs, max_concurrency=2)
+
+    assert [o.stack for o in outcomes] == [f"stack-{i}" for i in range(4)]
+    assert all(o.status == 'applied' for o in outcomes)
+    assert all(set(o.durations) == {'init', 'plan', 'apply'}
+               for o in outcomes)
+    # Plans and applies overlap, but never more than two stacks at a time
+    calls = fake_terraform.calls()
+    events = sorted([(c['start'], 1) for c in calls]
+                    + [(c['end'], -1) for c in calls])
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    assert peak == 2
+    with open(outcomes[0].log_path) as f:
+        log = f.read()
+    assert "$ terraform apply -input=false -json mini-infra-gpt.tfplan" in log
+    assert "terraform plan" in log
+    assert resource_type_stats()[('aws_db_instance', 'create')]['count'] == 4
+
+def test_failure_is_isolated(tmp_path, monkeypatch, fake_terraform):
+    monkeypatch.setenv('FAKE_TERRAFORM_FAIL', 'plan:stack-1')
+    dirs = _stacks(tmp_path, 3)
+
+    outcomes = deploy_stacks(dirs, log_dir=str(tmp_path / "logs"))
+
+    assert [o.status for o in outcomes] == ['applied', 'failed', 'applied']
+    assert 'apply' not in outcomes[1].durations
+    with open(tmp_path / "logs" / "stack-1.log") as f:
+        assert "simulated failure" in f.read()
+
+def test_approval_policy_and_no_changes(tmp_path, monkeypatch,
+                                        fake_terraform):
+    dirs = _stacks(tmp_path, 2)
+
+    planned = deploy_stacks(dirs, approve=lambda stack: stack == 'stack-0')
+    assert [o.status for o in planned] == ['applied', 'planned']
+
+    # The unapproved stack keeps its saved plan: approving it later applies
+    # without planning again; the other has nothing left to change
+    monkeypatch.setenv('FAKE_TERRAFORM_NO_CHANGES', '1')
+    second = deploy_stacks(dirs, approve='all')
+    assert [o.status for o in second] == ['unchanged', 'applied']
+    assert set(second[1].durations) == {'apply'}
+
+    summary = format_summary(second)
+    assert summary.splitlines()[0].split()[:3] == ['STACK', 'STATUS', 'INIT']
+    assert 'unchanged' in summary
+    assert not os.path.exists(os.path.join(dirs[0], 'mini-infra-gpt.tfplan'))
+
+def test_duplicate_stack_names_rejected(tmp_path, fake_terraform):
+    dirs = [write_terraform(InfraSpec(), str(tmp_path / env / "app"))[0]
+            for env in ("staging", "prod")]
+
+    with pytest.raises(ValueError, match="Duplicate stack name 'app'"):
+        deploy_stacks(dirs)
+    assert fake_terraform.calls() == []
+
+    outcomes = deploy_stacks({'staging': dirs[0], 'prod': dirs[1]})
+    assert [o.status for o in outcomes] == ['applied', 'applied']
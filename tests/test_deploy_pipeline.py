@@ -0,0 +1,89 @@
+"""
+Tests for the overlapped parse -> generate -> deploy pipeline
+"""
+
+import os
+import time
+
+import pytest
+
+import aws_deployer
+from aws_identity import CallerIdentity
+from deploy_pipeline import deploy_request
+from infra_spec import InfraSpec
+from terraform_generator import write_terraform
+from terraform_manifest import read_manifest
+
+IDENTITY = CallerIdentity('123456789012', 'arn:aws:iam::123456789012:user/ci',
+                          'AIDAEXAMPLE')
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    monkeypatch.setattr(aws_deployer, 'caller_identity', lambda: IDENTITY)
+    monkeypatch.setattr('builtins.input', lambda prompt: 'yes')
+
+
+def test_init_overlaps_parsing(tmp_path, aws, fake_terraform, capsys):
+    out = str(tmp_path / "tf")
+    parsed = []
+
+    def slow_parse(request):
+        time.sleep(0.5)
+        parsed.append(time.time())
+        return InfraSpec(database_needed=True)
+
+    deploy_request("API with PostgreSQL", output_dir=out, parse=slow_parse)
+
+    assert fake_terraform.commands() == ['init', 'plan', 'apply']
+    # init ran against the provider-only config while parsing slept
+    init = fake_terraform.calls()[0]
+    assert init['end'] < parsed[0]
+    assert "Terraform already initialized" in capsys.readouterr().out
+    assert os.path.exists(os.path.join(out, 'database.tf'))
+    manifest = read_manifest(out)
+    assert manifest['initialized'] == manifest['providers_hash']
+
+def test_initialized_directory_is_not_reinitialized(tmp_path, aws,
+                                                    fake_terraform):
+    out, _ = write_terraform(InfraSpec(), str(tmp_path / "tf"))
+    aws_deployer.terraform_init(out)
+
+    deploy_request("simple web server", output_dir=out,
+                   parse=lambda request: InfraSpec())
+
+    assert fake_terraform.commands() == ['init', 'plan', 'apply']
+    # The existing configuration was never replaced by the provider-only one
+    assert os.path.exists(os.path.join(out, 'compute.tf'))
+
+def test_failed_init_stops_before_generation(tmp_path, aws, fake_terraform,
+                                             monkeypatch):
+    monkeypatch.setenv('FAKE_TERRAFORM_FAIL', 'init:tf')
+
+    with pytest.raises(SystemExit):
+        deploy_request("simple web server", output_dir=str(tmp_path / "tf"),
+                       parse=lambda request: InfraSpec())
+
+    assert fake_terraform.commands() == ['init']
+    assert not os.path.exists(str(tmp_path / "tf" / "compute.tf"))
+
+def test_existing_configuration_survives_a_failed_init(tmp_path, aws,
+                                                       fake_terraform,
+                                                       monkeypatch):
+    # Generated and applied, but not initialized here (e.g. a fresh clone)
+    out, _ = write_terraform(InfraSpec(database_needed=True),
+                             str(tmp_path / "tf"))
+    with open(os.path.join(out, 'terraform.tfstate'), 'w') as f:
+        f.write('{"version": 4}')
+    before = {name: os.path.getmtime(os.path.join(out, name))
+              for name in os.listdir(out)}
+    monkeypatch.setenv('FAKE_TERRAFORM_FAIL', 'init:tf')
+
+    with pytest.raises(SystemExit):
+        deploy_request("simple web server", output_dir=out,
+                       parse=lambda request: InfraSpec())
+
+    assert fake_terraform.commands() == ['init']
+    # Every file is still there, untouched (init only adds its own)
+    assert {name: os.path.getmtime(os.path.join(out, name))
+            for name in before} == before
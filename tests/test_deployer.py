@@ -0,0 +1,52 @@
+"""
+Unit tests for the Terraform workflow in the AWS deployer
+"""
+
+import os
+
+import aws_deployer
+from infra_spec import InfraSpec
+from terraform_generator import write_terraform
+
+
+def test_apply_consumes_saved_plan(tmp_path, monkeypatch, fake_terraform):
+    out, _ = write_terraform(InfraSpec(), str(tmp_path / "tf"))
+    monkeypatch.setattr('builtins.input', lambda prompt: 'yes')
+
+    aws_deployer.terraform_plan(out, refresh=False, parallelism=20)
+    aws_deployer.terraform_apply(out, parallelism=20)
+
+    plan, apply = [call['args'] for call in fake_terraform.calls()]
+    assert plan == ['plan', '-input=false',
+                    f'-out={aws_deployer.PLAN_FILE}', '-refresh=false',
+                    '-parallelism=20']
+    assert apply == ['apply', '-input=false', '-json', '-parallelism=20',
+                     aws_deployer.PLAN_FILE]
+    assert not os.path.exists(os.path.join(out, aws_deployer.PLAN_FILE))
+
+    # The saved plan was used up: the next run plans again
+    aws_deployer.terraform_plan(out)
+    assert fake_terraform.commands() == ['plan', 'apply', 'plan']
+
+def test_apply_reports_resource_timings(tmp_path, monkeypatch,
+                                        fake_terraform, capsys):
+    monkeypatch.setattr('builtins.input', lambda prompt: 'yes')
+    for region in ("us-east-1", "us-west-2"):
+        out, _ = write_terraform(InfraSpec(region=region), str(tmp_path / "tf"))
+        aws_deployer.terraform_plan(out)
+        aws_deployer.terraform_apply(out)
+
+    output = capsys.readouterr().out
+    assert "aws_db_instance.main: Creating..." in output
+    timings = output[output.rindex("Resource timings"):]
+    assert timings.index("aws_db_instance.main") < timings.index("aws_vpc.main")
+    assert "aws_db_instance (create)      2" in output
+
+def test_apply_without_saved_plan(tmp_path, monkeypatch, fake_terraform):
+    out, _ = write_terraform(InfraSpec(), str(tmp_path / "tf"))
+    monkeypatch.setattr('builtins.input', lambda prompt: 'yes')
+
+    aws_deployer.terraform_apply(out)
+
+    assert fake_terraform.calls()[0]['args'] == ['apply', '-input=false',
+                                                 '-json', '-auto-approve']
@@ -0,0 +1,160 @@
+"""
+Tests for the containerized Flask app (docker/app.py)
+"""
+
+import gzip
+import importlib.util
+import json
+import os
+import runpy
+import sys
+
+import pytest
+
+DOCKER_DIR = os.path.join(os.path.dirname(__file__), '..', 'docker')
+APP_PATH = os.path.join(DOCKER_DIR, 'app.py')
+CONFIG_PATH = os.path.join(DOCKER_DIR, 'gunicorn.conf.py')
+
+sys.path.insert(0, DOCKER_DIR)
+
+
+@pytest.fixture(scope='module')
+def docker_app():
+    spec = importlib.util.spec_from_file_location('docker_app', APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def client(docker_app):
+    return docker_app.app.test_client()
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=1.0, identity; q=0.5', 'gzip'),
+    ('gzip;q=0', 'identity'),
+    ('gzip;q=oops', 'identity'),
+    ('br;q=0, gzip;q=0, *', 'identity'),
+    ('br;q=0, GZIP; q=0, *', 'identity'),
+    ('br;q=0, *', 'gzip'),
+    ('deflate', 'identity'),
+    ('', 'identity'),
+])
+def test_negotiate(docker_app, header, expected):
+    assert docker_app.negotiate(header) == expected
+
+def test_wildcard_does_not_override_refusal(docker_app):
+    assert docker_app.negotiate('gzip;q=0, *') != 'gzip'
+    assert docker_app.negotiate('*;q=0.5, gzip;q=0') in ('br', 'identity')
+
+def test_brotli_preferred_when_installed(docker_app):
+    expected = 'br' if docker_app.brotli is not None else 'gzip'
+    assert docker_app.negotiate('gzip, deflate, br') == expected
+
+def test_homepage_compressed_per_accept_encoding(client):
+    plain = client.get('/')
+    packed = client.get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert packed.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(packed.data).startswith(plain.data[:200])
+    assert b'Hostname' in plain.data
+
+def test_brotli_body(client):
+    brotli = pytest.importorskip('brotli')
+
+    response = client.get('/api/info', headers={'Accept-Encoding': 'br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data))['project'] == \
+        "Mini InfraGPT"
+
+def test_homepage_rendered_once_per_second(docker_app):
+    renders = []
+    cache = docker_app.ResponseCache()
+
+    def render():
+        renders.append(1)
+        return b'<html>' + b'x' * 1000 + b'</html>'
+
+    for encoding in ('identity', 'gzip', 'gzip', 'identity'):
+        cache.get('/', encoding, 100, render)
+    assert renders == [1]
+
+    body, applied = cache.get('/', 'gzip', 101, render)
+    assert renders == [1, 1]
+    assert applied == 'gzip' and gzip.decompress(body).startswith(b'<html>')
+
+def test_api_info_matches_jsonify(docker_app, client):
+    with docker_app.app.app_context():
+        expected = docker_app.app.json.response(docker_app.INFO).get_data()
+
+    assert client.get('/api/info').data == expected
+
+def test_health(client):
+    body = json.loads(client.get('/health').data)
+
+    assert body['status'] == 'healthy'
+    assert body['version'] == '1.0.0'
+    assert set(body) == {'hostname', 'project', 'status', 'timestamp',
+                         'version'}
+
+def test_not_ready_while_warming_up(docker_app, client, monkeypatch):
+    monkeypatch.setattr(docker_app.METRICS, 'warm', False)
+
+    for path in ('/health', '/health/ready'):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert json.loads(response.data) == {'status': 'unavailable',
+                                             'reason': 'warming up'}
+    assert client.get('/health/live').status_code == 200
+
+def test_metrics_endpoint(client):
+    client.get('/api/info')
+
+    response = client.get('/metrics')
+
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert 'http_requests_total{route="/api/info",status="2xx"}' in \
+        response.text
+    assert 'http_request_duration_seconds_bucket{route="/api/info",' \
+        'le="+Inf"}' in response.text
+
+def test_server_config_defaults(monkeypatch):
+    for name in ('WEB_BIND', 'WEB_WORKERS', 'WEB_THREADS', 'WEB_PRELOAD',
+                 'WEB_MAX_REQUESTS', 'WEB_MAX_REQUESTS_JITTER', 'PORT'):
+        monkeypatch.delenv(name, raising=False)
+    # The config sets METRICS_DIR and WEB_THREADS; restore them afterwards
+    for name in ('METRICS_DIR', 'WEB_THREADS'):
+        monkeypatch.setenv(name, '')
+        monkeypatch.delenv(name)
+
+    config = runpy.run_path(CONFIG_PATH)
+
+    assert config['bind'] == '0.0.0.0:5000'
+    assert config['workers'] == 2 * config['available_cpus']() + 1
+    assert config['worker_class'] == 'gthread'
+    assert config['preload_app'] is True
+    assert config['keepalive'] > 60
+    assert config['max_requests_jitter'] == config['max_requests'] // 10
+    assert os.environ['METRICS_DIR'].endswith('mini-infra-gpt-metrics-5000')
+    # For the readiness probe's in-flight limit (metrics.py)
+    assert os.environ['WEB_THREADS'] == str(config['threads']) == '2'
+
+def test_server_config_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('METRICS_DIR', str(tmp_path))
+    monkeypatch.setenv('WEB_BIND', '127.0.0.1:8000')
+    monkeypatch.setenv('WEB_WORKERS', '3')
+    monkeypatch.setenv('WEB_THREADS', '8')
+    monkeypatch.setenv('WEB_MAX_REQUESTS', '0')
+    monkeypatch.setenv('WEB_PRELOAD', 'false')
+
+    config = runpy.run_path(CONFIG_PATH)
+
+    assert (config['bind'], config['workers'], config['threads']) == \
+        ('127.0.0.1:8000', 3, 8)
+    assert config['max_requests'] == 0 and config['max_requests_jitter'] == 0
+    assert config['preload_app'] is False
@@ -0,0 +1,194 @@
+"""
+Tests for the HTTP generation service (src/generation_service.py)
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import ai_parser
+from generation_service import (GenerationService, ServiceBusy, create_app,
+                                generate)
+from infra_spec import InfraSpec
+from terraform_generator import render_config, write_terraform
+from terraform_manifest import read_manifest
+
+
+class BlockingWork:
+    """Work function that records its calls and waits to be released"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.release = threading.Event()
+        self.fail = fail
+
+    def __call__(self, request, parser, fmt, split):
+        self.calls.append(request)
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("boom")
+        return {'files': {'main.tf': request}}
+
+
+def test_generate_matches_written_configuration(tmp_path):
+    result = generate("API with PostgreSQL", fmt='hcl', split=True)
+
+    specs = InfraSpec.from_dict(result['specs'])
+    assert result['files'] == render_config(specs)
+    write_terraform(specs, str(tmp_path))
+    assert read_manifest(str(tmp_path))['config_hash'] == result['config_hash']
+
+def test_identical_requests_in_flight_coalesce():
+    work = BlockingWork()
+    service = GenerationService(max_workers=2, work=work)
+
+    jobs = [service.submit(text) for text in
+            ("Web app with MySQL", "web app with mysql!", "A web app, MySQL")]
+    other = service.submit("API with PostgreSQL")
+    work.release.set()
+
+    assert jobs[0] is jobs[1] is jobs[2]
+    assert other is not jobs[0]
+    assert jobs[0].wait(5) and other.wait(5)
+    assert sorted(work.calls) == ["API with PostgreSQL", "Web app with MySQL"]
+    assert service.counters()['coalesced'] == 2
+
+@pytest.mark.parametrize('first, second', [
+    ("API for 1.5k users", "API for 1 5k users"),
+    ("API for 300 requests second", "API for 300 requests a second"),
+])
+def test_requests_with_different_load_do_not_coalesce(first, second):
+    work = BlockingWork()
+    service = GenerationService(max_workers=2, work=work)
+
+    jobs = [service.submit(first), service.submit(second)]
+    work.release.set()
+
+    assert jobs[0] is not jobs[1]
+    assert jobs[0].wait(5) and jobs[1].wait(5)
+    assert service.counters()['coalesced'] == 0
+
+def test_ollama_jobs_keyed_on_the_model(monkeypatch):
+    job_id = GenerationService.job_id
+    monkeypatch.setattr(ai_parser, '_ollama_client',
+                        SimpleNamespace(model='llama3.2'))
+    before = job_id("Web app with MySQL", parser='ollama')
+
+    monkeypatch.setattr(ai_parser, '_ollama_client',
+                        SimpleNamespace(model='mistral'))
+
+    assert job_id("Web app with MySQL", parser='ollama') != before
+    assert job_id("Web app with MySQL", parser='ollama') == \
+        job_id("web app with mysql!", parser='ollama')
+
+def test_finished_jobs_are_reused_until_they_expire():
+    work = BlockingWork()
+    work.release.set()
+    service = GenerationService(max_workers=1, work=work)
+
+    first = service.submit("web server")
+    first.wait(5)
+    assert service.submit("web server") is first
+    assert service.counters()['reused'] == 1
+
+    service.job_ttl = -1
+    assert service.get(first.id) is None
+    service.submit("web server").wait(5)
+    assert len(work.calls) == 2
+
+def test_failed_jobs_report_and_retry():
+    work = BlockingWork(fail=True)
+    work.release.set()
+    service = GenerationService(max_workers=1, work=work)
+
+    job = service.submit("web server")
+    job.wait(5)
+
+    assert job.status == 'failed' and 'boom' in job.error
+    retry = service.submit("web server")
+    assert retry is not job
+    retry.wait(5)
+    assert len(work.calls) == 2
+
+def test_pending_jobs_are_bounded():
+    work = BlockingWork()
+    service = GenerationService(max_workers=1, max_pending=1, work=work)
+    service.submit("web server")
+
+    with pytest.raises(ServiceBusy):
+        service.submit("API with PostgreSQL")
+    work.release.set()
+
+def test_eviction_keeps_pending_jobs():
+    work = BlockingWork()
+    service = GenerationService(max_workers=1, max_jobs=1, work=work)
+    pending = service.submit("web server")
+    second = service.submit("API with PostgreSQL")
+
+    assert service.get(pending.id) is pending
+    work.release.set()
+    second.wait(5)
+
+
+@pytest.fixture
+def blocked():
+    work = BlockingWork()
+    service = GenerationService(max_workers=1, max_pending=2, work=work)
+    yield work, service, create_app(service).test_client()
+    work.release.set()
+
+def test_post_returns_the_rendered_files():
+    client = create_app(GenerationService(max_workers=1)).test_client()
+
+    response = client.post('/v1/generate', json={'request': 'web app',
+                                                  'split': False})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'done'
+    assert list(body['files']) == ['main.tf']
+    assert body['specs']['app_type'] == 'web'
+
+def test_async_job_can_be_polled(blocked):
+    work, service, client = blocked
+
+    response = client.post('/v1/generate', json={'request': 'web app',
+                                                  'wait': 0})
+    assert response.status_code == 202
+    location = response.headers['Location']
+    assert client.get(location).status_code == 202
+
+    work.release.set()
+    service.get(response.get_json()['job_id']).wait(5)
+    done = client.get(location)
+    assert done.status_code == 200
+    assert done.get_json()['files'] == {'main.tf': 'web app'}
+
+def test_busy_service_answers_503(blocked):
+    work, service, client = blocked
+    for text in ('web app', 'api'):
+        client.post('/v1/generate', json={'request': text, 'wait': 0})
+
+    response = client.post('/v1/generate', json={'request': 'database',
+                                                  'wait': 0})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+@pytest.mark.parametrize('payload', [
+    None, [], {}, {'request': ' '}, {'request': 'x' * 5000},
+    {'request': 'web', 'parser': 'gpt'}, {'request': 'web', 'format': 'yaml'},
+    {'request': 'web', 'split': 'yes'}, {'request': 'web', 'wait': -1},
+])
+def test_invalid_requests_are_rejected(payload):
+    client = create_app(GenerationService(max_workers=1)).test_client()
+
+    response = client.post('/v1/generate', json=payload)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_unknown_job_is_404():
+    client = create_app(GenerationService(max_workers=1)).test_client()
+    assert client.get('/v1/jobs/0123').status_code == 404
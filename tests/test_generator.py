@@ -0,0 +1,278 @@
+"""
+Unit tests for the Terraform generator
+"""
+
+import os
+
+import pytest
+
+import aws_deployer
+from infra_spec import InfraSpec
+from terraform_generator import (BLOCK_CACHE_SIZE, RESOURCE_BLOCKS, Block,
+                                 _render_context, generate_stacks,
+                                 render_terraform, render_terraform_files,
+                                 stack_id, write_terraform)
+from terraform_manifest import read_manifest
+
+
+def test_render_basic_stack():
+    tf = render_terraform(InfraSpec(region="eu-west-1"))
+
+    assert 'region = "eu-west-1"' in tf
+    assert 'resource "aws_instance" "web"' in tf
+    assert 'aws_db_instance' not in tf
+
+def test_render_database_stack():
+    tf = render_terraform(InfraSpec(database_needed=True, database_type="mysql"))
+
+    assert 'engine            = "mysql"' in tf
+    assert 'from_port       = 3306' in tf
+    assert tf.index('output "application_url"') < tf.index('aws_db_instance')
+
+def test_render_honors_instance_type():
+    tf = render_terraform(InfraSpec(instance_type="t3.large"))
+
+    assert 'instance_type = "t3.large"' in tf
+
+def test_render_autoscaling_stack():
+    spec = InfraSpec(autoscaling=True, min_size=2, max_size=10)
+    files = render_terraform_files(spec)
+
+    assert list(files) == ['providers.tf', 'network.tf', 'compute.tf',
+                           'loadbalancer.tf', 'outputs.tf']
+    assert 'aws_instance' not in files['compute.tf']
+    assert 'resource "aws_autoscaling_group" "web"' in files['compute.tf']
+    assert 'min_size                  = 2' in files['compute.tf']
+    assert 'max_size                  = 10' in files['compute.tf']
+    assert 'ALBRequestCountPerTarget' in files['compute.tf']
+    assert 'resource "aws_subnet" "public_b"' in files['network.tf']
+    assert 'path                = "/health"' in files['loadbalancer.tf']
+    assert 'output "alb_dns_name"' in files['outputs.tf']
+    assert 'instance_public_ip' not in files['outputs.tf']
+
+def test_render_accepts_legacy_dict():
+    spec = InfraSpec(app_type="api")
+
+    assert render_terraform(spec.to_dict()) == render_terraform(spec)
+
+def test_block_static_and_cached():
+    static = Block('static', 'resource "x" "y" {}\n')
+    dynamic = Block('dynamic', 'region = "{{ region }}" # {{ region }}\n')
+
+    assert static.fields == ()
+    assert static.render({}) == 'resource "x" "y" {}\n'
+    assert dynamic.fields == ('region',)
+    first = dynamic.render({'region': 'us-east-1'})
+    assert first == 'region = "us-east-1" # us-east-1\n'
+    assert dynamic.render({'region': 'us-east-1'}) is first
+
+def test_block_cache_is_bounded():
+    block = Block('sized', 'count = {{ min_size }}\n')
+    for size in range(BLOCK_CACHE_SIZE * 3):
+        assert block.render({'min_size': size}) == f'count = {size}\n'
+
+    assert block._substitute.cache_info().currsize == BLOCK_CACHE_SIZE
+    # Equal but differently typed values render differently
+    assert block.render({'min_size': True}) == 'count = True\n'
+
+@pytest.mark.parametrize('spec', [
+    InfraSpec(),
+    InfraSpec(database_needed=True, database_type="mysql", db_iops=4000,
+              db_storage_type="io1"),
+    InfraSpec(autoscaling=True, min_size=3, max_size=6, region="eu-west-1"),
+    InfraSpec(database_needed=True, database_type="postgres",
+              autoscaling=True, min_size=2, max_size=4),
+])
+def test_layouts_match_block_by_block_rendering(spec):
+    context = _render_context(spec)
+    active = [block for block in RESOURCE_BLOCKS
+              if block.when is None or block.when(spec)]
+
+    assert render_terraform(spec) == ''.join(block.render(context)
+                                             for block in active)
+    expected = {}
+    for block in active:
+        expected[block.file] = (expected.get(block.file, '')
+                                + block.render(context))
+    assert render_terraform_files(spec) == {
+        name: text.lstrip('\n') for name, text in expected.items()}
+
+def test_render_split_files():
+    spec = InfraSpec(database_needed=True, database_type="postgres")
+    files = render_terraform_files(spec)
+
+    assert list(files) == ['providers.tf', 'network.tf', 'compute.tf',
+                           'outputs.tf', 'database.tf']
+    assert 'aws_vpc' in files['network.tf']
+    assert 'aws_db_instance' in files['database.tf']
+    assert 'database_endpoint' in files['outputs.tf']
+    assert all(not text.startswith('\n') for text in files.values())
+    assert sorted(''.join(files.values()).split()) == \
+        sorted(render_terraform(spec).split())
+
+def test_write_skips_unchanged(tmp_path):
+    out = str(tmp_path / "tf")
+    _, changed = write_terraform(InfraSpec(), out)
+    assert changed == ['providers.tf', 'network.tf', 'compute.tf',
+                       'outputs.tf']
+    network = os.path.join(out, 'network.tf')
+    mtime = os.stat(network).st_mtime_ns
+
+    _, changed = write_terraform(InfraSpec(), out)
+    assert changed == []
+    assert os.stat(network).st_mtime_ns == mtime
+
+    manifest = read_manifest(out)
+    assert set(manifest['files']) == {name for name in os.listdir(out)
+                                      if name.endswith('.tf')}
+
+# Start of the main.tf the original generator wrote (no manifest)
+_BASELINE_MAIN_TF = """
+terraform {
+  required_version = ">= 1.0"
+}
+
+provider "aws" {
+  region = "us-east-1"
+}
+
+# VPC
+resource "aws_vpc" "main" {
+  cidr_block = "10.0.0.0/16"
+
+  tags = {
+    Name    = "mini-infra-gpt-vpc"
+    Project = "mini-infra-gpt"
+  }
+}
+"""
+
+@pytest.mark.parametrize('legacy_name', ['main.tf', 'main.tf.json'])
+def test_write_upgrades_baseline_output(tmp_path, legacy_name):
+    out = tmp_path / "tf"
+    out.mkdir()
+    (out / legacy_name).write_text(_BASELINE_MAIN_TF)
+
+    _, changed = write_terraform(InfraSpec(), str(out))
+
+    assert legacy_name in changed
+    assert not (out / legacy_name).exists()
+    config = ''.join(path.read_text() for path in out.glob('*.tf'))
+    assert config.count('resource "aws_vpc"') == 1
+    assert config.count('terraform {') == 1
+    assert write_terraform(InfraSpec(), str(out))[1] == []
+
+def test_write_leaves_hand_written_main_tf(tmp_path):
+    out = tmp_path / "tf"
+    out.mkdir()
+    (out / 'main.tf').write_text('resource "aws_s3_bucket" "logs" {}\n')
+
+    write_terraform(InfraSpec(), str(out))
+
+    assert (out / 'main.tf').read_text() == 'resource "aws_s3_bucket" "logs" {}\n'
+    assert 'main.tf' not in read_manifest(str(out))['files']
+
+def test_write_only_changed_files(tmp_path):
+    out = str(tmp_path / "tf")
+    write_terraform(InfraSpec(), out)
+    network = os.path.join(out, 'network.tf')
+    mtime = os.stat(network).st_mtime_ns
+
+    _, changed = write_terraform(InfraSpec(database_needed=True,
+                                           database_type="mysql"), out)
+    assert changed == ['outputs.tf', 'database.tf']
+    assert os.stat(network).st_mtime_ns == mtime
+
+    _, changed = write_terraform(InfraSpec(), out)
+    assert changed == ['outputs.tf', 'database.tf']
+    assert not os.path.exists(os.path.join(out, 'database.tf'))
+
+def test_switching_layout_removes_owned_files(tmp_path):
+    out = str(tmp_path / "tf")
+    write_terraform(InfraSpec(), out, split=False)
+    with open(os.path.join(out, 'extra.tf'), 'w') as f:
+        f.write('# user file\n')
+
+    write_terraform(InfraSpec(), out)
+
+    assert not os.path.exists(os.path.join(out, 'main.tf'))
+    assert os.path.exists(os.path.join(out, 'extra.tf'))
+
+def test_write_repairs_hand_edited_file(tmp_path):
+    out = str(tmp_path / "tf")
+    write_terraform(InfraSpec(), out, split=False)
+    path = os.path.join(out, 'main.tf')
+    with open(path, 'a') as f:
+        f.write("# edited\n")
+
+    _, changed = write_terraform(InfraSpec(), out, split=False)
+
+    assert changed == ['main.tf']
+    assert open(path).read() == render_terraform(InfraSpec())
+
+def test_deployer_skips_redundant_init_and_plan(tmp_path, fake_terraform):
+    out = str(tmp_path / "tf")
+    write_terraform(InfraSpec(), out)
+
+    aws_deployer.terraform_init(out)
+    aws_deployer.terraform_plan(out)
+    aws_deployer.terraform_init(out)
+    aws_deployer.terraform_plan(out)
+    assert fake_terraform.commands() == ['init', 'plan']
+
+    # A new configuration must be planned again, but not re-initialized
+    write_terraform(InfraSpec(region="eu-west-1"), out)
+    aws_deployer.terraform_init(out)
+    aws_deployer.terraform_plan(out)
+    assert fake_terraform.commands() == ['init', 'plan', 'plan']
+
+def test_generate_stacks_per_directory(tmp_path):
+    base = str(tmp_path / "stacks")
+    specs = [InfraSpec(region=f"us-east-{i % 2 + 1}") for i in range(6)]
+    stacks = [(f"tenant-{i}", spec) for i, spec in enumerate(specs)]
+
+    results = generate_stacks(stacks, base_dir=base, max_workers=2)
+
+    assert [r.stack_id for r in results] == [f"tenant-{i}" for i in range(6)]
+    for result, spec in zip(results, specs):
+        assert result.changed
+        with open(os.path.join(result.path, 'providers.tf')) as f:
+            assert spec.region in f.read()
+    assert not any(r.changed for r in generate_stacks(stacks, base_dir=base,
+                                                      max_workers=2))
+
+def test_generate_stacks_default_ids(tmp_path):
+    # Identical requests from different tenants keep separate directories
+    results = generate_stacks([InfraSpec(), InfraSpec(), InfraSpec()],
+                              base_dir=str(tmp_path), max_workers=1)
+
+    key = InfraSpec().to_json()
+    assert [r.stack_id for r in results] == [stack_id(key, i) for i in range(3)]
+    assert len({r.path for r in results}) == 3
+
+    with pytest.raises(ValueError):
+        generate_stacks([("../escape", InfraSpec())], base_dir=str(tmp_path))
+
+def test_generate_stacks_ids_survive_inserted_lines(tmp_path):
+    specs = [InfraSpec(region="eu-west-1"), InfraSpec(),
+             InfraSpec(app_type="api"), InfraSpec()]
+    before = generate_stacks(specs, base_dir=str(tmp_path), max_workers=1)
+
+    inserted = specs[:1] + [InfraSpec(database_needed=True,
+                                      database_type="postgres")] + specs[1:]
+    after = generate_stacks(inserted, base_dir=str(tmp_path), max_workers=1)
+
+    assert [r.stack_id for r in after[:1] + after[2:]] == \
+        [r.stack_id for r in before]
+    # Every existing tenant's directory is left as it was
+    assert not any(r.changed for r in after[:1] + after[2:])
+    assert after[1].changed
+
+@pytest.mark.parametrize('stacks', [
+    [("tenant-a", InfraSpec()), ("tenant-a", InfraSpec(app_type="api"))],
+    [InfraSpec(), (stack_id(InfraSpec().to_json()), InfraSpec())],
+])
+def test_generate_stacks_rejects_duplicate_ids(tmp_path, stacks):
+    with pytest.raises(ValueError, match="Duplicate"):
+        generate_stacks(stacks, base_dir=str(tmp_path), max_workers=1)
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,42 @@
+"""
+Unit tests for InfraSpec
+"""
+
+import pytest
+
+from infra_spec import InfraSpec
+
+
+def test_spec_is_immutable_and_hashable():
+    spec = InfraSpec(database_needed=True, database_type="mysql")
+
+    with pytest.raises(AttributeError):
+        spec.region = "eu-west-1"
+    assert len({spec, InfraSpec(database_needed=True, database_type="mysql")}) == 1
+
+def test_spec_round_trips():
+    spec = InfraSpec(instance_type="t3.large", database_needed=True,
+                     database_type="postgres", region="eu-west-1",
+                     app_type="api")
+
+    assert InfraSpec.from_json(spec.to_json()) == spec
+    assert InfraSpec.from_bytes(spec.to_bytes()) == spec
+    assert InfraSpec.from_dict(spec.to_dict()) == spec
+    assert len(spec.to_bytes()) < len(spec.to_json())
+
+def test_binary_string_length_limit():
+    longest = InfraSpec(region="r" * 255, db_storage_type="é" * 127)
+    assert InfraSpec.from_bytes(longest.to_bytes()) == longest
+
+    # Limits are in UTF-8 bytes, not characters
+    for spec in (InfraSpec(region="r" * 256), InfraSpec(region="é" * 128)):
+        with pytest.raises(ValueError, match="region"):
+            spec.to_bytes()
+
+def test_coerce_accepts_legacy_dict():
+    legacy = {"instance_type": "t2.micro", "database_needed": False,
+              "database_type": "none", "region": "us-east-1",
+              "app_type": "web", "unknown": 1}
+
+    assert InfraSpec.coerce(legacy) == InfraSpec()
+    assert InfraSpec.coerce(InfraSpec()) == InfraSpec()
@@ -0,0 +1,205 @@
+"""
+Tests for the request metrics and health probes (docker/metrics.py)
+"""
+
+import os
+import re
+import sys
+import time
+
+import pytest
+from flask import Flask, abort
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'docker'))
+
+import metrics  # noqa: E402
+
+
+def make_app(directory=None, **options):
+    app = Flask(__name__)
+
+    @app.route('/')
+    def home():
+        return 'home'
+
+    @app.route('/items/<int:item>')
+    def item(item):
+        if item > 10:
+            abort(404)
+        return str(item)
+
+    return app, metrics.RequestMetrics(app, directory=directory,
+                                       **options).install(app)
+
+
+def sample(text, name, **labels):
+    """Value of one series in a Prometheus text exposition"""
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    series = f'{name}{{{selector}}}' if labels else name
+    match = re.search(rf'^{re.escape(series)} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_counts_per_route_template_and_status():
+    app, registry = make_app()
+    client = app.test_client()
+    for path in ('/', '/', '/items/3', '/items/99', '/missing'):
+        client.get(path)
+
+    text = registry.render().decode()
+
+    assert sample(text, 'http_requests_total', route='/', status='2xx') == 2
+    assert sample(text, 'http_requests_total', route='/items/<int:item>',
+                  status='2xx') == 1
+    assert sample(text, 'http_requests_total', route='/items/<int:item>',
+                  status='4xx') == 1
+    assert sample(text, 'http_requests_total', route='unmatched',
+                  status='4xx') == 1
+    assert sample(text, 'http_requests_in_flight') == 0
+
+def test_histogram_buckets_are_cumulative():
+    app, registry = make_app(buckets=(0.5, 60.0))
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/')
+
+    text = registry.render().decode()
+
+    assert sample(text, 'http_request_duration_seconds_bucket', route='/',
+                  le='0.5') == 3
+    assert sample(text, 'http_request_duration_seconds_bucket', route='/',
+                  le='+Inf') == 3
+    assert sample(text, 'http_request_duration_seconds_count', route='/') == 3
+    assert 0 < sample(text, 'http_request_duration_seconds_sum', route='/') < 1.5
+    assert sample(text, 'process_resident_memory_bytes') > 0
+
+def test_readiness():
+    app, registry = make_app(max_in_flight=2, max_latency=60.0)
+    assert registry.readiness() == (False, 'warming up')
+    registry.warm = True
+    assert registry.readiness() == (True, 'ready')
+
+    # Two requests besides the probe itself are in flight
+    registry._row()[0] += 3
+    ready, reason = registry.readiness()
+    assert not ready and 'in flight' in reason
+    registry._row()[0] -= 3
+
+    registry.max_latency = 0.0
+    app.test_client().get('/')
+    ready, reason = registry.readiness()
+    assert not ready and 'latency' in reason
+
+@pytest.mark.parametrize('threads, expected', [
+    ('2', 1), ('8', 7), ('1', 1), (None, 32),
+])
+def test_in_flight_limit_follows_the_thread_count(monkeypatch, threads,
+                                                  expected):
+    monkeypatch.delenv('READY_MAX_IN_FLIGHT', raising=False)
+    if threads is None:
+        monkeypatch.delenv('WEB_THREADS', raising=False)
+    else:
+        monkeypatch.setenv('WEB_THREADS', threads)
+
+    assert make_app()[1].max_in_flight == expected
+
+# Seconds (nginx), milliseconds (Heroku), microseconds (Apache)
+@pytest.mark.parametrize('header', [
+    't=1700000000.000', '1700000000', 't=1700000000000', 't=1700000000000000',
+])
+def test_queue_time(header):
+    assert metrics.queue_time(header, now=1700000002.5) == \
+        pytest.approx(2.5)
+
+@pytest.mark.parametrize('header', [None, '', 't=soon', 't=1700000009'])
+def test_queue_time_without_a_usable_stamp(header):
+    assert metrics.queue_time(header, now=1700000000.0) == 0.0
+
+def test_queueing_counts_towards_readiness():
+    app, registry = make_app(max_latency=1.0)
+    registry.warm = True
+
+    app.test_client().get('/', headers={
+        'X-Request-Start': f't={time.time() - 5:.3f}'})
+
+    ready, reason = registry.readiness()
+    assert not ready and 'latency' in reason
+
+def test_workers_share_a_directory(tmp_path):
+    first_app, first = make_app(str(tmp_path))
+    second_app, second = make_app(str(tmp_path))
+    first_app.test_client().get('/')
+    second_app.test_client().get('/')
+    second_app.test_client().get('/')
+
+    for registry in (first, second):
+        text = registry.render().decode()
+        assert sample(text, 'http_requests_total', route='/',
+                      status='2xx') == 3
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_exited_workers_are_archived(tmp_path):
+    app, registry = make_app(str(tmp_path))
+    app.test_client().get('/')
+    pid = os.fork()
+    if pid == 0:  # a worker serving two requests, then exiting
+        try:
+            app.test_client().get('/')
+            app.test_client().get('/items/1')
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    text = registry.render().decode()
+
+    assert sample(text, 'http_requests_total', route='/', status='2xx') == 2
+    assert sample(text, 'http_requests_total', route='/items/<int:item>',
+                  status='2xx') == 1
+    names = os.listdir(tmp_path)
+    assert not any(f'-{pid}-' in name for name in names)
+    assert any(metrics.ARCHIVE in name for name in names)
+    # Folded in once, not again on the next scrape
+    assert sample(registry.render().decode(), 'http_requests_total',
+                  route='/', status='2xx') == 2
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_readiness_covers_every_worker(tmp_path):
+    # Two threads per worker: the probe takes one of this worker's
+    app, registry = make_app(str(tmp_path), max_in_flight=1,
+                             max_latency=60.0)
+    registry.warm = True
+    busy, release = os.pipe(), os.pipe()
+    pid = os.fork()
+    if pid == 0:  # a worker with both threads busy until released
+        try:
+            registry._row()[0] += 2
+            os.write(busy[1], b'x')
+            os.read(release[0], 1)
+        finally:
+            os._exit(0)
+    os.read(busy[0], 1)
+    try:
+        registry._row()[0] += 1  # the probe
+        assert registry.workers_in_flight() == {pid: 2, os.getpid(): 1}
+        assert registry.readiness() == (True, 'ready')
+
+        registry._row()[0] += 1
+        ready, reason = registry.readiness()
+        assert not ready and '3 requests in flight in 2 worker(s)' in reason
+    finally:
+        os.write(release[1], b'x')
+        os.waitpid(pid, 0)
+        for fd in busy + release:
+            os.close(fd)
+
+    registry._row()[0] -= 1
+    assert registry.readiness() == (True, 'ready')
+
+def test_clear_directory(tmp_path):
+    app, registry = make_app(str(tmp_path))
+    app.test_client().get('/')
+
+    metrics.clear_directory(str(tmp_path))
+
+    assert not [name for name in os.listdir(tmp_path)
+                if name.endswith('.metrics')]
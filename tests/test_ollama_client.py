@@ -0,0 +1,141 @@
+"""
+Tests for the Ollama client against a local fake Ollama server
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_parser import parse_with_ollama, parse_with_ollama_many
+from ollama_client import CircuitBreaker, OllamaClient, OllamaUnavailable
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Mimics /api/tags and /api/generate"""
+
+    reply = {"instance_type": "t3.small", "database_needed": True,
+             "database_type": "mysql", "region": "eu-west-1",
+             "app_type": "api"}
+    delay = 0.0
+    calls = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send(200, {"models": [{"name": "llama3.2"}]})
+        else:
+            self._send(404, {})
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        json.loads(self.rfile.read(length))
+        cls = type(self)
+        with cls.lock:
+            cls.calls += 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            self._send(200, {"model": "llama3.2",
+                             "response": json.dumps(cls.reply),
+                             "done": True})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+@pytest.fixture
+def ollama_server():
+    handler = type('Handler', (FakeOllama,), {'calls': 0, 'in_flight': 0,
+                                              'max_in_flight': 0,
+                                              'lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_uses_model_reply(ollama_server):
+    url, _ = ollama_server
+    client = OllamaClient(base_url=url)
+
+    specs = parse_with_ollama("a web server", client=client)
+
+    assert specs.instance_type == 't3.small'
+    assert specs.database_type == 'mysql'
+    assert specs.region == 'eu-west-1'
+
+def test_health_is_cached(ollama_server):
+    url, _ = ollama_server
+    client = OllamaClient(base_url=url, health_ttl=60)
+    assert client.is_healthy()
+
+    client.base_url = 'http://127.0.0.1:1'
+    assert client.is_healthy()
+    assert not client.is_healthy(force=True)
+
+def test_many_calls_in_flight(ollama_server):
+    url, handler = ollama_server
+    handler.delay = 0.2
+    client = OllamaClient(base_url=url, pool_size=8)
+
+    start = time.monotonic()
+    results = list(parse_with_ollama_many(["api"] * 8, client=client,
+                                          max_workers=8))
+
+    assert len(results) == 8
+    assert handler.max_in_flight > 1
+    assert time.monotonic() - start < 8 * 0.2
+
+def test_fallback_when_down():
+    client = OllamaClient(base_url='http://127.0.0.1:1')
+
+    specs = parse_with_ollama("API with PostgreSQL", client=client)
+
+    assert specs.database_type == 'postgres'
+    assert specs.app_type == 'api'
+
+def test_breaker_opens_on_slow_model(ollama_server):
+    url, handler = ollama_server
+    handler.delay = 0.5
+    client = OllamaClient(base_url=url, timeout=0.1,
+                          breaker=CircuitBreaker(failure_threshold=2,
+                                                 reset_timeout=60))
+
+    for _ in range(2):
+        assert parse_with_ollama("web app", client=client).region == 'us-east-1'
+    assert client.breaker.state == 'open'
+
+    calls = handler.calls
+    with pytest.raises(OllamaUnavailable):
+        client.generate("anything")
+    assert handler.calls == calls
+
+def test_breaker_half_open_recovers():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
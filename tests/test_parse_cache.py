@@ -0,0 +1,92 @@
+"""
+Unit tests for the parse cache
+"""
+
+import time
+
+import pytest
+
+from ai_parser import (keyword_parser_version, parse_infrastructure_requests,
+                       parse_with_ollama)
+from ollama_client import OllamaClient
+from infra_spec import InfraSpec
+from parse_cache import ParseCache, normalize_request
+
+
+def test_normalize_request():
+    """Case, punctuation, whitespace and stopwords are ignored"""
+    assert normalize_request("Web App with MySQL!") == "web app mysql"
+    assert normalize_request("  web   app with mysql ") == "web app mysql"
+    assert normalize_request("API, 1.5k req/s.") == "api 1.5k req/s"
+
+def test_memory_lru_eviction():
+    cache = ParseCache(max_entries=2)
+    for text in ("web app", "api server", "mysql database"):
+        cache.put(text, "v1", InfraSpec(region=text))
+
+    assert cache.get("web app", "v1") is None
+    assert cache.get("api server", "v1") == InfraSpec(region="api server")
+    assert cache.stats()['evictions'] == 1
+
+def test_memory_ttl_expiry():
+    cache = ParseCache(ttl=0.01)
+    cache.put("web app", "v1", InfraSpec())
+    time.sleep(0.02)
+
+    assert cache.get("web app", "v1") is None
+    assert cache.stats()['expirations'] == 1
+
+def test_disk_tier_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ParseCache(path=path)
+    spec = InfraSpec(database_needed=True, database_type="mysql")
+    cache.put("Web App with MySQL", "v1", spec)
+    cache.close()
+
+    cache = ParseCache(path=path)
+    assert cache.get("web app mysql", "v1") == spec
+    assert cache.get("web app mysql", "v1") == spec
+    stats = cache.stats()
+    assert stats['disk_hits'] == 1
+    assert stats['memory_hits'] == 1
+
+def test_version_change_invalidates(tmp_path):
+    cache = ParseCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put("web app", "v1", InfraSpec())
+
+    assert cache.get("web app", "v2") is None
+    assert cache.prune(["v2"]) == 1
+    assert cache.stats()['disk_entries'] == 0
+
+def test_batch_parse_uses_cache():
+    cache = ParseCache()
+    requests = ["Web App with MySQL!", "web app with mysql", "an API"]
+
+    results = list(parse_infrastructure_requests(requests, cache=cache))
+
+    assert results[0] == results[1]
+    assert results[0].database_type == 'mysql'
+    assert cache.stats()['memory_hits'] == 1
+    assert cache.get("web app mysql", keyword_parser_version()) is not None
+
+@pytest.mark.parametrize('first, second', [
+    ("API for 1.5k users", "API for 1 5k users"),
+    ("API for 300 requests second", "API for 300 requests a second"),
+])
+def test_cache_key_keeps_load_hints(first, second):
+    """Requests that size differently never share a cache entry"""
+    cache = ParseCache()
+    fresh = list(parse_infrastructure_requests([first, second]))
+
+    assert fresh[0] != fresh[1]
+    assert list(parse_infrastructure_requests([first, second],
+                                              cache=cache)) == fresh
+    assert cache.stats()['memory_hits'] == 0
+
+def test_fallback_results_not_cached():
+    cache = ParseCache()
+    client = OllamaClient(base_url='http://127.0.0.1:1')
+
+    parse_with_ollama("API with PostgreSQL", client=client, cache=cache)
+
+    assert cache.stats()['memory_entries'] == 0
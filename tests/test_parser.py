@@ -4,23 +4,64 @@ Unit tests for AI Parser
 
 import pytest
 import os
-from ai_parser import parse_infrastructure_request
+from ai_parser import parse_infrastructure_request, parse_infrastructure_requests
 
 def test_parser_basic():
     """Test basic parsing functionality"""
     result = parse_infrastructure_request("I need a simple web server")
     
-    assert 'instance_type' in result
-    assert 'database_needed' in result
-    assert 'region' in result
-    assert result['region'] == 'us-east-1'
+    assert result.instance_type
+    assert result.database_needed is False
+    assert result.region == 'us-east-1'
 
 def test_parser_with_database():
     """Test parsing with database requirement"""
     result = parse_infrastructure_request("Create an API with PostgreSQL")
     
-    assert result['database_needed'] == True
-    assert result['database_type'] in ['postgres', 'postgresql', 'mysql']
+    assert result.database_needed == True
+    assert result.database_type in ['postgres', 'postgresql', 'mysql']
+
+def test_parser_batch_matches_single(capsys):
+    """Batch parsing yields the same specs as single parsing, silently"""
+    requests = [
+        "I need a simple web server",
+        "Create API with PostgreSQL database",
+        "Web application with MySQL",
+    ]
+    expected = [parse_infrastructure_request(r) for r in requests]
+    capsys.readouterr()
+
+    assert list(parse_infrastructure_requests(requests)) == expected
+    assert capsys.readouterr().out == ""
+
+def test_parser_word_boundaries():
+    """Keywords only match whole words"""
+    result = next(parse_infrastructure_requests(["Restaurant feedback site"]))
+
+    assert result.database_needed == False
+    assert result.app_type == 'web'
+
+def test_parser_scale_hints():
+    """User counts switch on autoscaling with sized group bounds"""
+    small, large = parse_infrastructure_requests([
+        "Simple web server for 200 users",
+        "Web app that can handle 10k concurrent users",
+    ])
+
+    assert small.expected_users == 200
+    assert small.autoscaling is False
+    assert (small.min_size, small.max_size) == (1, 1)
+    assert large.expected_users == 10000
+    assert large.autoscaling is True
+    assert large.min_size >= 2
+    assert large.max_size == 2 * large.min_size
+    assert large.instance_type != 't2.micro'
+
+def test_parser_scale_keyword_without_count():
+    result = next(parse_infrastructure_requests(["Highly available API"]))
+
+    assert result.autoscaling is True
+    assert result.min_size >= 2 and result.max_size > result.min_size
 
 if __name__ == "__main__":
     pytest.main([__file__, '-v'])
\ No newline at end of file
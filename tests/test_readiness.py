@@ -0,0 +1,107 @@
+"""
+Tests for the readiness prober against local SSH-banner and HTTP servers
+"""
+
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import aws_deployer
+from readiness import backoff_delay, wait_until_ready
+
+
+class FakeHealth(BaseHTTPRequestHandler):
+    """/health fails `failures` times, then returns 200"""
+
+    failures = 0
+    calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).calls += 1
+        status = 503 if type(self).calls <= self.failures else 200
+        self.send_response(status if self.path == '/health' else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class FakeSSH(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.sendall(b'SSH-2.0-OpenSSH_fake\r\n')
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,),
+                              daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def instance():
+    FakeHealth.failures, FakeHealth.calls = 0, 0
+    http = _serve(ThreadingHTTPServer(('127.0.0.1', 0), FakeHealth))
+    ssh = _serve(socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeSSH))
+    yield {'ssh_port': ssh.server_address[1],
+           'http_port': http.server_address[1]}
+    for server in (http, ssh):
+        server.shutdown()
+        server.server_close()
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_backoff_grows_with_jitter():
+    assert backoff_delay(0, rng=lambda: 0.0) == 0.25
+    assert backoff_delay(3, rng=lambda: 1.0) == 4.0
+    assert backoff_delay(10, max_delay=10, rng=lambda: 0.0) == 5.0
+
+def test_probe_reports_each_stage(instance):
+    result, = wait_until_ready(['127.0.0.1'], timeout=5, **instance)
+
+    assert result.ok and result.attempts == 1
+    assert result.time_to_first_ping is not None
+    assert result.time_to_ssh is not None
+    assert result.time_to_healthy is not None
+
+def test_probe_retries_until_healthy(instance):
+    FakeHealth.failures = 2
+
+    result, = wait_until_ready(['127.0.0.1'], timeout=5, base_delay=0.01,
+                               **instance)
+
+    assert result.ok
+    assert result.attempts == 3
+    assert result.time_to_ssh <= result.time_to_healthy
+
+def test_probe_times_out_on_closed_ports():
+    result, = wait_until_ready(['127.0.0.1'], timeout=0.2, base_delay=0.01,
+                               ssh_port=_closed_port(),
+                               http_port=_closed_port())
+
+    assert not result.ok
+    # A refused connection still proves the host is up
+    assert result.time_to_first_ping is not None
+    assert result.time_to_ssh is None and result.time_to_healthy is None
+
+def test_probe_many_hosts_concurrently(instance):
+    hosts = ['127.0.0.1', 'localhost', '127.0.0.1']
+
+    results = wait_until_ready(hosts, until='ssh', timeout=5, concurrency=2,
+                               **instance)
+
+    assert [r.host for r in results] == hosts
+    assert all(r.ok for r in results)
+
+def test_wait_for_instance_until_ssh(instance, capsys):
+    assert aws_deployer.wait_for_instance('127.0.0.1', timeout=5, **instance)
+    assert "SSH ready" in capsys.readouterr().out
@@ -0,0 +1,19 @@
+"""
+Startup tests - the CLI must not load heavy optional dependencies
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from bench_startup import LAZY_MODULES, import_profile
+
+
+def test_main_import_is_lazy():
+    """Importing main.py loads none of the lazily-imported dependencies"""
+    total, modules = import_profile('main')
+
+    assert total is not None
+    loaded = {name.split('.')[0] for name in modules}
+    assert not loaded & set(LAZY_MODULES)
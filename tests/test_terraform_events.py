@@ -0,0 +1,69 @@
+"""
+Unit tests for the Terraform -json event timeline and timing history
+"""
+
+import json
+
+from terraform_events import (ResourceTimeline, parse_event, percentile,
+                              record_timeline, resource_type_stats)
+
+
+def _event(kind, addr, action='create', seconds=None, level='info'):
+    hook = {'resource': {'addr': addr, 'resource_type': addr.split('.')[0]},
+            'action': action}
+    if seconds is not None:
+        hook['elapsed_seconds'] = seconds
+    return json.dumps({'type': kind, '@level': level, 'hook': hook,
+                       '@message': f'{addr}: {kind}'})
+
+
+def test_parse_event_ignores_plain_lines():
+    assert parse_event("Initializing the backend...") is None
+    assert parse_event("{not json") is None
+    assert parse_event(_event('apply_start', 'aws_vpc.main'))['type'] == \
+        'apply_start'
+
+def test_timeline_tracks_retries_and_errors():
+    timeline = ResourceTimeline()
+    lines = [
+        _event('apply_start', 'aws_db_instance.main'),
+        _event('apply_errored', 'aws_db_instance.main', seconds=40),
+        _event('apply_start', 'aws_db_instance.main'),
+        _event('apply_progress', 'aws_db_instance.main', seconds=10),
+        _event('apply_complete', 'aws_db_instance.main', seconds=280),
+        _event('apply_start', 'aws_vpc.main'),
+        json.dumps({'type': 'diagnostic', '@level': 'error',
+                    '@message': 'Error: quota exceeded'}),
+    ]
+
+    events = list(timeline.feed_lines(lines))
+
+    assert len(events) == len(lines)
+    db = timeline.resources['aws_db_instance.main']
+    assert (db.status, db.seconds, db.attempts) == ('complete', 280, 2)
+    assert timeline.resources['aws_vpc.main'].status == 'running'
+    assert [t.address for t in timeline.finished()] == ['aws_db_instance.main']
+    assert timeline.errors == ['Error: quota exceeded']
+    assert "(2 attempts)" in timeline.summary()
+
+def test_history_percentiles_per_type(tmp_path):
+    path = str(tmp_path / "timings.jsonl")
+    for seconds in range(1, 21):
+        timeline = ResourceTimeline()
+        list(timeline.feed_lines([
+            _event('apply_start', 'aws_db_instance.main'),
+            _event('apply_complete', 'aws_db_instance.main', seconds=seconds),
+            _event('apply_start', 'aws_vpc.main'),
+            _event('apply_errored', 'aws_vpc.main', seconds=1),
+        ]))
+        record_timeline(timeline, stack='s', path=path)
+
+    stats = resource_type_stats(path)
+
+    assert stats[('aws_db_instance', 'create')] == {
+        'count': 20, 'p50': 10, 'p95': 19, 'max': 20}
+    # Errored applies are kept in the history but not in the percentiles
+    assert ('aws_vpc', 'create') not in stats
+    assert resource_type_stats(path, max_samples=5)[
+        ('aws_db_instance', 'create')]['p50'] == 18
+    assert percentile([5], 0.95) == 5
@@ -0,0 +1,71 @@
+"""
+Unit tests for the Terraform JSON resource graph
+"""
+
+import json
+import os
+
+from infra_spec import InfraSpec
+from terraform_generator import write_terraform
+from terraform_graph import build_graph, render_terraform_json
+
+
+def test_graph_document_structure():
+    doc = json.loads(render_terraform_json(InfraSpec(region="eu-west-1")))
+
+    assert doc['provider']['aws']['region'] == 'eu-west-1'
+    assert doc['terraform']['required_providers']['aws']['source'] == \
+        'hashicorp/aws'
+    assert doc['resource']['aws_instance']['web']['ami'] == \
+        '${data.aws_ami.amazon_linux_2.id}'
+    assert 'aws_db_instance' not in doc['resource']
+    assert doc['output']['application_url']['value'] == \
+        'http://${aws_instance.web.public_ip}'
+
+def test_graph_database_resources():
+    graph = build_graph(InfraSpec(database_needed=True, database_type="mysql"))
+
+    db_sg = graph.attributes('aws_security_group.db')
+    assert db_sg['ingress'][0]['from_port'] == 3306
+    assert graph.attributes('aws_db_instance.main')['engine'] == 'mysql'
+    assert 'database_endpoint' in graph.outputs
+
+def test_graph_autoscaling_tier():
+    graph = build_graph(InfraSpec(autoscaling=True, min_size=2, max_size=8,
+                                  instance_type="t3.small"))
+    order = graph.topological_order()
+
+    assert 'aws_instance' not in graph.resources
+    group = graph.attributes('aws_autoscaling_group.web')
+    assert (group['min_size'], group['max_size']) == (2, 8)
+    assert graph.attributes('aws_launch_template.web')['instance_type'] == \
+        't3.small'
+    assert order.index('aws_lb_target_group.web') < \
+        order.index('aws_autoscaling_group.web')
+    assert order.index('data.aws_availability_zones.available') < \
+        order.index('aws_subnet.public_b')
+    assert graph.outputs['application_url']['value'] == \
+        'http://${aws_lb.web.dns_name}'
+
+def test_graph_dependencies_and_order():
+    graph = build_graph(InfraSpec(database_needed=True,
+                                  database_type="postgres"))
+    deps = graph.dependencies()
+
+    assert deps['aws_vpc.main'] == set()
+    assert deps['aws_instance.web'] == {'data.aws_ami.amazon_linux_2',
+                                        'aws_subnet.public',
+                                        'aws_security_group.web'}
+    order = graph.topological_order()
+    for address, needs in deps.items():
+        for dep in needs:
+            assert order.index(dep) < order.index(address)
+
+def test_write_json_format(tmp_path):
+    out = str(tmp_path)
+    write_terraform(InfraSpec(), out)
+
+    _, changed = write_terraform(InfraSpec(), out, fmt='json')
+
+    assert 'main.tf.json' in changed
+    assert sorted(os.listdir(out)) == ['.mini-infra-gpt.json', 'main.tf.json']
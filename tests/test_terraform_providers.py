@@ -0,0 +1,83 @@
+"""
+Unit tests for the shared provider cache, mirror and lock file reuse
+"""
+
+import os
+
+import pytest
+
+import aws_deployer
+from infra_spec import InfraSpec
+from terraform_generator import write_terraform
+from terraform_providers import LOCK_FILE, MIRROR_ENV, terraform_env
+
+
+def test_init_shares_plugin_cache_and_lock_file(tmp_path, fake_terraform,
+                                                terraform_home):
+    first, _ = write_terraform(InfraSpec(), str(tmp_path / "a"))
+    second, _ = write_terraform(InfraSpec(app_type="api"), str(tmp_path / "b"))
+    with open(os.path.join(first, LOCK_FILE), 'w') as f:
+        f.write("# pinned by the first stack\n")
+
+    aws_deployer.terraform_init(first)
+    aws_deployer.terraform_init(second)
+
+    with open(os.path.join(second, LOCK_FILE)) as f:
+        assert f.read() == "# pinned by the first stack\n"
+    calls = fake_terraform.calls()
+    assert [call['args'] for call in calls] == [['init', '-input=false']] * 2
+    env = calls[1]['env']
+    assert env['TF_PLUGIN_CACHE_DIR'] == str(terraform_home / "plugin-cache")
+    with open(env['TF_CLI_CONFIG_FILE']) as f:
+        config = f.read()
+    assert 'plugin_cache_dir' in config
+    assert 'filesystem_mirror' not in config
+
+def test_init_offline_from_mirror(tmp_path, monkeypatch, fake_terraform):
+    mirror = str(tmp_path / "mirror")
+    monkeypatch.setenv(MIRROR_ENV, mirror)
+    out, _ = write_terraform(InfraSpec(), str(tmp_path / "tf"))
+
+    aws_deployer.terraform_init(out)
+    aws_deployer.terraform_init(out)
+
+    calls = fake_terraform.calls()
+    assert len(calls) == 1
+    with open(calls[0]['env']['TF_CLI_CONFIG_FILE']) as f:
+        config = f.read()
+    assert f'path    = "{mirror}"' in config
+    assert 'exclude = ["*/*/*"]' in config
+
+def test_existing_lock_file_is_kept(tmp_path, fake_terraform):
+    first, _ = write_terraform(InfraSpec(), str(tmp_path / "a"))
+    aws_deployer.terraform_init(first)
+
+    # Same providers, but the directory already pins its own versions
+    second, _ = write_terraform(InfraSpec(region="eu-west-1"),
+                                str(tmp_path / "b"))
+    with open(os.path.join(second, LOCK_FILE), 'w') as f:
+        f.write("# own lock\n")
+    aws_deployer.terraform_init(second)
+
+    with open(os.path.join(second, LOCK_FILE)) as f:
+        assert f.read() == "# own lock\n"
+
+def test_mirror_added_to_user_cli_config(tmp_path, monkeypatch,
+                                         terraform_home):
+    user_config = tmp_path / "user.tfrc"
+    user_config.write_text('credentials "app.terraform.io" {\n'
+                           '  token = "xyz"\n}\n')
+    monkeypatch.setenv('TF_CLI_CONFIG_FILE', str(user_config))
+
+    assert terraform_env()['TF_CLI_CONFIG_FILE'] == str(user_config)
+
+    env = terraform_env(str(tmp_path / "mirror"))
+    with open(env['TF_CLI_CONFIG_FILE']) as f:
+        config = f.read()
+    assert env['TF_CLI_CONFIG_FILE'] != str(user_config)
+    assert config.startswith(user_config.read_text())
+    assert f'path    = "{tmp_path / "mirror"}"' in config
+
+    user_config.write_text('provider_installation {\n  direct {}\n}\n')
+    with pytest.raises(ValueError, match="provider_installation"):
+        terraform_env(str(tmp_path / "mirror"))
@@ -0,0 +1,108 @@
+"""
+Unit tests for reading outputs and attributes from local Terraform state
+"""
+
+import json
+import os
+
+import pytest
+
+import aws_deployer
+import terraform_state
+from terraform_state import read_outputs, resource_attributes
+
+STATE = {
+    'version': 4,
+    'terraform_version': '1.9.0',
+    'serial': 12,
+    'lineage': 'abc',
+    'outputs': {
+        'instance_public_ip': {'value': '203.0.113.10', 'type': 'string'},
+        'ports': {'value': [80, 22], 'type': ['list', 'number']},
+        'multi_az': {'value': False, 'type': 'bool'},
+    },
+    'resources': [
+        {'mode': 'data', 'type': 'aws_ami', 'name': 'amazon_linux_2',
+         'instances': [{'attributes': {'id': 'ami-123'}}]},
+        {'mode': 'managed', 'type': 'aws_instance', 'name': 'web',
+         'instances': [{'attributes': {'id': 'i-0abc',
+                                       'user_data': 'x' * 5000}}]},
+    ],
+}
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    # Tiny chunks exercise values split across reads
+    monkeypatch.setattr(terraform_state, '_CHUNK_SIZE', 7)
+    with open(tmp_path / 'terraform.tfstate', 'w') as f:
+        json.dump(STATE, f, indent=2)
+    return str(tmp_path)
+
+
+def test_read_outputs(state_dir):
+    assert read_outputs(state_dir) == STATE['outputs']
+    assert aws_deployer.terraform_output(state_dir, 'instance_public_ip') == \
+        '203.0.113.10'
+    assert aws_deployer.terraform_output(state_dir, 'missing') == ''
+
+def test_raw_output_formatting(state_dir):
+    # Like `terraform output -raw`, not Python's str()
+    assert aws_deployer.terraform_output(state_dir, 'multi_az') == 'false'
+    assert aws_deployer.terraform_output(state_dir, 'ports') == '[80, 22]'
+
+def test_outputs_stop_before_resources(tmp_path):
+    # Resources after the outputs are never parsed
+    text = json.dumps({'version': 4, 'outputs': STATE['outputs']})
+    with open(tmp_path / 'terraform.tfstate', 'w') as f:
+        f.write(text[:-1] + ', "resources": [{"broken": ]}')
+
+    assert read_outputs(str(tmp_path)) == STATE['outputs']
+
+def test_outputs_cached_by_mtime(state_dir, monkeypatch):
+    calls = []
+    original = terraform_state._read_outputs
+    monkeypatch.setattr(terraform_state, '_read_outputs',
+                        lambda path: calls.append(path) or original(path))
+
+    read_outputs(state_dir)
+    read_outputs(state_dir)
+    assert len(calls) == 1
+
+    path = os.path.join(state_dir, 'terraform.tfstate')
+    os.utime(path, ns=(0, 0))
+    assert read_outputs(state_dir) == STATE['outputs']
+    assert len(calls) == 2
+
+def test_resource_attributes(state_dir):
+    web = resource_attributes(state_dir, 'aws_instance.web')
+
+    assert web['id'] == 'i-0abc'
+    assert len(web['user_data']) == 5000
+    assert resource_attributes(state_dir, 'data.aws_ami.amazon_linux_2') == \
+        {'id': 'ami-123'}
+    assert resource_attributes(state_dir, 'aws_instance.other') is None
+
+def test_missing_state_and_remote_backend(tmp_path, fake_terraform):
+    assert read_outputs(str(tmp_path)) == {}
+
+    os.makedirs(tmp_path / '.terraform')
+    with open(tmp_path / '.terraform' / 'terraform.tfstate', 'w') as f:
+        json.dump({'backend': {'type': 's3', 'config': {}}}, f)
+
+    assert read_outputs(str(tmp_path)) == {'source': {'value': 'cli',
+                                                      'type': 'string'}}
+    assert fake_terraform.commands() == ['output']
+
+def test_remote_output_failure_exits(tmp_path, fake_terraform, monkeypatch,
+                                     capsys):
+    os.makedirs(tmp_path / '.terraform')
+    with open(tmp_path / '.terraform' / 'terraform.tfstate', 'w') as f:
+        json.dump({'backend': {'type': 's3', 'config': {}}}, f)
+    monkeypatch.setenv('FAKE_TERRAFORM_FAIL', f'output:{tmp_path.name}')
+
+    with pytest.raises(SystemExit) as exc:
+        aws_deployer.terraform_output(str(tmp_path))
+
+    assert exc.value.code == 1
+    assert 'Command failed: terraform output -json' in capsys.readouterr().out